@@ -0,0 +1,80 @@
+import logging
+import os
+import random
+import time
+from typing import Dict
+
+from app import telemetry
+
+logger = logging.getLogger("app.acesso")
+
+# Fração das requisições registradas no log de acesso. LOG_ACESSO_AMOSTRAGEM define taxas
+# por rota, pelo nome do handler: "obter_aluno=0.01,obter_rota=0.05". Respostas 5xx são
+# sempre registradas.
+LOG_ACESSO_TAXA = float(os.getenv("LOG_ACESSO_TAXA", "1"))
+
+
+def _taxas(configuracao: str) -> Dict[str, float]:
+    taxas = {}
+    for item in filter(None, (parte.strip() for parte in configuracao.split(","))):
+        rota, _, taxa = item.partition("=")
+        taxas[rota.strip()] = float(taxa)
+    return taxas
+
+
+LOG_ACESSO_AMOSTRAGEM = _taxas(os.getenv("LOG_ACESSO_AMOSTRAGEM", ""))
+
+
+class LogDeAcesso:
+    """Middleware ASGI: uma linha por requisição com request id, rota, status, duração e banco.
+
+    Roda dentro de app.instrumentation.Instrumentacao, que abre o contexto da requisição.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        inicio = time.perf_counter()
+        resposta = {"status": 500}
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                resposta["status"] = mensagem["status"]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            self._registrar(scope, resposta["status"], time.perf_counter() - inicio)
+
+    def _registrar(self, scope, status: int, duracao: float) -> None:
+        rota = scope.get("route")
+        nome = getattr(rota, "name", None)
+        taxa = 1.0 if status >= 500 else LOG_ACESSO_AMOSTRAGEM.get(nome, LOG_ACESSO_TAXA)
+        # A amostragem é decidida antes de montar qualquer campo da linha
+        if taxa <= 0 or (taxa < 1 and random.random() >= taxa) or not logger.isEnabledFor(logging.INFO):
+            return
+        contexto = telemetry.atual()
+        if contexto is None:
+            return
+        caminho = getattr(rota, "path", scope["path"])
+        logger.info(
+            "%s %s %d %.1fms db=%d/%d linhas/%.1fms",
+            scope["method"], caminho, status, duracao * 1000,
+            contexto.consultas, contexto.linhas, contexto.tempo_db * 1000,
+            extra={"campos": {
+                "metodo": scope["method"],
+                "rota": caminho,
+                "handler": nome,
+                "status": status,
+                "duracao_ms": round(duracao * 1000, 2),
+                "db_consultas": contexto.consultas,
+                "db_linhas": contexto.linhas,
+                "db_ms": round(contexto.tempo_db * 1000, 2),
+                "amostragem": taxa,
+            }},
+        )
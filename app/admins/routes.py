@@ -1,8 +1,14 @@
 from fastapi import APIRouter, HTTPException, Query, status
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from typing import Optional
 import uuid
 
 from app.models import Admin
+from app import counters, statements
+from app.writes import atualizar_linha, carregar_para_atualizar
+from app.paging import LIMITE_MAXIMO, paginar
+from app.export import exportar_ndjson
+from app.profiles import perfil
 from . import schemas
 
 router = APIRouter(
@@ -12,14 +18,16 @@ router = APIRouter(
 
 @router.post("/", response_model=schemas.AdminOut, status_code=status.HTTP_201_CREATED)
 async def criar_admin(admin: schemas.AdminCreate):
-    novo_admin = await Admin.create_async(**admin.dict())
+    novo_admin = await statements.criar(Admin, **admin.dict())
+    await counters.incrementar(Admin)
     return novo_admin
 
-@router.get("/", response_model=List[schemas.AdminOut])
+@router.get("/", response_model=schemas.AdminPagina, dependencies=[perfil("scan")])
 async def listar_admins(
     email: Optional[str] = None,
     nivel_permissao: Optional[int] = None,
-    limit: int = Query(10, gt=0, description="O número de administradores a serem retornados não pode ser negativo.")
+    limit: int = Query(10, gt=0, le=LIMITE_MAXIMO, description="O número de administradores a serem retornados não pode ser negativo."),
+    cursor: Optional[str] = Query(None, description="Valor de next_cursor retornado pela página anterior.")
 ):
     query = Admin.all()
     if email:
@@ -27,41 +35,43 @@ async def listar_admins(
     if nivel_permissao is not None:
         query = query.filter(nivel_permissao=nivel_permissao).allow_filtering()
     
-    admins = await query.limit(limit).all_async()
-    return admins
+    return await paginar(query, limit, cursor)
 
 @router.get("/count/", response_model=int)
 async def contar_admins():
-    return await Admin.all().allow_filtering().count_async()
+    return await counters.ler(Admin)
+
+@router.get("/export", response_class=StreamingResponse, dependencies=[perfil("scan")])
+async def exportar_admins():
+    return exportar_ndjson(Admin, schemas.AdminOut)
 
 @router.get("/{admin_id}", response_model=schemas.AdminOut)
 async def obter_admin(admin_id: uuid.UUID):
-    try:
-        admin = await Admin.get_async(id=admin_id)
-        return admin
-    except Admin.DoesNotExist:
+    admin = await statements.obter(Admin, id=admin_id)
+    if admin is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Admin não encontrado")
+    return admin
 
 @router.put("/{admin_id}", response_model=schemas.AdminOut)
 async def atualizar_admin(admin_id: uuid.UUID, admin_data: schemas.AdminUpdate):
-    try:
-        admin = await Admin.get_async(id=admin_id)
-    except Admin.DoesNotExist:
+    admin = await carregar_para_atualizar(Admin, id=admin_id)
+    if admin is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Admin não encontrado")
 
     update_data = admin_data.dict(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nenhum dado fornecido para atualização")
 
-    await admin.update_async(**update_data)
-    admin_atualizado = await Admin.get_async(id=admin_id)
+    admin_atualizado = await atualizar_linha(admin, update_data)
+    if admin_atualizado is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Admin não encontrado")
     return admin_atualizado
 
 @router.delete("/{admin_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def deletar_admin(admin_id: uuid.UUID):
-    try:
-        admin = await Admin.get_async(id=admin_id)
-        await admin.delete_async()
-        return {}
-    except Admin.DoesNotExist:
+    admin = await statements.obter(Admin, id=admin_id)
+    if admin is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Admin não encontrado")
+    await statements.remover_instancia(admin)
+    await counters.decrementar(Admin)
+    return {}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Optional, List
 import uuid
 
 class AdminBase(BaseModel):
@@ -19,3 +19,7 @@ class AdminOut(AdminBase):
 
     class Config:
         orm_mode = True
+
+class AdminPagina(BaseModel):
+    items: List[AdminOut]
+    next_cursor: Optional[str] = None
@@ -1,9 +1,25 @@
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+from datetime import datetime, timezone
+import asyncio
+import os
 import uuid
 import logging
 
-from app.models import Aluno
+from app.models import Aluno, ViagemAlunos
+from app.lookups import (
+    atualizar_aluno_nas_inscricoes, remover_aluno_das_inscricoes, obter_viagem,
+    gravar_lookups, remover_lookups, valores_de_lookup, consulta_com_lookup,
+)
+from app import cache, counters, statements
+from app.writes import atualizar_linha, carregar_para_atualizar
+from app.paging import LIMITE_MAXIMO, paginar
+from app.export import exportar_ndjson
+from app.profiles import perfil
+from app.multiget import IdsEntrada, obter_varios
+from app.bulk import ResultadoBulk, criar_em_lote, em_paralelo
+from app.viagens import schemas as viagens_schemas
 from . import schemas
 
 router = APIRouter(
@@ -13,67 +29,113 @@ router = APIRouter(
 
 logger = logging.getLogger(__name__)
 
+# Leituras simultâneas em viagens_por_id ao resolver as viagens de um aluno
+VIAGENS_CONCORRENCIA = int(os.getenv("ALUNO_VIAGENS_CONCORRENCIA", "16"))
+
 @router.post("/", response_model=schemas.AlunoOut, status_code=status.HTTP_201_CREATED)
 async def criar_aluno(aluno: schemas.AlunoCreate):
-    logger.info(f"Recebida solicitação para criar aluno: {aluno.nome_completo}")
+    logger.info("Recebida solicitação para criar aluno: %s", aluno.nome_completo)
     try:
-        novo_aluno = await Aluno.create_async(**aluno.dict())
-        logger.info(f"Aluno {aluno.nome_completo} criado com sucesso com ID: {novo_aluno.id}")
+        novo_aluno = await statements.criar(Aluno, **aluno.dict())
+        await counters.incrementar(Aluno)
+        await gravar_lookups(novo_aluno)
+        logger.info("Aluno %s criado com sucesso com ID: %s", aluno.nome_completo, novo_aluno.id)
         return novo_aluno
     except Exception as e:
-        logger.error(f"Erro ao criar aluno {aluno.nome_completo}: {e}", exc_info=True)
+        logger.error("Erro ao criar aluno %s: %s", aluno.nome_completo, e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Erro interno ao criar o aluno.")
 
-@router.get("/", response_model=List[schemas.AlunoOut])
+@router.post("/bulk", response_model=ResultadoBulk)
+async def criar_alunos_em_lote(request: Request):
+    # Corpo: array JSON ou NDJSON de AlunoCreate; o resultado é reportado por linha
+    return await criar_em_lote(request, Aluno, schemas.AlunoCreate)
+
+@router.post("/batch_get", response_model=schemas.AlunoBatchGet)
+async def obter_alunos_por_ids(entrada: IdsEntrada):
+    items, ausentes = await obter_varios(Aluno, entrada.ids)
+    return {"items": items, "ausentes": ausentes}
+
+@router.get("/", response_model=schemas.AlunoPagina, dependencies=[perfil("scan")])
 async def listar_alunos(
     matricula: Optional[str] = None,
     nome: Optional[str] = None,
     email: Optional[str] = None,
-    limit: int = Query(10, gt=0, description="O número de alunos a serem retornados não pode ser negativo.")
+    limit: int = Query(10, gt=0, le=LIMITE_MAXIMO, description="O número de alunos a serem retornados não pode ser negativo."),
+    cursor: Optional[str] = Query(None, description="Valor de next_cursor retornado pela página anterior.")
 ):
-    query = Aluno.all()
-    if matricula:
-        query = query.filter(matricula=matricula).allow_filtering()
-    if nome:
-        query = query.filter(nome_completo=nome).allow_filtering()
-    if email:
-        query = query.filter(email=email).allow_filtering()
+    query = consulta_com_lookup(Aluno, {"matricula": matricula, "nome_completo": nome, "email": email})
 
-    alunos = await query.limit(limit).all_async()
-    return alunos
+    return await paginar(query, limit, cursor)
 
 @router.get("/count/", response_model=int)
 async def contar_alunos():
-    return await Aluno.all().allow_filtering().count_async()
+    return await counters.ler(Aluno)
+
+@router.get("/export", response_class=StreamingResponse, dependencies=[perfil("scan")])
+async def exportar_alunos():
+    return exportar_ndjson(Aluno, schemas.AlunoOut)
 
 @router.get("/{aluno_id}", response_model=schemas.AlunoOut)
 async def obter_aluno(aluno_id: uuid.UUID):
-    try:
-        aluno = await Aluno.get_async(id=aluno_id)
-        return aluno
-    except Aluno.DoesNotExist:
+    aluno = await cache.obter_em_cache(Aluno, id=aluno_id)
+    if aluno is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aluno não encontrado")
+    return aluno
+
+@router.get("/{aluno_id}/viagens", response_model=List[viagens_schemas.ViagemOut])
+async def listar_viagens_do_aluno(
+    aluno_id: uuid.UUID,
+    desde: Optional[datetime] = Query(None, description="Só viagens com data_viagem a partir deste instante."),
+):
+    # As inscrições saem da partição do aluno em viagem_alunos e cada viagem de uma leitura
+    # em viagens_por_id, com no máximo VIAGENS_CONCORRENCIA leituras em paralelo
+    aluno, inscricoes = await asyncio.gather(
+        cache.obter_em_cache(Aluno, id=aluno_id),
+        statements.listar_particao(ViagemAlunos, aluno_id=aluno_id),
+    )
+    if aluno is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aluno não encontrado")
+
+    viagens = await em_paralelo(
+        obter_viagem, {inscricao.viagem_id for inscricao in inscricoes}, concorrencia=VIAGENS_CONCORRENCIA
+    )
+    if desde is not None and desde.tzinfo is not None:
+        # data_viagem volta do Cassandra em UTC sem fuso
+        desde = desde.astimezone(timezone.utc).replace(tzinfo=None)
+    viagens = [
+        viagem for viagem in viagens
+        if viagem is not None and (desde is None or viagem.data_viagem >= desde)
+    ]
+    return sorted(viagens, key=lambda viagem: viagem.data_viagem)
 
 @router.put("/{aluno_id}", response_model=schemas.AlunoOut)
 async def atualizar_aluno(aluno_id: uuid.UUID, aluno_data: schemas.AlunoUpdate):
-    try:
-        aluno = await Aluno.get_async(id=aluno_id)
-    except Aluno.DoesNotExist:
+    aluno = await carregar_para_atualizar(Aluno, id=aluno_id)
+    if aluno is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aluno não encontrado")
 
     update_data = aluno_data.dict(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nenhum dado fornecido para atualização")
 
-    await aluno.update_async(**update_data)
-    aluno_atualizado = await Aluno.get_async(id=aluno_id)
+    anteriores = valores_de_lookup(aluno)
+    aluno_atualizado = await atualizar_linha(aluno, update_data)
+    if aluno_atualizado is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aluno não encontrado")
+    cache.invalidar(Aluno, id=aluno_id)
+    await gravar_lookups(aluno_atualizado, anteriores)
+    if update_data.keys() & {"nome_completo", "email", "telefone"}:
+        await atualizar_aluno_nas_inscricoes(aluno_atualizado)
     return aluno_atualizado
 
 @router.delete("/{aluno_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def deletar_aluno(aluno_id: uuid.UUID):
-    try:
-        aluno = await Aluno.get_async(id=aluno_id)
-        await aluno.delete_async()
-        return {}
-    except Aluno.DoesNotExist:
+    aluno = await statements.obter(Aluno, id=aluno_id)
+    if aluno is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aluno não encontrado")
+    await statements.remover_instancia(aluno)
+    cache.invalidar(Aluno, id=aluno_id)
+    await counters.decrementar(Aluno)
+    await remover_lookups(aluno)
+    await remover_aluno_das_inscricoes(aluno_id)
+    return {}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 import uuid
 
 class AlunoBase(BaseModel):
@@ -22,3 +22,11 @@ class AlunoOut(AlunoBase):
 
     class Config:
         orm_mode = True
+
+class AlunoPagina(BaseModel):
+    items: List[AlunoOut]
+    next_cursor: Optional[str] = None
+
+class AlunoBatchGet(BaseModel):
+    items: List[Optional[AlunoOut]]
+    ausentes: List[uuid.UUID]
@@ -0,0 +1,286 @@
+import asyncio
+import codecs
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from caspyorm import Model
+from caspyorm._internal import query_builder
+from caspyorm.connection import get_async_session
+from cassandra.query import BatchStatement, BatchType
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+
+from app import counters
+from app.database import aguardar, preparar
+from app.lookups import linhas_de_lookup
+
+logger = logging.getLogger(__name__)
+
+# Máximo de linhas aceitas por requisição de criação em lote
+BULK_MAX_LINHAS = int(os.getenv("BULK_MAX_LINHAS", "50000"))
+# Máximo de linhas por UNLOGGED BATCH (todas da mesma partição)
+BULK_TAMANHO_LOTE = int(os.getenv("BULK_TAMANHO_LOTE", "50"))
+# Lotes (ou leituras auxiliares) executados em paralelo por requisição
+BULK_CONCORRENCIA = int(os.getenv("BULK_CONCORRENCIA", "16"))
+
+# Lista de (índice da linha no corpo, instância)
+Instancias = List[Tuple[int, Model]]
+
+
+class ResultadoLinha(BaseModel):
+    indice: int
+    status: str
+    chave: Optional[Dict[str, Any]] = None
+    erro: Optional[str] = None
+
+
+class ResultadoBulk(BaseModel):
+    criados: int
+    erros: int
+    resultados: List[ResultadoLinha]
+
+
+async def em_paralelo(funcao: Callable[[Any], Awaitable[Any]], itens: Iterable[Any], concorrencia: int = BULK_CONCORRENCIA) -> List[Any]:
+    limite = asyncio.Semaphore(concorrencia)
+
+    async def executar(item):
+        async with limite:
+            return await funcao(item)
+
+    return await asyncio.gather(*[executar(item) for item in itens])
+
+
+_JSON = json.JSONDecoder()
+
+
+def _corpo_invalido() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Corpo JSON inválido")
+
+
+def _verificar_limite(linhas: List[Any]) -> None:
+    if len(linhas) > BULK_MAX_LINHAS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo de {BULK_MAX_LINHAS} linhas por requisição",
+        )
+
+
+class _LeitorArray:
+    """Extrai os elementos de um array JSON recebido em pedaços, um de cada vez."""
+
+    __slots__ = ("aberto", "elementos", "espera_virgula", "completo")
+
+    def __init__(self):
+        self.aberto = False
+        self.elementos = 0
+        self.espera_virgula = False
+        self.completo = False
+
+    def consumir(self, texto: str, linhas: List[Any], final: bool) -> str:
+        # Devolve o que sobrou sem formar um elemento completo, para juntar ao próximo pedaço
+        pos = 0
+        while True:
+            while pos < len(texto) and texto[pos].isspace():
+                pos += 1
+            if pos == len(texto):
+                return ""
+            if self.completo:
+                raise _corpo_invalido()
+            if not self.aberto:
+                self.aberto = True
+                pos += 1
+                continue
+            if texto[pos] == "]":
+                if self.elementos and not self.espera_virgula:
+                    raise _corpo_invalido()
+                self.completo = True
+                pos += 1
+                continue
+            if self.espera_virgula:
+                if texto[pos] != ",":
+                    raise _corpo_invalido()
+                self.espera_virgula = False
+                pos += 1
+                continue
+            try:
+                valor, fim = _JSON.raw_decode(texto, pos)
+            except ValueError:
+                if final:
+                    raise _corpo_invalido()
+                return texto[pos:]
+            # Um número no fim do pedaço pode continuar no próximo
+            if fim == len(texto) and not final:
+                return texto[pos:]
+            linhas.append(valor)
+            self.elementos += 1
+            self.espera_virgula = True
+            pos = fim
+
+
+class _LeitorNdjson:
+    """Uma linha JSON por registro; uma linha malformada vira erro só daquela linha."""
+
+    __slots__ = ()
+    completo = True
+
+    def consumir(self, texto: str, linhas: List[Any], final: bool) -> str:
+        *completas, resto = texto.split("\n")
+        if final:
+            completas, resto = completas + [resto], ""
+        for linha in completas:
+            if not linha.strip():
+                continue
+            try:
+                linhas.append(json.loads(linha))
+            except ValueError as e:
+                linhas.append(ValueError(f"JSON inválido: {e}"))
+        return resto
+
+
+async def ler_linhas(request: Request) -> List[Any]:
+    """Lê um array JSON ou NDJSON à medida que o corpo chega.
+
+    Responde 413 assim que passa de BULK_MAX_LINHAS, sem receber o resto do corpo.
+    """
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    linhas: List[Any] = []
+    leitor = None
+    texto = ""
+    try:
+        async for pedaco in request.stream():
+            texto += utf8.decode(pedaco)
+            if leitor is None:
+                texto = texto.lstrip()
+                if not texto:
+                    continue
+                leitor = _LeitorArray() if not ndjson and texto.startswith("[") else _LeitorNdjson()
+            texto = leitor.consumir(texto, linhas, final=False)
+            _verificar_limite(linhas)
+        texto += utf8.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise _corpo_invalido()
+    if leitor is not None:
+        leitor.consumir(texto, linhas, final=True)
+        if not leitor.completo:
+            raise _corpo_invalido()
+        _verificar_limite(linhas)
+    return linhas
+
+
+def instanciar(modelo: Type[Model], schema: Type[BaseModel], linhas: List[Any], erros: Dict[int, str]) -> Instancias:
+    instancias = []
+    for indice, linha in enumerate(linhas):
+        if isinstance(linha, Exception):
+            erros[indice] = str(linha)
+            continue
+        if not isinstance(linha, dict):
+            erros[indice] = "Cada linha deve ser um objeto JSON"
+            continue
+        try:
+            instancia = modelo(**schema(**linha).dict())
+        except (ValidationError, ValueError, TypeError) as e:
+            erros[indice] = str(e)
+            continue
+        if any(getattr(instancia, pk) is None for pk in modelo.__caspy_schema__["primary_keys"]):
+            erros[indice] = "Chave primária ausente"
+            continue
+        instancias.append((indice, instancia))
+    return instancias
+
+
+def _chave_particao(instancia: Model) -> Tuple[Any, ...]:
+    schema = instancia.__caspy_schema__
+    return (schema["table_name"],) + tuple(getattr(instancia, pk) for pk in schema["partition_keys"])
+
+
+async def _executar_lote(instancias: Instancias) -> None:
+    batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+    for _, instancia in instancias:
+        cql = query_builder.build_insert_cql(instancia.__caspy_schema__)
+        batch.add(preparar(cql), list(instancia.model_dump().values()))
+    future = get_async_session().execute_async(batch)
+    await aguardar(future)
+
+
+async def gravar_agrupado(instancias: Instancias) -> Dict[int, str]:
+    """Grava as instâncias em UNLOGGED BATCHes de uma única partição cada.
+
+    Retorna {índice: erro} das linhas cujo lote falhou; uma falha afeta apenas as linhas do
+    próprio lote.
+    """
+    grupos = defaultdict(list)
+    for item in instancias:
+        grupos[_chave_particao(item[1])].append(item)
+    lotes = [
+        grupo[inicio:inicio + BULK_TAMANHO_LOTE]
+        for grupo in grupos.values()
+        for inicio in range(0, len(grupo), BULK_TAMANHO_LOTE)
+    ]
+
+    async def gravar(lote):
+        try:
+            await _executar_lote(lote)
+            return {}
+        except Exception as e:
+            logger.warning("Falha em lote de %d linhas: %s", len(lote), e)
+            return {indice: f"Erro ao gravar: {e}" for indice, _ in lote}
+
+    erros = {}
+    for resultado in await em_paralelo(gravar, lotes):
+        erros.update(resultado)
+    return erros
+
+
+async def criar_em_lote(
+    request: Request,
+    modelo: Type[Model],
+    schema: Type[BaseModel],
+    preparar_instancias: Optional[Callable[[Instancias, Dict[int, str]], Awaitable[Instancias]]] = None,
+    derivar: Callable[[Model], List[Model]] = linhas_de_lookup,
+    gravar: Callable[[Instancias], Awaitable[Dict[int, str]]] = gravar_agrupado,
+) -> Dict[str, Any]:
+    """Fluxo comum dos endpoints POST /{entidade}/bulk.
+
+    `preparar_instancias` completa ou rejeita linhas antes da escrita (marcando erros por
+    índice); `derivar` devolve as linhas de tabelas de lookup/desnormalizadas que acompanham
+    cada linha gravada com sucesso; `gravar` escreve as linhas de origem e devolve
+    {índice: erro} das que não foram gravadas.
+    """
+    linhas = await ler_linhas(request)
+    erros: Dict[int, str] = {}
+    instancias = instanciar(modelo, schema, linhas, erros)
+    if preparar_instancias is not None:
+        instancias = await preparar_instancias(instancias, erros)
+
+    erros.update(await gravar(instancias))
+    criadas = [(indice, instancia) for indice, instancia in instancias if indice not in erros]
+
+    derivadas = [(indice, linha) for indice, instancia in criadas for linha in derivar(instancia)]
+    falhas_derivadas = await gravar_agrupado(derivadas)
+    if falhas_derivadas:
+        # Uma nova tentativa com as linhas derivadas das origens afetadas (as escritas são
+        # idempotentes); o que ainda falhar é reportado como erro da linha de origem
+        falhas_derivadas = await gravar_agrupado([item for item in derivadas if item[0] in falhas_derivadas])
+    if falhas_derivadas:
+        logger.error("%d linhas de %s gravadas sem as linhas derivadas", len(falhas_derivadas), modelo.__table_name__)
+    if criadas:
+        # A linha de origem existe mesmo quando as derivadas falharam
+        await counters.incrementar(modelo, len(criadas))
+
+    chaves = modelo.__caspy_schema__["primary_keys"]
+    resultados = []
+    for indice, instancia in criadas:
+        chave = {pk: getattr(instancia, pk) for pk in chaves}
+        if indice in falhas_derivadas:
+            erro = f"Linha gravada, mas não as tabelas derivadas: {falhas_derivadas[indice]}"
+            resultados.append(ResultadoLinha(indice=indice, status="erro", chave=chave, erro=erro))
+        else:
+            resultados.append(ResultadoLinha(indice=indice, status="criado", chave=chave))
+    resultados.extend(ResultadoLinha(indice=indice, status="erro", erro=erro) for indice, erro in erros.items())
+    resultados.sort(key=lambda resultado: resultado.indice)
+    criados = len(criadas) - len(falhas_derivadas)
+    return {"criados": criados, "erros": len(resultados) - criados, "resultados": resultados}
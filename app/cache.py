@@ -0,0 +1,161 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Type
+
+from caspyorm import Model
+
+from app import statements
+from app.invalidation import criar_barramento
+from app.models import Rota, Veiculo, Motorista, Aluno
+
+
+class _CargaCancelada(Exception):
+    """Quem fazia a carga foi cancelado; os que aguardavam tentam de novo."""
+
+
+class EntityCache:
+    """Cache read-through em processo, com TTL, limite de itens (LRU) e coalescência de misses.
+
+    Chamadas concorrentes que não encontram a mesma chave aguardam uma única carga. As
+    instâncias devolvidas são compartilhadas: quem for alterá-las deve ler direto do banco.
+    """
+
+    def __init__(self, nome: str, ttl: float, max_itens: int):
+        self.nome = nome
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self._itens: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._em_voo: Dict[Hashable, asyncio.Future] = {}
+        self._descartar = set()
+        self.hits = 0
+        self.misses = 0
+        self.coalescidos = 0
+        self.evictions = 0
+
+    async def obter(self, chave: Hashable, carregar: Callable[[], Awaitable[Any]]) -> Any:
+        item = self._itens.get(chave)
+        if item is not None:
+            expira_em, valor = item
+            if expira_em > time.monotonic():
+                self._itens.move_to_end(chave)
+                self.hits += 1
+                return valor
+            del self._itens[chave]
+
+        self.misses += 1
+        futuro = self._em_voo.get(chave)
+        if futuro is not None:
+            self.coalescidos += 1
+        while futuro is not None:
+            try:
+                return await asyncio.shield(futuro)
+            except _CargaCancelada:
+                # O primeiro a acordar refaz a carga e os demais passam a aguardá-lo
+                futuro = self._em_voo.get(chave)
+
+        futuro = asyncio.get_running_loop().create_future()
+        # Evita o aviso de exceção nunca lida quando ninguém mais aguardava a carga
+        futuro.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._em_voo[chave] = futuro
+        try:
+            valor = await carregar()
+        except asyncio.CancelledError:
+            # O cancelamento é de quem carregava (ex.: cliente desconectou), não dos demais
+            futuro.set_exception(_CargaCancelada())
+            raise
+        except Exception as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            del self._em_voo[chave]
+            # Invalidada durante a carga: o valor pode ser anterior à escrita. A marca vale só
+            # para esta carga, tenha ela falhado ou não
+            invalidada = chave in self._descartar
+            self._descartar.discard(chave)
+        if not invalidada and valor is not None:
+            self._guardar(chave, valor)
+        futuro.set_result(valor)
+        return valor
+
+    def _guardar(self, chave: Hashable, valor: Any) -> None:
+        self._itens[chave] = (time.monotonic() + self.ttl, valor)
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.max_itens:
+            self._itens.popitem(last=False)
+            self.evictions += 1
+
+    def invalidar(self, chave: Hashable) -> None:
+        self._itens.pop(chave, None)
+        if chave in self._em_voo:
+            self._descartar.add(chave)
+
+    def limpar(self) -> None:
+        self._itens.clear()
+        self._descartar.update(self._em_voo)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        consultas = self.hits + self.misses
+        return {
+            "itens": len(self._itens),
+            "max_itens": self.max_itens,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalescidos": self.coalescidos,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / consultas if consultas else 0.0,
+        }
+
+
+def _criar_cache(modelo: Type[Model], ttl_padrao: float) -> EntityCache:
+    nome = modelo.__table_name__
+    return EntityCache(
+        nome,
+        ttl=float(os.getenv(f"CACHE_TTL_{nome.upper()}", str(ttl_padrao))),
+        max_itens=int(os.getenv(f"CACHE_MAX_{nome.upper()}", "10000")),
+    )
+
+
+# Entidades de referência, que mudam pouco e são lidas em quase toda requisição composta
+CACHES: Dict[Type[Model], EntityCache] = {
+    Rota: _criar_cache(Rota, 300),
+    Veiculo: _criar_cache(Veiculo, 300),
+    Motorista: _criar_cache(Motorista, 300),
+    # Alunos mudam com mais frequência; o TTL menor limita a janela se uma invalidação se perder
+    Aluno: _criar_cache(Aluno, 60),
+}
+_POR_TABELA: Dict[str, EntityCache] = {cache.nome: cache for cache in CACHES.values()}
+
+# Propaga as invalidações para os demais workers (CACHE_INVALIDACAO=memoria|unix)
+barramento = criar_barramento()
+
+
+def _aplicar_invalidacao(tabela: str, chave: tuple) -> None:
+    cache = _POR_TABELA.get(tabela)
+    if cache is not None:
+        cache.invalidar(chave)
+
+
+barramento.assinar(_aplicar_invalidacao)
+
+
+def _chave(modelo: Type[Model], pk: Dict[str, Any]) -> tuple:
+    # Chaves em texto para que possam ser enviadas pelo barramento sem conversão
+    return tuple(str(pk[campo]) for campo in modelo.__caspy_schema__["primary_keys"])
+
+
+async def obter_em_cache(modelo: Type[Model], **pk: Any) -> Any:
+    return await CACHES[modelo].obter(_chave(modelo, pk), lambda: statements.obter(modelo, **pk))
+
+
+def invalidar(modelo: Type[Model], **pk: Any) -> None:
+    # Invalida localmente já na chamada; os outros workers recebem pelo barramento
+    chave = _chave(modelo, pk)
+    CACHES[modelo].invalidar(chave)
+    barramento.publicar(modelo.__table_name__, chave)
+
+
+def estatisticas() -> Dict[str, Dict[str, Any]]:
+    return {cache.nome: cache.estatisticas() for cache in CACHES.values()}
@@ -0,0 +1,97 @@
+import os
+from typing import Any, Dict
+
+from cassandra import ConsistencyLevel
+from cassandra.cluster import EXEC_PROFILE_DEFAULT, ExecutionProfile
+from cassandra.policies import (
+    ConstantSpeculativeExecutionPolicy, DCAwareRoundRobinPolicy, FallthroughRetryPolicy,
+    RetryPolicy, TokenAwarePolicy,
+)
+
+from app.profiles import OLTP, PERFIS, PerfilExecucao
+
+# Configuração do driver, no mesmo esquema das variáveis CASSANDRA_* de app/database.py.
+# Com o protocolo v4 o driver mantém uma conexão multiplexada por host (até 32768
+# requisições em voo), então o "tamanho do pool" é controlado pelas threads do driver e
+# pelo limite de requisições simultâneas da aplicação, não pelo número de conexões.
+
+# Datacenter local; vazio faz o driver adotar o DC do primeiro contact point
+CASSANDRA_DC_LOCAL = os.getenv("CASSANDRA_DC_LOCAL") or None
+# Hosts de outros DCs usados quando o local está indisponível (0 = nunca sai do DC)
+CASSANDRA_HOSTS_REMOTOS_POR_DC = int(os.getenv("CASSANDRA_HOSTS_REMOTOS_POR_DC", "0"))
+# Envia cada requisição direto a uma réplica dona da partição
+CASSANDRA_TOKEN_AWARE = os.getenv("CASSANDRA_TOKEN_AWARE", "1").lower() in ("1", "true")
+# Consistência e timeout de cada requisição ficam nos perfis de app/profiles.py
+# Segundos
+CASSANDRA_TIMEOUT_CONEXAO = float(os.getenv("CASSANDRA_TIMEOUT_CONEXAO", "5"))
+CASSANDRA_EXECUTOR_THREADS = int(os.getenv("CASSANDRA_EXECUTOR_THREADS", "2"))
+# 'padrao' (RetryPolicy do driver) ou 'nenhum' (o erro volta direto para a aplicação)
+CASSANDRA_RETRY = os.getenv("CASSANDRA_RETRY", "padrao")
+# Execução especulativa (só no perfil oltp): se uma leitura idempotente não responder em
+# ATRASO_MS, a mesma requisição é enviada à próxima réplica (até MAX vezes). 0 desliga.
+CASSANDRA_ESPECULATIVA_ATRASO_MS = float(os.getenv("CASSANDRA_ESPECULATIVA_ATRASO_MS", "0"))
+CASSANDRA_ESPECULATIVA_MAX = int(os.getenv("CASSANDRA_ESPECULATIVA_MAX", "2"))
+
+_RETRIES = {"padrao": RetryPolicy, "nenhum": FallthroughRetryPolicy}
+
+
+def _balanceamento():
+    politica = DCAwareRoundRobinPolicy(
+        local_dc=CASSANDRA_DC_LOCAL,
+        used_hosts_per_remote_dc=CASSANDRA_HOSTS_REMOTOS_POR_DC,
+    )
+    return TokenAwarePolicy(politica) if CASSANDRA_TOKEN_AWARE else politica
+
+
+def _consistencia(nome: str) -> int:
+    try:
+        return ConsistencyLevel.name_to_value[nome]
+    except KeyError:
+        raise ValueError(f"Nível de consistência inválido: {nome}")
+
+
+def _perfil_driver(perfil: PerfilExecucao) -> ExecutionProfile:
+    if CASSANDRA_RETRY not in _RETRIES:
+        raise ValueError(f"CASSANDRA_RETRY inválido: {CASSANDRA_RETRY}. Use 'padrao' ou 'nenhum'.")
+    especulativa = None
+    if perfil is OLTP and CASSANDRA_ESPECULATIVA_ATRASO_MS > 0:
+        # O driver só especula statements marcados como idempotentes (ver database.preparar)
+        especulativa = ConstantSpeculativeExecutionPolicy(
+            CASSANDRA_ESPECULATIVA_ATRASO_MS / 1000, CASSANDRA_ESPECULATIVA_MAX,
+        )
+    return ExecutionProfile(
+        load_balancing_policy=_balanceamento(),
+        retry_policy=_RETRIES[CASSANDRA_RETRY](),
+        consistency_level=_consistencia(perfil.consistencia),
+        request_timeout=perfil.timeout,
+        speculative_execution_policy=especulativa,
+    )
+
+
+def opcoes_do_cluster() -> Dict[str, Any]:
+    """Argumentos extras repassados ao Cluster do driver por connection.connect_async."""
+    return {
+        # O perfil padrão do driver é o oltp: cobre também as consultas feitas pelo caspyorm
+        "execution_profiles": {
+            EXEC_PROFILE_DEFAULT: _perfil_driver(OLTP),
+            **{nome: _perfil_driver(perfil) for nome, perfil in PERFIS.items()},
+        },
+        "connect_timeout": CASSANDRA_TIMEOUT_CONEXAO,
+        "executor_threads": CASSANDRA_EXECUTOR_THREADS,
+    }
+
+
+def descrever() -> str:
+    especulativa = (
+        f"{CASSANDRA_ESPECULATIVA_ATRASO_MS:g}ms x{CASSANDRA_ESPECULATIVA_MAX}"
+        if CASSANDRA_ESPECULATIVA_ATRASO_MS > 0 else "desligada"
+    )
+    return (
+        f"dc_local={CASSANDRA_DC_LOCAL or 'automático'} "
+        f"token_aware={'sim' if CASSANDRA_TOKEN_AWARE else 'não'} "
+        f"hosts_remotos_por_dc={CASSANDRA_HOSTS_REMOTOS_POR_DC} "
+        f"retry={CASSANDRA_RETRY} "
+        f"especulativa={especulativa} "
+        f"executor_threads={CASSANDRA_EXECUTOR_THREADS} "
+        f"perfis={' '.join(perfil.descrever() for perfil in PERFIS.values())}"
+    )
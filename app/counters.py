@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import os
+import random
+from typing import Type
+
+from caspyorm import Model
+
+from app.database import executar_cql, executar_ddl
+
+logger = logging.getLogger(__name__)
+
+# Cada tabela tem SHARDS linhas de contador na mesma partição: os incrementos se espalham
+# entre elas (evitando contenção numa única célula) e a leitura soma a partição inteira.
+SHARDS = int(os.getenv("CONTADORES_SHARDS", "8"))
+
+# Faixa de tokens do Murmur3Partitioner, usada pela reconciliação
+TOKEN_MIN = -2**63
+TOKEN_MAX = 2**63 - 1
+
+CQL_CRIAR_TABELA = (
+    "CREATE TABLE IF NOT EXISTS contadores ("
+    "tabela text, shard int, total counter, PRIMARY KEY (tabela, shard))"
+)
+CQL_INCREMENTAR = "UPDATE contadores SET total = total + ? WHERE tabela = ? AND shard = ?"
+CQL_LER = "SELECT total FROM contadores WHERE tabela = ?"
+
+
+async def criar_tabela_contadores() -> None:
+    # Colunas counter não são suportadas pelos fields do caspyorm, então a DDL é manual
+    await executar_ddl(CQL_CRIAR_TABELA)
+
+
+async def incrementar(modelo: Type[Model], delta: int = 1) -> None:
+    # O contador é uma aproximação corrigida por reconciliar(); uma falha aqui não deve
+    # desfazer a escrita que já foi aplicada na tabela de origem.
+    try:
+        await executar_cql(CQL_INCREMENTAR, [delta, modelo.__table_name__, random.randrange(SHARDS)])
+    except Exception as e:
+        logger.warning("Falha ao atualizar contador de %s em %d: %s", modelo.__table_name__, delta, e)
+
+
+async def decrementar(modelo: Type[Model], delta: int = 1) -> None:
+    await incrementar(modelo, -delta)
+
+
+async def ler(modelo: Type[Model]) -> int:
+    linhas = await executar_cql(CQL_LER, [modelo.__table_name__])
+    return sum(linha.total or 0 for linha in linhas)
+
+
+def faixas_de_token(quantidade: int):
+    """Divide o anel do Murmur3Partitioner em `quantidade` faixas (início exclusivo, fim inclusivo)."""
+    passo = (TOKEN_MAX - TOKEN_MIN) // quantidade
+    inicio = TOKEN_MIN
+    for i in range(quantidade):
+        fim = TOKEN_MAX if i == quantidade - 1 else inicio + passo
+        yield inicio, fim
+        inicio = fim
+
+
+async def contar_por_faixas(modelo: Type[Model], faixas: int = 256, concorrencia: int = 16) -> int:
+    """Conta as linhas de uma tabela dividindo o anel em faixas de token lidas em paralelo."""
+    schema = modelo.__caspy_schema__
+    particao = ", ".join(schema["partition_keys"])
+    cql = (
+        f"SELECT COUNT(*) FROM {schema['table_name']} "
+        f"WHERE token({particao}) > ? AND token({particao}) <= ?"
+    )
+    limite = asyncio.Semaphore(concorrencia)
+
+    async def contar_faixa(inicio: int, fim: int) -> int:
+        async with limite:
+            resultado = await executar_cql(cql, [inicio, fim], perfil="scan")
+            linha = resultado.one()
+            return linha.count if linha else 0
+
+    parciais = await asyncio.gather(*[contar_faixa(inicio, fim) for inicio, fim in faixas_de_token(faixas)])
+    return sum(parciais)
+
+
+async def reconciliar(modelo: Type[Model], faixas: int = 256, concorrencia: int = 16) -> int:
+    """Recalcula o total real da tabela e aplica a diferença no contador. Retorna o desvio corrigido."""
+    real = await contar_por_faixas(modelo, faixas, concorrencia)
+    atual = await ler(modelo)
+    desvio = real - atual
+    if desvio:
+        await executar_cql(CQL_INCREMENTAR, [desvio, modelo.__table_name__, 0])
+    logger.info("Contador de %s: real=%d, armazenado=%d, desvio=%d", modelo.__table_name__, real, atual, desvio)
+    return desvio
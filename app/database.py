@@ -1,9 +1,16 @@
+import asyncio
 import logging
 import os
 import base64
 import tempfile
 from dotenv import load_dotenv
 from caspyorm import connection
+from caspyorm.connection import get_async_session
+from caspyorm._internal.cache import prepared_statement_cache
+
+from app.cluster import descrever, opcoes_do_cluster
+from app.profiles import limitar
+from app import memory, telemetry
 
 # Carrega as variáveis de ambiente
 load_dotenv()
@@ -14,7 +21,7 @@ ASTRA_CLIENT_SECRET = os.getenv("ASTRA_CLIENT_SECRET")
 ASTRA_KEYSPACE = os.getenv("ASTRA_KEYSPACE")
 
 # Variáveis de ambiente para conexão local
-CASSANDRA_MODE = os.getenv("CASSANDRA_MODE", "local")  # 'astra' ou 'local'  precisa apenas mudar essa parte para decidir se vai usar o AstraDB ou o Cassandra local
+CASSANDRA_MODE = os.getenv("CASSANDRA_MODE", "local")  # 'astra', 'local' ou 'memory'  precisa apenas mudar essa parte para decidir se vai usar o AstraDB ou o Cassandra local
 CASSANDRA_HOST = os.getenv("CASSANDRA_HOST", "127.0.0.1")
 CASSANDRA_PORT = int(os.getenv("CASSANDRA_PORT", "9042"))
 CASSANDRA_USER = os.getenv("CASSANDRA_USER", "cassandra")
@@ -24,9 +31,6 @@ CASSANDRA_KEYSPACE = os.getenv("CASSANDRA_KEYSPACE", "transporter_db")
 # Variável global para rastrear o arquivo temporário
 _temp_bundle_path = None
 
-# Configuração de logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
 async def connect_to_db_async():
     global _temp_bundle_path
     try:
@@ -40,7 +44,7 @@ async def connect_to_db_async():
                     temp_f.write(base64.b64decode(bundle_base64))
                     _temp_bundle_path = temp_f.name
                     bundle_path = _temp_bundle_path
-                    logging.info(f"Bundle decodificado e salvo em: {bundle_path}")
+                    logging.info("Bundle decodificado e salvo em: %s", bundle_path)
             if not bundle_path:
                 raise ValueError("ASTRA_BUNDLE_PATH ou ASTRA_BUNDLE_BASE64 deve ser definido.")
             await connection.connect_async(
@@ -49,11 +53,12 @@ async def connect_to_db_async():
                 password=ASTRA_CLIENT_SECRET,
                 keyspace=ASTRA_KEYSPACE,
                 schema_metadata_enabled=False,
-                protocol_version=4
+                protocol_version=4,
+                **opcoes_do_cluster()
             )
-            logging.info(f"Conexão com o banco de dados AstraDB estabelecida com sucesso usando: {bundle_path}")
+            logging.info("Conexão com o banco de dados AstraDB estabelecida com sucesso usando: %s", bundle_path)
         elif CASSANDRA_MODE == "local":
-            logging.info(f"Iniciando conexão local com Cassandra em {CASSANDRA_HOST}:{CASSANDRA_PORT}...")
+            logging.info("Iniciando conexão local com Cassandra em %s:%s...", CASSANDRA_HOST, CASSANDRA_PORT)
             await connection.connect_async(
                 contact_points=[CASSANDRA_HOST],
                 port=CASSANDRA_PORT,
@@ -61,25 +66,84 @@ async def connect_to_db_async():
                 password=CASSANDRA_PASSWORD,
                 keyspace=CASSANDRA_KEYSPACE,
                 schema_metadata_enabled=False,
-                protocol_version=4
+                protocol_version=4,
+                **opcoes_do_cluster()
+            )
+            logging.info("Conexão local com o Cassandra estabelecida com sucesso em %s:%s", CASSANDRA_HOST, CASSANDRA_PORT)
+        elif CASSANDRA_MODE == "memory":
+            # Sem servidor: tabelas em memória atrás de uma sessão compatível com a do driver
+            memory.conectar(CASSANDRA_KEYSPACE)
+            logging.info(
+                "Usando o backend em memória (keyspace %s, latência simulada %.1fms + até %.1fms)",
+                CASSANDRA_KEYSPACE, memory.LATENCIA_MS, memory.JITTER_MS,
             )
-            logging.info(f"Conexão local com o Cassandra estabelecida com sucesso em {CASSANDRA_HOST}:{CASSANDRA_PORT}")
         else:
-            raise ValueError(f"CASSANDRA_MODE inválido: {CASSANDRA_MODE}. Use 'astra' ou 'local'.")
+            raise ValueError(f"CASSANDRA_MODE inválido: {CASSANDRA_MODE}. Use 'astra', 'local' ou 'memory'.")
+        if CASSANDRA_MODE != "memory":
+            logging.info("Perfil do driver: %s", descrever())
+        # A mesma sessão do driver atende à API síncrona do caspyorm (sync_table na migração)
+        connection.connection.session = connection.connection.async_session
+        connection.connection._is_connected = True
+        telemetry.instrumentar_sessao(get_async_session())
     except Exception as e:
-        logging.error(f"Erro fatal ao conectar ao Cassandra: {e}", exc_info=True)
+        logging.error("Erro fatal ao conectar ao Cassandra: %s", e, exc_info=True)
         raise
 
 async def disconnect_from_db_async():
     global _temp_bundle_path
     logging.info("Fechando a conexão com o banco de dados...")
     await connection.disconnect_async()
+    connection.connection.session = None
+    connection.connection._is_connected = False
     logging.info("Conexão com o banco de dados fechada.")
 
     if _temp_bundle_path:
         try:
             os.remove(_temp_bundle_path)
-            logging.info(f"Arquivo de bundle temporário removido: {_temp_bundle_path}")
+            logging.info("Arquivo de bundle temporário removido: %s", _temp_bundle_path)
             _temp_bundle_path = None
         except OSError as e:
-            logging.error(f"Erro ao remover arquivo de bundle temporário: {e}")
+            logging.error("Erro ao remover arquivo de bundle temporário: %s", e)
+
+def preparar(cql):
+    session = get_async_session()
+    prepared = prepared_statement_cache.get(cql)
+    if prepared is None:
+        prepared = session.prepare(cql)
+        # Leituras podem ser repetidas sem efeito colateral, o que libera retries e
+        # execução especulativa no driver
+        prepared.is_idempotent = cql.lstrip().upper().startswith("SELECT")
+        prepared_statement_cache.set(cql, prepared)
+    return prepared
+
+async def aguardar(future):
+    """Aguarda um ResponseFuture do driver sem ocupar uma thread.
+
+    O _wait_for_cassandra_future do caspyorm bloqueia uma thread do executor padrão em
+    future.result() por consulta, o que limita as consultas simultâneas ao tamanho do pool.
+    Aqui os callbacks do driver acordam o event loop quando a resposta chega.
+    """
+    loop = asyncio.get_running_loop()
+    concluido = loop.create_future()
+
+    def acordar(_):
+        loop.call_soon_threadsafe(lambda: concluido.done() or concluido.set_result(None))
+
+    future.add_callbacks(acordar, acordar)
+    await concluido
+    # Já concluído: devolve o ResultSet ou levanta o erro original
+    return future.result()
+
+async def executar_ddl(cql):
+    """Executa DDL como texto simples: não vale preparar nem guardar no cache o que roda uma vez."""
+    return await aguardar(get_async_session().execute_async(cql))
+
+async def executar_cql(cql, params=None, perfil=None):
+    """Executa CQL fora do query builder do caspyorm, reaproveitando o cache de prepared statements.
+
+    Usa o perfil de execução da requisição, ou `perfil` quando informado.
+    """
+    session = get_async_session()
+    async with limitar(perfil) as escolhido:
+        future = session.execute_async(preparar(cql), params or [], execution_profile=escolhido.nome)
+        return await aguardar(future)
@@ -0,0 +1,39 @@
+import json
+import os
+import uuid
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Type
+
+from caspyorm import Model
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.paging import iterar_paginas
+
+# Linhas pedidas ao driver por página durante uma exportação
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "1000"))
+
+
+def _json_default(valor: Any) -> Any:
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, uuid.UUID):
+        return str(valor)
+    if isinstance(valor, set):
+        return list(valor)
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+async def gerar_ndjson(modelo: Type[Model], schema: Type[BaseModel]) -> AsyncIterator[str]:
+    # Uma página do driver vira um bloco de linhas NDJSON: a memória fica limitada a uma
+    # página e os campos seguem o schema de saída, sem validar cada linha pelo Pydantic.
+    campos = list(schema.__fields__)
+    async for linhas in iterar_paginas(modelo, fetch_size=EXPORT_FETCH_SIZE):
+        yield "".join(
+            json.dumps({campo: getattr(linha, campo) for campo in campos}, default=_json_default) + "\n"
+            for linha in linhas
+        )
+
+
+def exportar_ndjson(modelo: Type[Model], schema: Type[BaseModel]) -> StreamingResponse:
+    return StreamingResponse(gerar_ndjson(modelo, schema), media_type="application/x-ndjson")
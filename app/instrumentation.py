@@ -0,0 +1,72 @@
+import logging
+import os
+import time
+import uuid
+
+from app import metrics, telemetry
+
+logger = logging.getLogger(__name__)
+
+# Requisições com mais consultas que isso geram um aviso no log (provável N+1)
+DB_CONSULTAS_ALERTA = int(os.getenv("DB_CONSULTAS_ALERTA", "50"))
+
+CABECALHO_REQUEST_ID = b"x-request-id"
+
+
+class Instrumentacao:
+    """Middleware ASGI que abre o contexto da requisição e mede as idas ao banco.
+
+    As consultas, linhas e o tempo no Cassandra (somados pelo hook de
+    telemetry.instrumentar_sessao) voltam no cabeçalho Server-Timing e, com a duração e o
+    status, alimentam as métricas por rota de app/metrics.py. O request id vem de
+    X-Request-ID (ou é gerado) e volta na resposta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = dict(scope["headers"]).get(CABECALHO_REQUEST_ID, b"").decode("latin-1") or uuid.uuid4().hex
+        token = telemetry.iniciar(request_id)
+        contexto = telemetry.atual()
+        inicio = time.perf_counter()
+        resposta = {"status": 500}
+        metrics.entrar()
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                resposta["status"] = mensagem["status"]
+                # Corpos em streaming continuam consultando depois daqui; o histograma
+                # recebe o total ao fim da requisição.
+                timing = (
+                    f'db;dur={contexto.tempo_db * 1000:.2f};desc="{contexto.consultas} consultas, {contexto.linhas} linhas", '
+                    f"app;dur={(time.perf_counter() - inicio) * 1000:.2f}"
+                )
+                mensagem["headers"] = list(mensagem.get("headers", [])) + [
+                    (CABECALHO_REQUEST_ID, request_id.encode("latin-1")),
+                    (b"server-timing", timing.encode("latin-1")),
+                ]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            metrics.sair()
+            self._registrar(scope, contexto, resposta["status"], time.perf_counter() - inicio)
+            telemetry.encerrar(token)
+
+    def _registrar(self, scope, contexto, status: int, duracao: float) -> None:
+        rota = scope.get("route")
+        # Sem rota (404 de path inexistente) o path bruto criaria uma série por URL
+        caminho = getattr(rota, "path", "<sem rota>")
+        metrics.registrar_requisicao(
+            scope["method"], caminho, status, duracao, contexto.consultas, contexto.linhas, contexto.tempo_db,
+        )
+        if contexto.consultas > DB_CONSULTAS_ALERTA:
+            logger.warning(
+                "%s %s fez %d consultas ao banco (%d linhas, %.1fms)",
+                scope["method"], caminho, contexto.consultas, contexto.linhas, contexto.tempo_db * 1000,
+            )
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Callback chamado com (tabela, chave) para cada invalidação recebida
+Assinante = Callable[[str, Tuple[str, ...]], None]
+
+
+class BarramentoInvalidacao(ABC):
+    """Propaga invalidações de cache entre processos (workers) que servem a API."""
+
+    def __init__(self):
+        self._assinantes: List[Assinante] = []
+
+    def assinar(self, assinante: Assinante) -> None:
+        self._assinantes.append(assinante)
+
+    def _entregar(self, tabela: str, chave: Tuple[str, ...]) -> None:
+        for assinante in self._assinantes:
+            try:
+                assinante(tabela, chave)
+            except Exception:
+                logger.exception("Erro ao aplicar invalidação de %s %s", tabela, chave)
+
+    async def iniciar(self) -> None:
+        pass
+
+    async def parar(self) -> None:
+        pass
+
+    @abstractmethod
+    def publicar(self, tabela: str, chave: Tuple[str, ...]) -> None:
+        ...
+
+
+class BarramentoMemoria(BarramentoInvalidacao):
+    """Entrega as invalidações aos assinantes do próprio processo. Serve a testes e a um único worker."""
+
+    def publicar(self, tabela: str, chave: Tuple[str, ...]) -> None:
+        self._entregar(tabela, chave)
+
+
+class BarramentoUnix(BarramentoInvalidacao):
+    """Barramento entre workers do mesmo host via sockets UNIX de datagrama.
+
+    Cada processo cria `<diretorio>/<nome>.sock` (o pid, por padrão) e publica enviando um datagrama a todos os
+    outros sockets do diretório. Sockets de workers que morreram são removidos no primeiro
+    envio que falhar. Uma mensagem perdida (buffer cheio) fica limitada pelo TTL do cache.
+    """
+
+    def __init__(self, diretorio: str, nome: Optional[str] = None):
+        super().__init__()
+        self.diretorio = diretorio
+        self.nome = nome or str(os.getpid())
+        self._caminho: Optional[str] = None
+        self._sock: Optional[socket.socket] = None
+
+    async def iniciar(self) -> None:
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._caminho = os.path.join(self.diretorio, f"{self.nome}.sock")
+        if os.path.exists(self._caminho):
+            os.unlink(self._caminho)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self._caminho)
+        self._sock.setblocking(False)
+        asyncio.get_running_loop().add_reader(self._sock.fileno(), self._ler)
+        logger.info("Barramento de invalidação escutando em %s", self._caminho)
+
+    async def parar(self) -> None:
+        if self._sock is None:
+            return
+        asyncio.get_running_loop().remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self._caminho)
+        except FileNotFoundError:
+            pass
+
+    def _ler(self) -> None:
+        while True:
+            try:
+                dados = self._sock.recv(65536)
+            except BlockingIOError:
+                return
+            try:
+                mensagem = json.loads(dados)
+                self._entregar(mensagem["tabela"], tuple(mensagem["chave"]))
+            except (ValueError, KeyError):
+                logger.warning("Mensagem de invalidação inválida descartada: %r", dados[:200])
+
+    def publicar(self, tabela: str, chave: Tuple[str, ...]) -> None:
+        if self._sock is None:
+            return
+        dados = json.dumps({"tabela": tabela, "chave": list(chave)}).encode()
+        for nome in os.listdir(self.diretorio):
+            destino = os.path.join(self.diretorio, nome)
+            if not nome.endswith(".sock") or destino == self._caminho:
+                continue
+            try:
+                self._sock.sendto(dados, destino)
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(destino)
+                except FileNotFoundError:
+                    pass
+            except BlockingIOError:
+                logger.warning("Buffer do worker %s cheio; invalidação de %s descartada", nome, tabela)
+
+
+def criar_barramento() -> BarramentoInvalidacao:
+    modo = os.getenv("CACHE_INVALIDACAO", "memoria")
+    if modo == "unix":
+        return BarramentoUnix(os.getenv("CACHE_INVALIDACAO_DIR", "/tmp/rotafacil-invalidacao"))
+    if modo == "memoria":
+        return BarramentoMemoria()
+    raise ValueError(f"CACHE_INVALIDACAO inválido: {modo}. Use 'memoria' ou 'unix'.")
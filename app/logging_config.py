@@ -1,22 +1,159 @@
 
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import sys
 
-def setup_logging():
-    log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    log_file_handler = RotatingFileHandler('app.log', maxBytes=10*1024*1024, backupCount=5)
+from app import telemetry
+
+# Com LOG_FILA=1 (padrão) os handlers só enfileiram o registro; formatação e escrita em
+# disco/console acontecem numa thread do QueueListener, fora do event loop.
+LOG_FILA = os.getenv("LOG_FILA", "1").lower() in ("1", "true")
+# Registros aguardando a thread de escrita. Com a fila cheia, 'descartar' perde o registro
+# (contado e avisado depois) e 'bloquear' segura quem está logando até abrir espaço.
+LOG_FILA_TAMANHO = int(os.getenv("LOG_FILA_TAMANHO", "10000"))
+LOG_FILA_POLITICA = os.getenv("LOG_FILA_POLITICA", "descartar")
+# 'texto' (linhas legíveis) ou 'json' (um objeto por linha, com os campos estruturados)
+LOG_FORMATO = os.getenv("LOG_FORMATO", "texto")
+
+_listener = None
+_instalados = []
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registro: campos fixos, request_id e o dict `campos` do extra."""
+
+    def format(self, record):
+        dados = {
+            "ts": self.formatTime(record),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            dados["request_id"] = record.request_id
+        dados.update(getattr(record, "campos", None) or {})
+        if record.exc_info:
+            dados["exc"] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+def _fabrica_com_request_id(fabrica):
+    # O request_id é lido na criação do registro, ainda na tarefa da requisição; na thread
+    # do listener o contexto da requisição não existe mais.
+    def criar(*args, **kwargs):
+        record = fabrica(*args, **kwargs)
+        contexto = telemetry.atual()
+        record.request_id = contexto.id if contexto else None
+        return record
+
+    criar.request_id = True
+    return criar
+
+
+class HandlerFila(QueueHandler):
+    """QueueHandler com fila limitada e política para quando ela enche."""
+
+    def __init__(self, fila: queue.Queue, bloquear: bool = False):
+        super().__init__(fila)
+        self.bloquear = bloquear
+        self.descartados = 0
+
+    def prepare(self, record):
+        # O QueueHandler padrão formata a linha inteira aqui, na thread de quem loga. Como a
+        # fila é do próprio processo, só a mensagem é resolvida (os args podem mudar depois)
+        # e o resto da formatação fica para a thread do listener.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self.bloquear:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+            return
+        if self.descartados:
+            # Avisa pela própria fila assim que há espaço de novo
+            perdidos, self.descartados = self.descartados, 0
+            aviso = logging.makeLogRecord({
+                "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": f"{perdidos} registro(s) de log descartado(s) com a fila cheia",
+            })
+            try:
+                self.queue.put_nowait(aviso)
+            except queue.Full:
+                self.descartados += perdidos
+
+
+def _handlers(arquivo, console):
+    if LOG_FORMATO == "json":
+        log_formatter = FormatadorJSON()
+    elif LOG_FORMATO == "texto":
+        log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    else:
+        raise ValueError(f"LOG_FORMATO inválido: {LOG_FORMATO}. Use 'texto' ou 'json'.")
+    log_file_handler = RotatingFileHandler(arquivo, maxBytes=10*1024*1024, backupCount=5)
     log_file_handler.setFormatter(log_formatter)
     log_file_handler.setLevel(logging.INFO)
 
-    log_console_handler = logging.StreamHandler(sys.stdout)
+    log_console_handler = logging.StreamHandler(console)
     log_console_handler.setFormatter(log_formatter)
     log_console_handler.setLevel(logging.INFO)
+    return [log_file_handler, log_console_handler]
+
+
+def setup_logging(arquivo='app.log', console=None, fila=None):
+    global _listener, _instalados
+    encerrar_logging()
+    if not getattr(logging.getLogRecordFactory(), "request_id", False):
+        logging.setLogRecordFactory(_fabrica_com_request_id(logging.getLogRecordFactory()))
+    handlers = _handlers(arquivo, console or sys.stdout)
+    usar_fila = LOG_FILA if fila is None else fila
+    if usar_fila:
+        if LOG_FILA_POLITICA not in ("descartar", "bloquear"):
+            raise ValueError(f"LOG_FILA_POLITICA inválida: {LOG_FILA_POLITICA}. Use 'descartar' ou 'bloquear'.")
+        fila_logs = queue.Queue(maxsize=LOG_FILA_TAMANHO)
+        _listener = QueueListener(fila_logs, *handlers, respect_handler_level=True)
+        _listener.start()
+        handlers = [HandlerFila(fila_logs, bloquear=LOG_FILA_POLITICA == "bloquear")]
 
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
-    root_logger.addHandler(log_file_handler)
-    root_logger.addHandler(log_console_handler)
+    # O caspyorm chama logging.basicConfig ao ser importado, o que deixa um StreamHandler
+    # síncrono no root; ele formataria e escreveria cada registro no event loop.
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    for handler in handlers:
+        root_logger.addHandler(handler)
+    _instalados = handlers
+
+    for nome in ('uvicorn.access', 'uvicorn.error'):
+        # Com handlers próprios, propagar para o root enfileiraria o registro duas vezes
+        logger_uvicorn = logging.getLogger(nome)
+        logger_uvicorn.handlers = list(handlers)
+        logger_uvicorn.propagate = False
+
+
+def encerrar_logging():
+    """Para o listener (escrevendo o que ainda está na fila) e remove os handlers instalados."""
+    global _listener, _instalados
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    root_logger = logging.getLogger()
+    for handler in _instalados:
+        root_logger.removeHandler(handler)
+        handler.close()
+    _instalados = []
+
 
-    logging.getLogger('uvicorn.access').handlers = [log_file_handler, log_console_handler]
-    logging.getLogger('uvicorn.error').handlers = [log_file_handler, log_console_handler]
+atexit.register(encerrar_logging)
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from caspyorm import Model
+
+from app import statements
+from app.models import (
+    Aluno, AlunoPorRota, AlunoPorViagem, Viagem, ViagemAlunos, Motorista,
+    ViagemPorMotorista, ViagemPorVeiculo, ViagemPorStatus, ViagemPorDia, ViagemPorId, MotoristaPorCidade, AlunoPorEmail,
+)
+
+logger = logging.getLogger(__name__)
+
+# Modelo de origem -> [(tabela de lookup, coluna usada como partição)], em ordem de preferência
+# quando mais de um filtro está presente na listagem.
+LOOKUPS = {
+    Viagem: [
+        (ViagemPorMotorista, "motorista_id"),
+        (ViagemPorVeiculo, "veiculo_id"),
+        (ViagemPorStatus, "status"),
+        (ViagemPorId, "id"),
+    ],
+    Motorista: [
+        (MotoristaPorCidade, "endereco_cidade"),
+    ],
+    Aluno: [
+        (AlunoPorEmail, "email"),
+    ],
+}
+
+
+def valores_de_lookup(instancia: Model) -> Dict[str, Any]:
+    valores = {chave: getattr(instancia, chave) for _, chave in LOOKUPS.get(type(instancia), [])}
+    if isinstance(instancia, Viagem):
+        # hora_partida é clustering em viagens_por_dia
+        valores["hora_partida"] = instancia.hora_partida
+    return valores
+
+
+def dia_da_viagem(data_viagem: datetime) -> str:
+    # O Cassandra devolve timestamps em UTC sem fuso; datas com fuso são convertidas antes
+    if data_viagem.tzinfo is not None:
+        data_viagem = data_viagem.astimezone(timezone.utc)
+    return data_viagem.strftime("%Y-%m-%d")
+
+
+def _chave_por_dia(viagem: Viagem, hora_partida: Optional[datetime]) -> Dict[str, Any]:
+    # Sem hora de partida, a viagem é ordenada pela própria data_viagem
+    return {
+        "rota_id": viagem.rota_id,
+        "dia": dia_da_viagem(viagem.data_viagem),
+        "hora_partida": hora_partida or viagem.data_viagem,
+        "id": viagem.id,
+    }
+
+
+def linha_por_dia(viagem: Viagem) -> ViagemPorDia:
+    campos = {campo: getattr(viagem, campo) for campo in ViagemPorDia.model_fields if campo != "dia"}
+    return ViagemPorDia(**{**campos, **_chave_por_dia(viagem, viagem.hora_partida)})
+
+
+def _chave_primaria(lookup: type, instancia: Model, **sobrescritas: Any) -> Dict[str, Any]:
+    chaves = {pk: getattr(instancia, pk) for pk in lookup.__caspy_schema__["primary_keys"]}
+    chaves.update(sobrescritas)
+    return chaves
+
+
+def linhas_de_lookup(instancia: Model) -> List[Model]:
+    linhas = [
+        lookup(**{campo: getattr(instancia, campo) for campo in lookup.model_fields})
+        for lookup, chave in LOOKUPS.get(type(instancia), [])
+        if getattr(instancia, chave) is not None
+    ]
+    if isinstance(instancia, Viagem):
+        linhas.append(linha_por_dia(instancia))
+    return linhas
+
+
+async def gravar_lookups(instancia: Model, anteriores: Optional[Dict[str, Any]] = None) -> None:
+    # As linhas de lookup são cópias completas, então toda escrita na origem as regrava.
+    # Se a coluna de partição (ou a hora_partida, clustering em viagens_por_dia) mudou, a
+    # linha antiga precisa ser apagada na chave anterior.
+    tarefas = []
+    for lookup, chave in LOOKUPS.get(type(instancia), []):
+        anterior = (anteriores or {}).get(chave)
+        if anterior is not None and anterior != getattr(instancia, chave):
+            tarefas.append(statements.remover(lookup, **_chave_primaria(lookup, instancia, **{chave: anterior})))
+    if isinstance(instancia, Viagem) and "hora_partida" in (anteriores or {}):
+        anterior = _chave_por_dia(instancia, anteriores["hora_partida"])
+        if anterior != _chave_por_dia(instancia, instancia.hora_partida):
+            tarefas.append(statements.remover(ViagemPorDia, **anterior))
+    tarefas.extend(statements.inserir(linha) for linha in linhas_de_lookup(instancia))
+    await asyncio.gather(*tarefas)
+
+
+async def remover_lookups(instancia: Model) -> None:
+    tarefas = [
+        statements.remover(lookup, **_chave_primaria(lookup, instancia))
+        for lookup, chave in LOOKUPS.get(type(instancia), [])
+        if getattr(instancia, chave) is not None
+    ]
+    if isinstance(instancia, Viagem):
+        tarefas.append(statements.remover(ViagemPorDia, **_chave_por_dia(instancia, instancia.hora_partida)))
+    await asyncio.gather(*tarefas)
+
+
+async def atualizar_vagas_por_id(viagem: Viagem) -> None:
+    # UPDATE comum, só em viagens_por_id (chave imutável, então não recria cópia de outra
+    # chave). A cópia é aproximada: reservas concorrentes gravam na ordem em que chegam, e o
+    # valor que vale é o da linha de viagens. As demais cópias só mudam no POST/PUT da viagem.
+    await statements.atualizar(ViagemPorId, {"id": viagem.id}, {"vagas_disponiveis": viagem.vagas_disponiveis})
+
+
+def consulta_com_lookup(modelo: type, filtros: Dict[str, Any]):
+    # Se algum filtro é a partição de uma tabela de lookup, a listagem lê só essa partição
+    # e os demais filtros são aplicados dentro dela. Sem isso, cai no scan com ALLOW FILTERING.
+    filtros = {campo: valor for campo, valor in filtros.items() if valor not in (None, "")}
+    query = modelo.all()
+    for lookup, chave in LOOKUPS.get(modelo, []):
+        if chave in filtros:
+            query = lookup.filter(**{chave: filtros.pop(chave)})
+            break
+    if filtros:
+        query = query.filter(**filtros).allow_filtering()
+    return query
+
+
+async def obter_viagem(viagem_id: uuid.UUID) -> Optional[Viagem]:
+    # A partição de viagens é data_viagem; pelo id a viagem sai da cópia em viagens_por_id,
+    # numa única leitura. As reservas seguem fazendo o LWT na linha de viagens.
+    linha = await statements.obter(ViagemPorId, id=viagem_id)
+    # Sem data_viagem é só o resto de um UPDATE de vagas que chegou depois do DELETE
+    if linha is None or linha.data_viagem is None:
+        return None
+    return Viagem(**linha.model_dump())
+
+
+def linha_aluno_por_rota(rota_id: uuid.UUID, viagem_id: uuid.UUID, aluno: Aluno) -> AlunoPorRota:
+    return AlunoPorRota(
+        rota_id=rota_id,
+        aluno_id=aluno.id,
+        viagem_id=viagem_id,
+        nome_completo=aluno.nome_completo,
+        matricula=aluno.matricula,
+        email=aluno.email,
+        telefone=aluno.telefone,
+    )
+
+
+def linha_aluno_por_viagem(inscricao: ViagemAlunos, aluno: Aluno) -> AlunoPorViagem:
+    return AlunoPorViagem(
+        viagem_id=inscricao.viagem_id,
+        aluno_id=aluno.id,
+        nome_completo=aluno.nome_completo,
+        matricula=aluno.matricula,
+        status_embarque=inscricao.status_embarque,
+        data_inscricao=inscricao.data_inscricao,
+        rota_id=inscricao.rota_id,
+    )
+
+
+def linhas_da_inscricao(inscricao: ViagemAlunos, aluno: Aluno) -> List[Model]:
+    # Cópias gravadas junto com a inscrição: a lista de embarque da viagem e, quando a rota
+    # é conhecida, alunos_por_rota
+    linhas = [linha_aluno_por_viagem(inscricao, aluno)]
+    if inscricao.rota_id is not None:
+        linhas.append(linha_aluno_por_rota(inscricao.rota_id, inscricao.viagem_id, aluno))
+    return linhas
+
+
+async def registrar_inscricao(inscricao: ViagemAlunos, aluno: Aluno) -> None:
+    await asyncio.gather(*[statements.inserir(linha) for linha in linhas_da_inscricao(inscricao, aluno)])
+
+
+async def remover_copias_da_inscricao(inscricao: ViagemAlunos) -> None:
+    tarefas = [statements.remover(AlunoPorViagem, viagem_id=inscricao.viagem_id, aluno_id=inscricao.aluno_id)]
+    if inscricao.rota_id is not None:
+        tarefas.append(statements.remover(
+            AlunoPorRota,
+            rota_id=inscricao.rota_id,
+            aluno_id=inscricao.aluno_id,
+            viagem_id=inscricao.viagem_id,
+        ))
+    await asyncio.gather(*tarefas)
+
+
+async def atualizar_aluno_nas_inscricoes(aluno: Aluno) -> None:
+    # A partição de viagem_alunos é o aluno, então suas inscrições saem numa única leitura
+    inscricoes = await statements.listar_particao(ViagemAlunos, aluno_id=aluno.id)
+    await asyncio.gather(*[
+        registrar_inscricao(inscricao, aluno) for inscricao in inscricoes
+    ])
+
+
+async def remover_aluno_das_inscricoes(aluno_id: uuid.UUID) -> None:
+    inscricoes = await statements.listar_particao(ViagemAlunos, aluno_id=aluno_id)
+    await asyncio.gather(*[remover_copias_da_inscricao(inscricao) for inscricao in inscricoes])
+
+
+async def remover_viagem_das_inscricoes(viagem_id: uuid.UUID) -> None:
+    # Os alunos da viagem saem da partição dela na lista de embarque, sem varrer viagem_alunos
+    embarque = await statements.listar_particao(AlunoPorViagem, viagem_id=viagem_id)
+    await asyncio.gather(
+        statements.remover_particao(AlunoPorViagem, viagem_id=viagem_id),
+        *[
+            statements.remover(AlunoPorRota, rota_id=linha.rota_id, aluno_id=linha.aluno_id, viagem_id=viagem_id)
+            for linha in embarque
+            if linha.rota_id is not None
+        ],
+    )
@@ -1,8 +1,14 @@
+import logging
+import time
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.database import connect_to_db_async, disconnect_from_db_async
-from app.models import Rota, Veiculo, Motorista, Aluno, Admin, Viagem, ViagemAlunos
 from app.logging_config import setup_logging
+from app.access_log import LogDeAcesso
+from app.instrumentation import Instrumentacao
+from app import cache, metrics, schema, statements
 from app.alunos import routes as alunos_routes
 from app.motoristas import routes as motoristas_routes
 from app.rotas import routes as rotas_routes
@@ -29,22 +35,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(LogDeAcesso)
+# Adicionado por último, é o mais externo: abre o contexto usado pelos demais
+app.add_middleware(Instrumentacao)
 
 @app.on_event("startup")
 async def startup_event():
+    inicio = time.perf_counter()
     await connect_to_db_async()
-    await Rota.sync_table_async(auto_apply=True)
-    await Veiculo.sync_table_async(auto_apply=True)
-    await Motorista.sync_table_async(auto_apply=True)
-    await Aluno.sync_table_async(auto_apply=True)
-    await Admin.sync_table_async(auto_apply=True)
-    await Viagem.sync_table_async(auto_apply=True)
-    await ViagemAlunos.sync_table_async(auto_apply=True)
+    aplicou = await schema.preparar_no_startup()
+    await statements.aquecer()
+    await cache.barramento.iniciar()
+    logging.info(
+        "Startup concluído em %.2fs (schema %s)",
+        time.perf_counter() - inicio, "sincronizado" if aplicou else "já atualizado",
+    )
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await cache.barramento.parar()
     await disconnect_from_db_async()
 
+@app.get("/cache/stats", tags=["Operação"])
+async def estatisticas_cache():
+    return cache.estatisticas()
+
+@app.get("/metrics", tags=["Operação"], response_class=PlainTextResponse)
+async def exportar_metricas():
+    return PlainTextResponse(metrics.exportar(), media_type="text/plain; version=0.0.4")
+
 app.include_router(alunos_routes.router)
 app.include_router(motoristas_routes.router)
 app.include_router(rotas_routes.router)
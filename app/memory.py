@@ -0,0 +1,1267 @@
+"""Backend em memória para CASSANDRA_MODE=memory.
+
+Uma sessão compatível com a Session do driver (prepare, execute, execute_async, batches e
+paginação por paging_state) sobre tabelas guardadas em dicionários. Ela interpreta o
+subconjunto de CQL gerado pelo caspyorm e por app/: SELECT com igualdade, IN, faixas,
+token() e ALLOW FILTERING, INSERT/UPDATE/DELETE com LWT, TTL, UNSET_VALUE e contadores, e
+a DDL e as consultas a system_schema da sincronização de schema.
+
+Cada tabela guarda as linhas por partição e clustering, como declarado em app/models.py.
+As partições ficam na ordem de token do Murmur3Partitioner, e CREATE INDEX mantém um
+índice por valor. Os valores fazem a mesma ida e volta pelos tipos do driver: timestamps
+truncados em ms e em UTC, coleções vazias lidas como null. Consultas que o Cassandra
+recusaria sem ALLOW FILTERING são recusadas aqui também.
+
+Cada statement roda inteiro sob uma trava do keyspace, então LWTs e batches são atômicos.
+Com CASSANDRA_MEMORIA_LATENCIA_MS (e _JITTER_MS), a resposta chega depois do atraso numa
+thread própria, como as do driver. Sem latência, a resposta é entregue na própria chamada.
+"""
+import bisect
+import hashlib
+import heapq
+import itertools
+import logging
+import operator
+import os
+import random
+import re
+import struct
+import threading
+import time
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from caspyorm import connection
+from cassandra import AlreadyExists, InvalidRequest, cqltypes
+from cassandra.murmur3 import murmur3
+from cassandra.query import BatchStatement, PreparedStatement, UNSET_VALUE, _clean_column_name
+
+logger = logging.getLogger(__name__)
+
+LATENCIA_MS = float(os.getenv("CASSANDRA_MEMORIA_LATENCIA_MS", "0"))
+JITTER_MS = float(os.getenv("CASSANDRA_MEMORIA_JITTER_MS", "0"))
+
+# Mesmo default_fetch_size da Session do driver
+FETCH_SIZE_PADRAO = 5000
+PROTOCOLO = 4
+TOKEN_MIN = -2**63
+TOKEN_MAX = 2**63 - 1
+
+# Chaves internas das linhas; colunas CQL nunca têm colchetes no nome
+_MARCADOR = "[marcador]"
+_EXPIRA = "[expira]"
+
+# (token, chave de partição, chave de clustering): ordem em que as linhas são lidas
+Posicao = Tuple[int, tuple, tuple]
+
+
+# --- Tipos -----------------------------------------------------------------------------
+
+def _dividir(texto: str, separador: str = ",") -> List[str]:
+    """Divide `texto` nos separadores fora de parênteses, <> e aspas."""
+    partes, atual, nivel, aspas = [], [], 0, False
+    for caractere in texto:
+        if caractere == "'":
+            aspas = not aspas
+        elif not aspas and caractere in "(<":
+            nivel += 1
+        elif not aspas and caractere in ")>":
+            nivel -= 1
+        elif caractere == separador and nivel == 0 and not aspas:
+            partes.append("".join(atual).strip())
+            atual = []
+            continue
+        atual.append(caractere)
+    if "".join(atual).strip():
+        partes.append("".join(atual).strip())
+    return partes
+
+
+def _tipo_driver(tipo: str):
+    base, _, resto = tipo.strip().lower().partition("<")
+    if base not in cqltypes._cqltypes:
+        raise InvalidRequest(f"Tipo CQL não suportado: {tipo}")
+    if not resto:
+        return cqltypes._cqltypes[base]
+    argumentos = [_tipo_driver(argumento) for argumento in _dividir(resto.rstrip()[:-1])]
+    if base == "frozen":
+        return argumentos[0]
+    return cqltypes._cqltypes[base].apply_parameters(argumentos)
+
+
+class Coluna:
+    __slots__ = ("nome", "tipo", "driver", "colecao")
+
+    def __init__(self, nome: str, tipo: str):
+        self.nome = nome
+        self.tipo = tipo
+        self.driver = _tipo_driver(tipo)
+        base = tipo.strip().lower().split("<")[0]
+        self.colecao = base if base in ("map", "list", "set") else None
+
+    def normalizar(self, valor: Any) -> Any:
+        """Valor como o Cassandra devolveria numa leitura, validado pelo serializador do driver."""
+        if valor is None:
+            return None
+        try:
+            valor = self.driver.deserialize(self.driver.serialize(valor, PROTOCOLO), PROTOCOLO)
+        except Exception as e:
+            raise TypeError(f"Valor inválido para a coluna {self.nome} ({self.tipo}): {valor!r}: {e}")
+        if self.colecao:
+            # O Cassandra não distingue coleção vazia de null
+            return {"map": dict, "list": list, "set": set}[self.colecao](valor) or None
+        return valor
+
+    def combinar(self, atual: Any, valor: Any, op: str) -> Any:
+        """Resultado de `coluna = coluna + valor` (ou `-`) sobre o valor atual."""
+        if self.colecao is None:
+            delta = self.normalizar(valor) or 0
+            return (atual or 0) + (delta if op == "+" else -delta)
+        if self.colecao == "map" and op == "-":
+            return {chave: v for chave, v in (atual or {}).items() if chave not in set(valor)} or None
+        delta = self.normalizar(valor) or {"map": {}, "list": [], "set": set()}[self.colecao]
+        if self.colecao == "list":
+            return (list(atual or []) + delta if op == "+" else [v for v in atual or [] if v not in delta]) or None
+        if self.colecao == "set":
+            return (set(atual or ()) | delta if op == "+" else set(atual or ()) - delta) or None
+        return {**(atual or {}), **delta} or None
+
+
+def _copiar(valor: Any) -> Any:
+    # As leituras não podem devolver a coleção guardada na tabela
+    return type(valor)(valor) if isinstance(valor, (dict, list, set)) else valor
+
+
+_CLASSES_LINHA: Dict[Tuple[str, ...], type] = {}
+
+
+def _classe_linha(nomes: Tuple[str, ...]) -> type:
+    # Mesmas linhas do named_tuple_factory do driver, com a classe criada uma vez por projeção
+    classe = _CLASSES_LINHA.get(nomes)
+    if classe is None:
+        classe = _CLASSES_LINHA[nomes] = namedtuple("Row", [_clean_column_name(nome) for nome in nomes], rename=True)
+    return classe
+
+
+# --- Tabelas -----------------------------------------------------------------------------
+
+class Particao:
+    __slots__ = ("token", "linhas", "chaves")
+
+    def __init__(self, token: int):
+        self.token = token
+        self.linhas: Dict[tuple, dict] = {}
+        # Chaves de clustering em ordem, para leituras em sequência e retomada de página
+        self.chaves: List[tuple] = []
+
+
+def _viva(linha: dict, agora: float) -> bool:
+    expira = linha.get(_EXPIRA)
+    return expira is None or expira > agora
+
+
+class Tabela:
+    def __init__(self, nome: str, colunas: Sequence[Tuple[str, str]], particao: List[str], clustering: List[str]):
+        self.nome = nome
+        self.colunas: Dict[str, Coluna] = {coluna: Coluna(coluna, tipo) for coluna, tipo in colunas}
+        self.particao = particao
+        self.clustering = clustering
+        self.chaves = particao + clustering
+        self.indices: Dict[str, str] = {}
+        self.por_indice: Dict[str, Dict[Any, set]] = {}
+        self.particoes: Dict[tuple, Particao] = {}
+        # Anel: (token, chave de partição) ordenado, com os tokens à parte para bisect
+        self.anel: List[Tuple[int, tuple]] = []
+        self.tokens: List[int] = []
+        self._ordenar_colunas()
+
+    def _ordenar_colunas(self) -> None:
+        # Ordem do SELECT * no Cassandra: partição, clustering e as demais em ordem alfabética
+        self.regulares = sorted(coluna for coluna in self.colunas if coluna not in self.chaves)
+        self.ordem = tuple(self.chaves + self.regulares)
+
+    def coluna(self, nome: str) -> Coluna:
+        try:
+            return self.colunas[nome]
+        except KeyError:
+            raise InvalidRequest(f"Coluna desconhecida em {self.nome}: {nome}")
+
+    def token(self, pk: tuple) -> int:
+        serializadas = [self.colunas[coluna].driver.serialize(valor, PROTOCOLO) for coluna, valor in zip(self.particao, pk)]
+        if len(serializadas) == 1:
+            chave = serializadas[0]
+        else:
+            chave = b"".join(struct.pack(">H", len(parte)) + parte + b"\x00" for parte in serializadas)
+        token = murmur3(chave)
+        return TOKEN_MAX if token == TOKEN_MIN else token
+
+    def chave(self, valores: Dict[str, Any]) -> Tuple[tuple, tuple]:
+        try:
+            pk = tuple(valores[coluna] for coluna in self.particao)
+            ck = tuple(valores[coluna] for coluna in self.clustering)
+        except KeyError as e:
+            raise InvalidRequest(f"Coluna da chave primária ausente em {self.nome}: {e.args[0]}")
+        if any(valor is None for valor in pk + ck):
+            raise InvalidRequest(f"Valor nulo na chave primária de {self.nome}")
+        return pk, ck
+
+    # Leitura
+
+    def obter(self, pk: tuple, ck: tuple) -> Optional[dict]:
+        particao = self.particoes.get(pk)
+        linha = particao.linhas.get(ck) if particao else None
+        return linha if linha is not None and _viva(linha, time.monotonic()) else None
+
+    def _linhas(self, particao: Particao, pk: tuple, depois_ck: Optional[tuple], agora: float) -> Iterator[Tuple[int, tuple, tuple, dict]]:
+        inicio = 0 if depois_ck is None else bisect.bisect_right(particao.chaves, depois_ck)
+        for ck in particao.chaves[inicio:]:
+            linha = particao.linhas[ck]
+            if _viva(linha, agora):
+                yield particao.token, pk, ck, linha
+
+    def varrer(self, depois: Optional[Posicao] = None, token_min: Optional[int] = None, token_max: Optional[int] = None):
+        """Linhas em ordem de token, a partir de `depois` e dentro de (token_min, token_max]."""
+        agora = time.monotonic()
+        if depois is not None:
+            i = bisect.bisect_left(self.anel, depois[:2])
+            if i < len(self.anel) and self.anel[i] == depois[:2]:
+                yield from self._linhas(self.particoes[depois[1]], depois[1], depois[2], agora)
+                i += 1
+        else:
+            i = 0 if token_min is None else bisect.bisect_right(self.tokens, token_min)
+        while i < len(self.anel):
+            token, pk = self.anel[i]
+            if token_max is not None and token > token_max:
+                return
+            yield from self._linhas(self.particoes[pk], pk, None, agora)
+            i += 1
+
+    def ler_particoes(self, pks: List[tuple], depois: Optional[Posicao], ck: Optional[tuple]):
+        """Linhas das partições `pks` (e só a linha `ck`, quando informada) em ordem de token."""
+        agora = time.monotonic()
+        entradas = sorted({(particao.token, pk) for pk in pks if (particao := self.particoes.get(pk)) is not None})
+        for token, pk in entradas:
+            if depois is not None and (token, pk) < depois[:2]:
+                continue
+            particao = self.particoes[pk]
+            mesma = depois is not None and (token, pk) == depois[:2]
+            if ck is None:
+                yield from self._linhas(particao, pk, depois[2] if mesma else None, agora)
+                continue
+            linha = particao.linhas.get(ck)
+            if linha is not None and _viva(linha, agora) and not (mesma and ck <= depois[2]):
+                yield token, pk, ck, linha
+
+    def ler_indice(self, coluna: str, valor: Any, depois: Optional[Posicao]):
+        agora = time.monotonic()
+        entradas = sorted(
+            (self.particoes[pk].token, pk, ck)
+            for pk, ck in self.por_indice[coluna].get(valor, ())
+        )
+        for posicao in entradas:
+            if depois is not None and posicao <= depois:
+                continue
+            linha = self.particoes[posicao[1]].linhas[posicao[2]]
+            if _viva(linha, agora):
+                yield posicao + (linha,)
+
+    # Escrita
+
+    def _indexar(self, pk: tuple, ck: tuple, linha: dict, adicionar: bool) -> None:
+        for coluna, mapa in self.por_indice.items():
+            valor = linha.get(coluna)
+            if valor is None:
+                continue
+            if adicionar:
+                mapa.setdefault(valor, set()).add((pk, ck))
+            else:
+                entradas = mapa.get(valor)
+                if entradas is not None:
+                    entradas.discard((pk, ck))
+                    if not entradas:
+                        del mapa[valor]
+
+    def gravar(self, pk: tuple, ck: tuple, valores: Dict[str, Any], marcador: bool = False, expira: Any = UNSET_VALUE) -> None:
+        """Upsert das colunas em `valores` (INSERT grava também o marcador de linha)."""
+        particao = self.particoes.get(pk)
+        if particao is None:
+            particao = self.particoes[pk] = Particao(self.token(pk))
+            i = bisect.bisect_left(self.anel, (particao.token, pk))
+            self.anel.insert(i, (particao.token, pk))
+            self.tokens.insert(i, particao.token)
+        linha = particao.linhas.get(ck)
+        if linha is not None and not _viva(linha, time.monotonic()):
+            self._indexar(pk, ck, linha, False)
+            linha = particao.linhas[ck] = dict(zip(self.chaves, pk + ck))
+        elif linha is None:
+            linha = particao.linhas[ck] = dict(zip(self.chaves, pk + ck))
+            bisect.insort(particao.chaves, ck)
+        else:
+            self._indexar(pk, ck, linha, False)
+        for coluna, valor in valores.items():
+            if coluna not in self.chaves:
+                linha[coluna] = valor
+        if marcador:
+            linha[_MARCADOR] = True
+        if expira is not UNSET_VALUE:
+            linha[_EXPIRA] = expira
+        # Sem marcador (só UPDATEs) e sem nenhuma coluna preenchida, a linha não existe
+        if not linha.get(_MARCADOR) and all(linha.get(coluna) is None for coluna in self.regulares):
+            self._descartar(particao, pk, ck)
+        else:
+            self._indexar(pk, ck, linha, True)
+
+    def _descartar(self, particao: Particao, pk: tuple, ck: tuple) -> None:
+        del particao.linhas[ck]
+        del particao.chaves[bisect.bisect_left(particao.chaves, ck)]
+        if not particao.linhas:
+            i = bisect.bisect_left(self.anel, (particao.token, pk))
+            del self.anel[i]
+            del self.tokens[i]
+            del self.particoes[pk]
+
+    def remover(self, pk: tuple, prefixo: tuple = ()) -> None:
+        """Remove a linha (chave completa), as linhas com o prefixo de clustering ou a partição."""
+        particao = self.particoes.get(pk)
+        if particao is None:
+            return
+        for ck in [ck for ck in particao.chaves if ck[:len(prefixo)] == prefixo]:
+            self._indexar(pk, ck, particao.linhas[ck], False)
+            self._descartar(particao, pk, ck)
+
+    def criar_indice(self, nome: str, coluna: str) -> None:
+        self.coluna(coluna)
+        self.indices[nome] = coluna
+        self.por_indice[coluna] = {}
+        for pk, particao in self.particoes.items():
+            for ck, linha in particao.linhas.items():
+                valor = linha.get(coluna)
+                if valor is not None:
+                    self.por_indice[coluna].setdefault(valor, set()).add((pk, ck))
+
+    def truncar(self) -> None:
+        self.particoes.clear()
+        self.anel.clear()
+        self.tokens.clear()
+        for mapa in self.por_indice.values():
+            mapa.clear()
+
+
+# --- Resultados ------------------------------------------------------------------------
+
+class ResultadoMemoria:
+    """A parte de cassandra.cluster.ResultSet usada pelo caspyorm e por app/."""
+
+    def __init__(self, colunas: Tuple[str, ...] = (), linhas: Optional[list] = None,
+                 paging_state: Optional[bytes] = None, proxima: Optional[Callable[[bytes], "ResultadoMemoria"]] = None):
+        self.column_names = list(colunas)
+        self.current_rows = linhas if linhas is not None else []
+        self.paging_state = paging_state
+        self._proxima = proxima
+
+    @property
+    def has_more_pages(self) -> bool:
+        return self.paging_state is not None
+
+    def __iter__(self):
+        # Como no driver, iterar busca as páginas seguintes
+        resultado = self
+        while True:
+            yield from resultado.current_rows
+            if resultado.paging_state is None or resultado._proxima is None:
+                return
+            resultado = resultado._proxima(resultado.paging_state)
+
+    def __bool__(self) -> bool:
+        return bool(self.current_rows)
+
+    def __getitem__(self, indice):
+        return self.current_rows[indice]
+
+    def one(self):
+        return self.current_rows[0] if self.current_rows else None
+
+    def all(self) -> list:
+        return list(self)
+
+    @property
+    def was_applied(self) -> bool:
+        if not self.column_names or self.column_names[0] != "[applied]":
+            raise RuntimeError("O resultado não é de um LWT")
+        return self.current_rows[0][0]
+
+
+def _lwt(aplicado: bool, linha: Optional[dict] = None, colunas: Sequence[str] = ()) -> ResultadoMemoria:
+    nomes = ("[applied]",) + tuple(colunas)
+    valores = (aplicado,) + tuple(_copiar(linha.get(coluna)) if linha else None for coluna in colunas)
+    return ResultadoMemoria(nomes, [_classe_linha(nomes)(*valores)])
+
+
+# --- Análise do CQL ----------------------------------------------------------------------
+
+class Valor:
+    """Literal do CQL ou o marcador `?` de posição `indice`."""
+
+    __slots__ = ("indice", "literal")
+
+    def __init__(self, indice: Optional[int] = None, literal: Any = None):
+        self.indice = indice
+        self.literal = literal
+
+    def resolver(self, params: Sequence[Any]) -> Any:
+        if self.indice is None:
+            return self.literal
+        # Como no protocolo v4, parâmetros finais omitidos valem UNSET_VALUE
+        return params[self.indice] if self.indice < len(params) else UNSET_VALUE
+
+
+class ValorLista:
+    __slots__ = ("itens",)
+
+    def __init__(self, itens: List[Valor]):
+        self.itens = itens
+
+    def resolver(self, params: Sequence[Any]) -> tuple:
+        return tuple(item.resolver(params) for item in self.itens)
+
+
+def _valor(texto: str):
+    texto = texto.strip()
+    if texto.startswith("?"):
+        return Valor(int(texto[1:]))
+    if texto.startswith("("):
+        return ValorLista([_valor(item) for item in _dividir(texto[1:-1])])
+    if texto.startswith("'"):
+        return Valor(literal=texto[1:-1].replace("''", "'"))
+    minusculo = texto.lower()
+    if minusculo in ("true", "false"):
+        return Valor(literal=minusculo == "true")
+    if minusculo == "null":
+        return Valor(literal=None)
+    try:
+        return Valor(literal=int(texto))
+    except ValueError:
+        pass
+    try:
+        return Valor(literal=float(texto))
+    except ValueError:
+        raise InvalidRequest(f"Valor não suportado no CQL: {texto}")
+
+
+class Condicao:
+    __slots__ = ("coluna", "token", "op", "valor")
+
+    def __init__(self, coluna: Optional[str], token: Optional[Tuple[str, ...]], op: str, valor):
+        self.coluna = coluna
+        self.token = token
+        self.op = op
+        self.valor = valor
+
+
+_CONDICAO = re.compile(
+    r"^(?:token ?\((?P<token>[^)]*)\)|(?P<coluna>\w+)) ?"
+    r"(?P<op>>=|<=|!=|=|>|<|\bIN\b|\bCONTAINS KEY\b|\bCONTAINS\b) ?(?P<valor>.+)$",
+    re.I,
+)
+
+
+def _condicoes(texto: Optional[str]) -> List[Condicao]:
+    condicoes = []
+    for parte in re.split(r" AND ", texto or "", flags=re.I):
+        if not parte.strip():
+            continue
+        casamento = _CONDICAO.match(parte.strip())
+        if casamento is None:
+            raise InvalidRequest(f"Condição não suportada: {parte}")
+        token = casamento["token"]
+        condicoes.append(Condicao(
+            casamento["coluna"],
+            tuple(coluna.strip() for coluna in token.split(",")) if token else None,
+            casamento["op"].upper(),
+            _valor(casamento["valor"]),
+        ))
+    return condicoes
+
+
+def _tabela(nome: str) -> Tuple[Optional[str], str]:
+    keyspace, _, tabela = nome.rpartition(".")
+    return keyspace or None, tabela
+
+
+def _numerar_marcadores(cql: str) -> str:
+    # Cada `?` vira `?<posição>`; os parâmetros são resolvidos pela posição no texto
+    partes, contador, aspas = [], itertools.count(), False
+    for caractere in cql:
+        if caractere == "'":
+            aspas = not aspas
+        partes.append(f"?{next(contador)}" if caractere == "?" and not aspas else caractere)
+    return "".join(partes)
+
+
+def _fechamento(texto: str, abertura: int) -> int:
+    nivel = 0
+    for i in range(abertura, len(texto)):
+        if texto[i] == "(":
+            nivel += 1
+        elif texto[i] == ")":
+            nivel -= 1
+            if nivel == 0:
+                return i
+    raise InvalidRequest("Parênteses desbalanceados no CQL")
+
+
+def _resolver_condicoes(tabela: Tabela, condicoes: List[Condicao], params: Sequence[Any]) -> List[tuple]:
+    resolvidas = []
+    for condicao in condicoes:
+        valor = condicao.valor.resolver(params)
+        if valor is UNSET_VALUE:
+            raise InvalidRequest(f"Valor não definido na condição sobre {condicao.coluna or 'token'}")
+        if condicao.token is not None:
+            if list(condicao.token) != tabela.particao:
+                raise InvalidRequest(f"token() deve receber a chave de partição de {tabela.nome}")
+        else:
+            coluna = tabela.coluna(condicao.coluna)
+            if condicao.op == "IN":
+                valor = tuple(coluna.normalizar(item) for item in valor)
+            elif condicao.op not in ("CONTAINS", "CONTAINS KEY"):
+                valor = coluna.normalizar(valor)
+        resolvidas.append((condicao.coluna, condicao.token is not None, condicao.op, valor))
+    return resolvidas
+
+
+_COMPARACOES = {"=": operator.eq, "!=": operator.ne, ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+
+def _atende(linha: dict, token: int, condicoes: List[tuple]) -> bool:
+    for coluna, por_token, op, valor in condicoes:
+        atual = token if por_token else linha.get(coluna)
+        if op == "IN":
+            if atual not in valor:
+                return False
+        elif op == "CONTAINS":
+            if atual is None or valor not in (atual.values() if isinstance(atual, dict) else atual):
+                return False
+        elif op == "CONTAINS KEY":
+            if atual is None or valor not in atual:
+                return False
+        elif atual is None or not _COMPARACOES[op](atual, valor):
+            return False
+    return True
+
+
+def _planejar(tabela: Tabela, condicoes: List[tuple]):
+    """Escolhe como ler as linhas e quais condições essa leitura já atende.
+
+    Partição restrita por igualdade (mais um prefixo de clustering), faixa de token, um
+    índice secundário ou, por fim, a varredura. As condições não atendidas exigem ALLOW
+    FILTERING, como no Cassandra.
+    """
+    por_coluna = defaultdict(list)
+    por_token = []
+    for i, (coluna, token, op, valor) in enumerate(condicoes):
+        (por_token if token else por_coluna[coluna]).append((i, op, valor))
+
+    iguais = [[r for r in por_coluna.get(coluna, ()) if r[1] in ("=", "IN")] for coluna in tabela.particao]
+    if all(iguais):
+        atendidas = {restricoes[0][0] for restricoes in iguais}
+        pks = list(itertools.product(*[
+            (valor,) if op == "=" else valor for _, op, valor in (restricoes[0] for restricoes in iguais)
+        ]))
+        ponto = []
+        for coluna in tabela.clustering:
+            restricoes = por_coluna.get(coluna)
+            if not restricoes:
+                break
+            atendidas.update(i for i, _, _ in restricoes)
+            if len(restricoes) > 1 or restricoes[0][1] != "=":
+                break
+            ponto.append(restricoes[0][2])
+        ck = tuple(ponto) if len(ponto) == len(tabela.clustering) else None
+        return (lambda depois: tabela.ler_particoes(pks, depois, ck)), atendidas
+
+    if por_token:
+        minimo, maximo = TOKEN_MIN - 1, TOKEN_MAX
+        for _, op, valor in por_token:
+            if op in (">", ">=", "="):
+                minimo = max(minimo, valor if op == ">" else valor - 1)
+            if op in ("<", "<=", "="):
+                maximo = min(maximo, valor - 1 if op == "<" else valor)
+        return (lambda depois: tabela.varrer(depois, minimo, maximo)), {i for i, _, _ in por_token}
+
+    for coluna, restricoes in por_coluna.items():
+        if coluna in tabela.por_indice:
+            for i, op, valor in restricoes:
+                if op == "=":
+                    return (lambda depois: tabela.ler_indice(coluna, valor, depois)), {i}
+
+    return tabela.varrer, set()
+
+
+def _codificar_estado(tabela: Tabela, entregues: int, posicao: Optional[Posicao] = None) -> bytes:
+    # paging_state: linhas já entregues (para o LIMIT) e a chave da última linha lida
+    partes = [struct.pack(">BI", 1 if posicao else 2, entregues)]
+    if posicao is not None:
+        for coluna, valor in zip(tabela.chaves, posicao[1] + posicao[2]):
+            bruto = tabela.colunas[coluna].driver.serialize(valor, PROTOCOLO)
+            partes.append(struct.pack(">I", len(bruto)) + bruto)
+    return b"".join(partes)
+
+
+def _decodificar_estado(tabela: Tabela, estado: bytes) -> Tuple[int, Optional[Posicao]]:
+    try:
+        tipo, entregues = struct.unpack_from(">BI", estado)
+        if tipo == 2 and len(estado) == 5:
+            return entregues, None
+        if tipo != 1:
+            raise ValueError(tipo)
+        valores, inicio = [], 5
+        for coluna in tabela.chaves:
+            (tamanho,) = struct.unpack_from(">I", estado, inicio)
+            inicio += 4
+            valores.append(tabela.colunas[coluna].driver.deserialize(estado[inicio:inicio + tamanho], PROTOCOLO))
+            inicio += tamanho
+        if inicio != len(estado):
+            raise ValueError("bytes sobrando")
+        pk, ck = tuple(valores[:len(tabela.particao)]), tuple(valores[len(tabela.particao):])
+        return entregues, (tabela.token(pk), pk, ck)
+    except Exception as e:
+        raise InvalidRequest(f"paging_state inválido: {e}")
+
+
+class Selecao:
+    def __init__(self, casamento):
+        self.keyspace, self.tabela = _tabela(casamento["tabela"])
+        colunas = casamento["colunas"].strip()
+        self.contagem = colunas.replace(" ", "").lower() == "count(*)"
+        self.colunas = None if self.contagem or colunas == "*" else tuple(_dividir(colunas))
+        self.condicoes = _condicoes(casamento["onde"])
+        self.ordem = [
+            (item.split()[0], len(item.split()) > 1 and item.split()[1].upper() == "DESC")
+            for item in _dividir(casamento["ordem"] or "")
+        ]
+        self.limite = _valor(casamento["limite"]) if casamento["limite"] else None
+        self.filtragem = bool(casamento["filtragem"])
+
+    def executar(self, banco: "BancoMemoria", params, fetch_size, paging_state) -> ResultadoMemoria:
+        if self.keyspace == "system_schema":
+            return banco.catalogo(self, params)
+        tabela = banco.tabela(self.tabela)
+        condicoes = _resolver_condicoes(tabela, self.condicoes, params)
+        fonte, atendidas = _planejar(tabela, condicoes)
+        if not self.filtragem and len(atendidas) < len(condicoes):
+            raise InvalidRequest(
+                f"A consulta em {tabela.nome} pode exigir filtragem de dados; use ALLOW FILTERING"
+            )
+        if self.contagem:
+            total = sum(1 for token, _, _, linha in fonte(None) if _atende(linha, token, condicoes))
+            return ResultadoMemoria(("count",), [_classe_linha(("count",))(total)])
+
+        nomes = self.colunas or tabela.ordem
+        for nome in nomes:
+            tabela.coluna(nome)
+        limite = self.limite.resolver(params) if self.limite else None
+        entregues, depois = _decodificar_estado(tabela, paging_state) if paging_state else (0, None)
+        tamanhos = [tamanho for tamanho in (fetch_size, limite - entregues if limite else None) if tamanho]
+        pagina = min(tamanhos) if tamanhos else None
+
+        if self.ordem:
+            # ORDER BY reordena dentro das partições pedidas; a página segue por deslocamento
+            todas = [item for item in fonte(None) if _atende(item[3], item[0], condicoes)]
+            for coluna, decrescente in reversed(self.ordem):
+                todas.sort(key=lambda item: item[3].get(coluna), reverse=decrescente)
+            restantes = todas[entregues:]
+            selecionadas = restantes[:pagina] if pagina else restantes
+            mais = len(restantes) > len(selecionadas)
+            proximo = _codificar_estado(tabela, entregues + len(selecionadas)) if mais else None
+        else:
+            selecionadas, mais = [], False
+            for item in fonte(depois):
+                if not _atende(item[3], item[0], condicoes):
+                    continue
+                if pagina is not None and len(selecionadas) == pagina:
+                    mais = True
+                    break
+                selecionadas.append(item)
+            proximo = _codificar_estado(tabela, entregues + len(selecionadas), selecionadas[-1][:3]) if mais else None
+        if limite and entregues + len(selecionadas) >= limite:
+            proximo = None
+
+        classe = _classe_linha(tuple(nomes))
+        linhas = [classe(*[_copiar(linha.get(nome)) for nome in nomes]) for _, _, _, linha in selecionadas]
+        proxima = (lambda estado: banco.executar(self, params, fetch_size, estado)) if proximo else None
+        return ResultadoMemoria(tuple(nomes), linhas, proximo, proxima)
+
+
+def _igualdades(tabela: Tabela, condicoes: List[tuple], completa: bool) -> Tuple[tuple, tuple]:
+    valores = {}
+    for coluna, por_token, op, valor in condicoes:
+        if por_token or op != "=" or coluna not in tabela.chaves:
+            raise InvalidRequest(f"Escritas em {tabela.nome} só aceitam igualdade nas colunas da chave primária")
+        valores[coluna] = valor
+    if not completa:
+        return tabela.chave({**valores, **{coluna: valores.get(coluna, UNSET_VALUE) for coluna in tabela.clustering}})
+    return tabela.chave(valores)
+
+
+class Escrita:
+    """Partes comuns de INSERT, UPDATE e DELETE: condição IF e TTL."""
+
+    def _condicao_se(self, texto: Optional[str]) -> None:
+        self.se_existe = self.se_nao_existe = False
+        self.se: List[Condicao] = []
+        texto = (texto or "").strip()
+        if texto.upper() == "NOT EXISTS":
+            self.se_nao_existe = True
+        elif texto.upper() == "EXISTS":
+            self.se_existe = True
+        elif texto:
+            self.se = _condicoes(texto)
+
+    @property
+    def lwt(self) -> bool:
+        return self.se_existe or self.se_nao_existe or bool(self.se)
+
+    def _verificar(self, tabela: Tabela, atual: Optional[dict], params) -> Optional[ResultadoMemoria]:
+        """Resposta de LWT não aplicado, ou None se a condição IF foi atendida."""
+        if self.se_existe and atual is None:
+            return _lwt(False)
+        if self.se_nao_existe and atual is not None:
+            return _lwt(False, atual, tabela.ordem)
+        if self.se:
+            condicoes = _resolver_condicoes(tabela, self.se, params)
+            if atual is None or not _atende(atual, 0, condicoes):
+                return _lwt(False, atual, [condicao.coluna for condicao in self.se])
+        return None
+
+    def _expira(self, ttl: Optional[Valor], params) -> Any:
+        if ttl is None:
+            return UNSET_VALUE
+        segundos = ttl.resolver(params)
+        return time.monotonic() + segundos if segundos not in (None, UNSET_VALUE, 0) else None
+
+
+class Insercao(Escrita):
+    def __init__(self, casamento):
+        self.keyspace, self.tabela = _tabela(casamento["tabela"])
+        self.colunas = [coluna.strip() for coluna in casamento["colunas"].split(",")]
+        self.valores = [_valor(valor) for valor in _dividir(casamento["valores"])]
+        if len(self.colunas) != len(self.valores):
+            raise InvalidRequest("INSERT com número de colunas e valores diferentes")
+        resto = casamento["resto"]
+        self._condicao_se("NOT EXISTS" if re.search(r"IF NOT EXISTS", resto, re.I) else None)
+        ttl = re.search(r"USING TTL (\S+)", resto, re.I)
+        self.ttl = _valor(ttl.group(1)) if ttl else None
+
+    def executar(self, banco: "BancoMemoria", params, fetch_size, paging_state) -> ResultadoMemoria:
+        tabela = banco.tabela(self.tabela)
+        valores = {}
+        for coluna, valor in zip(self.colunas, self.valores):
+            valor = valor.resolver(params)
+            if valor is not UNSET_VALUE:
+                valores[coluna] = tabela.coluna(coluna).normalizar(valor)
+        pk, ck = tabela.chave(valores)
+        if self.lwt:
+            recusa = self._verificar(tabela, tabela.obter(pk, ck), params)
+            if recusa is not None:
+                return recusa
+        # O TTL do INSERT vale para a linha toda; sem TTL, a linha deixa de expirar
+        expira = self._expira(self.ttl, params)
+        tabela.gravar(pk, ck, valores, marcador=True, expira=None if expira is UNSET_VALUE else expira)
+        return _lwt(True) if self.lwt else ResultadoMemoria()
+
+
+class Atualizacao(Escrita):
+    def __init__(self, casamento):
+        self.keyspace, self.tabela = _tabela(casamento["tabela"])
+        self.ttl = _valor(casamento["ttl"]) if casamento["ttl"] else None
+        self.atribuicoes = []
+        for atribuicao in _dividir(casamento["atribuicoes"]):
+            coluna, _, expressao = (parte.strip() for parte in atribuicao.partition("="))
+            soma = re.match(rf"^{coluna} ?([+-]) ?(.+)$", expressao)
+            prefixo = re.match(rf"^(.+?) ?\+ ?{coluna}$", expressao)
+            if soma:
+                self.atribuicoes.append((coluna, soma.group(1), _valor(soma.group(2))))
+            elif prefixo:
+                self.atribuicoes.append((coluna, "+", _valor(prefixo.group(1))))
+            else:
+                self.atribuicoes.append((coluna, "=", _valor(expressao)))
+        self.condicoes = _condicoes(casamento["onde"])
+        self._condicao_se(casamento["se"])
+
+    def executar(self, banco: "BancoMemoria", params, fetch_size, paging_state) -> ResultadoMemoria:
+        tabela = banco.tabela(self.tabela)
+        pk, ck = _igualdades(tabela, _resolver_condicoes(tabela, self.condicoes, params), completa=True)
+        atual = tabela.obter(pk, ck)
+        if self.lwt:
+            recusa = self._verificar(tabela, atual, params)
+            if recusa is not None:
+                return recusa
+        novos = {}
+        for coluna, op, valor in self.atribuicoes:
+            valor = valor.resolver(params)
+            if valor is UNSET_VALUE:
+                continue
+            if coluna in tabela.chaves:
+                raise InvalidRequest(f"A coluna {coluna} faz parte da chave primária de {tabela.nome}")
+            definicao = tabela.coluna(coluna)
+            if op == "=":
+                novos[coluna] = definicao.normalizar(valor)
+            else:
+                novos[coluna] = definicao.combinar(atual.get(coluna) if atual else None, valor, op)
+        tabela.gravar(pk, ck, novos, expira=self._expira(self.ttl, params))
+        return _lwt(True) if self.lwt else ResultadoMemoria()
+
+
+class Remocao(Escrita):
+    def __init__(self, casamento):
+        self.keyspace, self.tabela = _tabela(casamento["tabela"])
+        self.colunas = [coluna.strip() for coluna in (casamento["colunas"] or "").split(",") if coluna.strip()]
+        self.condicoes = _condicoes(casamento["onde"])
+        self._condicao_se(casamento["se"])
+
+    def executar(self, banco: "BancoMemoria", params, fetch_size, paging_state) -> ResultadoMemoria:
+        tabela = banco.tabela(self.tabela)
+        condicoes = _resolver_condicoes(tabela, self.condicoes, params)
+        restritas = {coluna for coluna, _, _, _ in condicoes}
+        prefixo = []
+        for coluna in tabela.clustering:
+            if coluna not in restritas:
+                break
+            prefixo.append(coluna)
+        if len(prefixo) < len(restritas & set(tabela.clustering)):
+            raise InvalidRequest(f"DELETE em {tabela.nome} deve restringir um prefixo das colunas de clustering")
+        completa = len(prefixo) == len(tabela.clustering)
+        if (self.lwt or self.colunas) and not completa:
+            raise InvalidRequest(f"DELETE condicional ou de colunas em {tabela.nome} exige a chave primária completa")
+        pk, ck = _igualdades(tabela, condicoes, completa)
+        if self.lwt:
+            recusa = self._verificar(tabela, tabela.obter(pk, ck), params)
+            if recusa is not None:
+                return recusa
+        if self.colunas:
+            tabela.gravar(pk, ck, {coluna: None for coluna in self.colunas})
+        else:
+            tabela.remover(pk, ck[:len(prefixo)] if not completa else ck)
+        return _lwt(True) if self.lwt else ResultadoMemoria()
+
+
+class CriacaoTabela:
+    def __init__(self, cql: str):
+        casamento = re.match(r"^CREATE TABLE(?P<se> IF NOT EXISTS)? (?P<tabela>[\w.]+) ?\(", cql, re.I)
+        self.se_nao_existe = bool(casamento["se"])
+        self.keyspace, self.tabela = _tabela(casamento["tabela"])
+        abertura = casamento.end() - 1
+        self.colunas, chave = [], None
+        for definicao in _dividir(cql[abertura + 1:_fechamento(cql, abertura)]):
+            primaria = re.match(r"^PRIMARY KEY ?\((.*)\)$", definicao, re.I)
+            if primaria:
+                chave = _dividir(primaria.group(1))
+                continue
+            nome, tipo = definicao.split(None, 1)
+            if re.search(r" PRIMARY KEY$", tipo, re.I):
+                tipo = tipo[:-len(" PRIMARY KEY")]
+                chave = [nome]
+            self.colunas.append((nome, re.sub(r" STATIC$", "", tipo, flags=re.I).strip()))
+        if not chave:
+            raise InvalidRequest(f"Tabela {self.tabela} sem chave primária")
+        particao = chave[0]
+        self.particao = _dividir(particao[1:-1]) if particao.startswith("(") else [particao]
+        self.clustering = chave[1:]
+
+    def executar(self, banco: "BancoMemoria", params, fetch_size, paging_state) -> ResultadoMemoria:
+        if self.tabela in banco.tabelas:
+            if not self.se_nao_existe:
+                raise AlreadyExists(keyspace=banco.keyspace, table=self.tabela)
+        else:
+            banco.tabelas[self.tabela] = Tabela(self.tabela, self.colunas, self.particao, self.clustering)
+        return ResultadoMemoria()
+
+
+class CriacaoIndice:
+    def __init__(self, casamento):
+        self.se_nao_existe = bool(casamento["se"])
+        self.keyspace, self.tabela = _tabela(casamento["tabela"])
+        # keys(coluna)/values(coluna) indexam a própria coluna
+        self.coluna = re.sub(r"^\w+\((\w+)\)$", r"\1", casamento["coluna"].strip())
+        self.nome = casamento["nome"] or f"{self.tabela}_{self.coluna}_idx"
+
+    def executar(self, banco: "BancoMemoria", params, fetch_size, paging_state) -> ResultadoMemoria:
+        tabela = banco.tabela(self.tabela)
+        if self.nome in tabela.indices:
+            if not self.se_nao_existe:
+                raise InvalidRequest(f"Índice {self.nome} já existe")
+        else:
+            tabela.criar_indice(self.nome, self.coluna)
+        return ResultadoMemoria()
+
+
+class AlteracaoTabela:
+    def __init__(self, casamento):
+        self.keyspace, self.tabela = _tabela(casamento["tabela"])
+        self.acao = casamento["acao"].upper()
+        self.coluna = casamento["coluna"]
+        self.tipo = (casamento["tipo"] or "").strip()
+
+    def executar(self, banco: "BancoMemoria", params, fetch_size, paging_state) -> ResultadoMemoria:
+        tabela = banco.tabela(self.tabela)
+        if self.acao == "ADD":
+            if self.coluna in tabela.colunas:
+                raise InvalidRequest(f"Coluna {self.coluna} já existe em {tabela.nome}")
+            tabela.colunas[self.coluna] = Coluna(self.coluna, self.tipo)
+        else:
+            if self.coluna in tabela.chaves:
+                raise InvalidRequest(f"A coluna {self.coluna} faz parte da chave primária de {tabela.nome}")
+            tabela.coluna(self.coluna)
+            for particao in tabela.particoes.values():
+                for linha in particao.linhas.values():
+                    linha.pop(self.coluna, None)
+            del tabela.colunas[self.coluna]
+        tabela._ordenar_colunas()
+        return ResultadoMemoria()
+
+
+class RemocaoTabela:
+    def __init__(self, casamento, truncar: bool):
+        self.keyspace, self.tabela = _tabela(casamento["tabela"])
+        self.truncar = truncar
+        self.se_existe = bool(casamento.groupdict().get("se"))
+
+    def executar(self, banco: "BancoMemoria", params, fetch_size, paging_state) -> ResultadoMemoria:
+        if self.truncar:
+            banco.tabela(self.tabela).truncar()
+        elif self.tabela in banco.tabelas:
+            del banco.tabelas[self.tabela]
+        elif not self.se_existe:
+            raise InvalidRequest(f"Tabela inexistente: {self.tabela}")
+        return ResultadoMemoria()
+
+
+class SemEfeito:
+    """Keyspaces e USE: o banco em memória tem um keyspace por sessão."""
+
+    def executar(self, banco: "BancoMemoria", params, fetch_size, paging_state) -> ResultadoMemoria:
+        return ResultadoMemoria()
+
+
+_SELECT = re.compile(
+    r"^SELECT (?P<colunas>.+?) FROM (?P<tabela>[\w.]+)(?: WHERE (?P<onde>.+?))?(?: ORDER BY (?P<ordem>.+?))?"
+    r"(?: LIMIT (?P<limite>\S+))?(?P<filtragem> ALLOW FILTERING)?$",
+    re.I,
+)
+_INSERT = re.compile(
+    r"^INSERT INTO (?P<tabela>[\w.]+) ?\((?P<colunas>[^)]*)\) VALUES ?\((?P<valores>.*)\)"
+    r"(?P<resto>(?: IF NOT EXISTS| USING TTL \S+)*)$",
+    re.I,
+)
+_UPDATE = re.compile(
+    r"^UPDATE (?P<tabela>[\w.]+)(?: USING TTL (?P<ttl>\S+))? SET (?P<atribuicoes>.+?) WHERE (?P<onde>.+?)"
+    r"(?: IF (?P<se>.+))?$",
+    re.I,
+)
+_DELETE = re.compile(
+    r"^DELETE(?: (?P<colunas>\w+(?:, ?\w+)*))? FROM (?P<tabela>[\w.]+) WHERE (?P<onde>.+?)(?: IF (?P<se>.+))?$",
+    re.I,
+)
+_CREATE_INDEX = re.compile(
+    r"^CREATE (?:CUSTOM )?INDEX(?P<se> IF NOT EXISTS)?(?: (?P<nome>\w+))? ON (?P<tabela>[\w.]+) ?\((?P<coluna>.+)\)$",
+    re.I,
+)
+_ALTER = re.compile(r"^ALTER TABLE (?P<tabela>[\w.]+) (?P<acao>ADD|DROP) (?P<coluna>\w+)(?: (?P<tipo>.+))?$", re.I)
+_DROP = re.compile(r"^DROP TABLE(?P<se> IF EXISTS)? (?P<tabela>[\w.]+)$", re.I)
+_TRUNCATE = re.compile(r"^TRUNCATE(?: TABLE)? (?P<tabela>[\w.]+)$", re.I)
+
+
+@lru_cache(maxsize=4096)
+def analisar(cql: str):
+    """Plano de execução de um statement CQL (imutável, compartilhado entre execuções)."""
+    texto = _numerar_marcadores(re.sub(r"\s+", " ", cql).strip().rstrip(";").strip())
+    comando = texto.split(" ", 1)[0].upper()
+    for inicio, expressao, plano in [
+        ("SELECT", _SELECT, Selecao), ("INSERT", _INSERT, Insercao), ("UPDATE", _UPDATE, Atualizacao),
+        ("DELETE", _DELETE, Remocao), ("CREATE", _CREATE_INDEX, CriacaoIndice), ("ALTER", _ALTER, AlteracaoTabela),
+    ]:
+        if comando == inicio:
+            casamento = expressao.match(texto)
+            if casamento:
+                return plano(casamento)
+    if re.match(r"^CREATE TABLE ", texto, re.I):
+        return CriacaoTabela(texto)
+    for expressao, truncar in [(_DROP, False), (_TRUNCATE, True)]:
+        casamento = expressao.match(texto)
+        if casamento:
+            return RemocaoTabela(casamento, truncar)
+    if re.match(r"^(CREATE KEYSPACE|ALTER KEYSPACE|DROP KEYSPACE|USE) ", texto, re.I):
+        return SemEfeito()
+    raise InvalidRequest(f"CQL não suportado pelo backend em memória: {cql.strip()[:200]}")
+
+
+# --- Banco e sessão --------------------------------------------------------------------------
+
+class BancoMemoria:
+    """As tabelas de um keyspace. Cada statement (ou batch) roda sob `trava`."""
+
+    def __init__(self, keyspace: str):
+        self.keyspace = keyspace
+        self.tabelas: Dict[str, Tabela] = {}
+        self.trava = threading.RLock()
+        # query_id -> prepared, para os batches (o cache do caspyorm sobrevive a reconexões)
+        self.preparados: Dict[bytes, "PreparadoMemoria"] = {}
+
+    def tabela(self, nome: str) -> Tabela:
+        try:
+            return self.tabelas[nome]
+        except KeyError:
+            raise InvalidRequest(f"Tabela inexistente: {self.keyspace}.{nome}")
+
+    def executar(self, plano, params: Sequence[Any], fetch_size: Optional[int] = None, paging_state: Optional[bytes] = None) -> ResultadoMemoria:
+        with self.trava:
+            return plano.executar(self, params, fetch_size, paging_state)
+
+    def catalogo(self, selecao: Selecao, params) -> ResultadoMemoria:
+        """system_schema.tables, .columns e .indexes, lidos pela sincronização de schema."""
+        linhas = []
+        for tabela in self.tabelas.values():
+            base = {"keyspace_name": self.keyspace, "table_name": tabela.nome}
+            if selecao.tabela == "tables":
+                linhas.append(base)
+            elif selecao.tabela == "columns":
+                tipos = (
+                    [("partition_key", i) for i in range(len(tabela.particao))]
+                    + [("clustering", i) for i in range(len(tabela.clustering))]
+                    + [("regular", -1)] * len(tabela.regulares)
+                )
+                for nome, (tipo, posicao) in zip(tabela.ordem, tipos):
+                    linhas.append({
+                        **base, "column_name": nome, "kind": tipo, "position": posicao,
+                        "type": tabela.colunas[nome].tipo, "clustering_order": "asc" if tipo == "clustering" else "none",
+                    })
+            elif selecao.tabela == "indexes":
+                for nome, coluna in tabela.indices.items():
+                    linhas.append({**base, "index_name": nome, "kind": "COMPOSITES", "options": {"target": coluna}})
+            else:
+                raise InvalidRequest(f"Tabela inexistente: system_schema.{selecao.tabela}")
+        for condicao in selecao.condicoes:
+            valor = condicao.valor.resolver(params)
+            linhas = [linha for linha in linhas if linha.get(condicao.coluna) == valor]
+        nomes = selecao.colunas or (tuple(linhas[0]) if linhas else ())
+        classe = _classe_linha(tuple(nomes))
+        return ResultadoMemoria(tuple(nomes), [classe(*[linha.get(nome) for nome in nomes]) for linha in linhas])
+
+
+class PreparadoMemoria(PreparedStatement):
+    """Prepared statement da sessão em memória: guarda o plano em vez dos metadados do servidor."""
+
+    def __init__(self, cql: str, keyspace: Optional[str]):
+        self.query_string = cql
+        self.query_id = hashlib.md5(cql.encode()).digest()
+        self.keyspace = keyspace
+        self.plano = analisar(cql)
+        self.is_idempotent = False
+        self.routing_key = None
+        self.custom_payload = None
+        self.fetch_size = None
+
+    def bind(self, values=None) -> "LigadoMemoria":
+        return LigadoMemoria(self, list(values or ()))
+
+    def __str__(self):
+        return f"<PreparadoMemoria query=\"{self.query_string}\">"
+
+    __repr__ = __str__
+
+
+class LigadoMemoria:
+    """BoundStatement com os valores em Python, sem serialização."""
+
+    def __init__(self, prepared_statement: PreparadoMemoria, values: List[Any]):
+        self.prepared_statement = prepared_statement
+        self.values = values
+        self.keyspace = prepared_statement.keyspace
+        self.routing_key = None
+        self.custom_payload = None
+        self.fetch_size = None
+        self.paging_state = None
+        self.is_idempotent = prepared_statement.is_idempotent
+
+
+class FuturoMemoria:
+    """A parte de cassandra.cluster.ResponseFuture usada pelo caspyorm e por app/."""
+
+    def __init__(self, query):
+        self.query = query
+        self._trava = threading.Lock()
+        self._pronto = threading.Event()
+        self._resultado: Optional[ResultadoMemoria] = None
+        self._erro: Optional[BaseException] = None
+        self._callbacks: List[tuple] = []
+        self._errbacks: List[tuple] = []
+
+    def _concluir(self, resultado: Optional[ResultadoMemoria], erro: Optional[BaseException]) -> None:
+        with self._trava:
+            self._resultado, self._erro = resultado, erro
+            self._pronto.set()
+            chamadas = self._errbacks if erro is not None else self._callbacks
+        for funcao, args, kwargs in chamadas:
+            self._chamar(funcao, args, kwargs)
+
+    def _chamar(self, funcao, args, kwargs) -> None:
+        # O driver entrega as linhas da página (ou a exceção) e só registra erros do callback
+        argumento = self._erro if self._erro is not None else self._resultado.current_rows
+        try:
+            funcao(argumento, *args, **kwargs)
+        except Exception:
+            logger.exception("Erro num callback da consulta em memória")
+
+    def add_callback(self, fn, *args, **kwargs) -> None:
+        with self._trava:
+            if not self._pronto.is_set():
+                self._callbacks.append((fn, args, kwargs))
+                return
+        if self._erro is None:
+            self._chamar(fn, args, kwargs)
+
+    def add_errback(self, fn, *args, **kwargs) -> None:
+        with self._trava:
+            if not self._pronto.is_set():
+                self._errbacks.append((fn, args, kwargs))
+                return
+        if self._erro is not None:
+            self._chamar(fn, args, kwargs)
+
+    def add_callbacks(self, callback, errback, callback_args=(), callback_kwargs=None, errback_args=(), errback_kwargs=None) -> None:
+        self.add_callback(callback, *callback_args, **(callback_kwargs or {}))
+        self.add_errback(errback, *errback_args, **(errback_kwargs or {}))
+
+    def result(self) -> ResultadoMemoria:
+        self._pronto.wait()
+        if self._erro is not None:
+            raise self._erro
+        return self._resultado
+
+
+class _Entregas:
+    """Conclui os futuros depois da latência simulada, numa thread (como o event loop do driver)."""
+
+    def __init__(self):
+        self._fila: List[tuple] = []
+        self._condicao = threading.Condition()
+        self._sequencia = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+
+    def agendar(self, atraso: float, acao: Callable[[], None]) -> None:
+        with self._condicao:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._rodar, name="cassandra-memoria", daemon=True)
+                self._thread.start()
+            heapq.heappush(self._fila, (time.monotonic() + atraso, next(self._sequencia), acao))
+            self._condicao.notify()
+
+    def _rodar(self) -> None:
+        while True:
+            with self._condicao:
+                while not self._fila or self._fila[0][0] > time.monotonic():
+                    self._condicao.wait(self._fila[0][0] - time.monotonic() if self._fila else None)
+                _, _, acao = heapq.heappop(self._fila)
+            acao()
+
+
+_ENTREGAS = _Entregas()
+
+
+class _ControlConnection:
+    def wait_for_schema_agreement(self, connection=None, preloaded_results=None, wait_time=None) -> bool:
+        # Um único "nó": o schema está sempre de acordo
+        return True
+
+
+class ClusterMemoria:
+    def __init__(self):
+        self.control_connection = _ControlConnection()
+        self.is_shutdown = False
+
+    def shutdown(self) -> None:
+        self.is_shutdown = True
+
+
+class SessaoMemoria:
+    """Session do driver sobre um BancoMemoria."""
+
+    def __init__(self, banco: BancoMemoria):
+        self.banco = banco
+        self.keyspace = banco.keyspace
+        self.cluster = ClusterMemoria()
+        self.default_fetch_size = FETCH_SIZE_PADRAO
+        self.is_shutdown = False
+
+    def prepare(self, query, custom_payload=None, keyspace=None) -> PreparadoMemoria:
+        cql = getattr(query, "query_string", query)
+        preparado = PreparadoMemoria(cql, keyspace or self.keyspace)
+        self.banco.preparados[preparado.query_id] = preparado
+        return preparado
+
+    def execute(self, query, parameters=None, timeout=None, trace=False, custom_payload=None,
+                execution_profile=None, paging_state=None, host=None, execute_as=None) -> ResultadoMemoria:
+        return self.execute_async(query, parameters, paging_state=paging_state).result()
+
+    def execute_async(self, query, parameters=None, trace=False, custom_payload=None, timeout=None,
+                      execution_profile=None, paging_state=None, host=None, execute_as=None) -> FuturoMemoria:
+        futuro = FuturoMemoria(query)
+        try:
+            resultado, erro = self._executar(query, parameters, paging_state), None
+        except Exception as e:
+            resultado, erro = None, e
+        atraso = (LATENCIA_MS + (random.uniform(0, JITTER_MS) if JITTER_MS else 0)) / 1000
+        if atraso > 0:
+            _ENTREGAS.agendar(atraso, lambda: futuro._concluir(resultado, erro))
+        else:
+            futuro._concluir(resultado, erro)
+        return futuro
+
+    def _executar(self, query, parameters, paging_state) -> ResultadoMemoria:
+        if isinstance(query, BatchStatement):
+            return self._executar_batch(query)
+        fetch_size = getattr(query, "fetch_size", None)
+        if isinstance(query, LigadoMemoria):
+            plano, parameters = query.prepared_statement.plano, query.values
+            paging_state = paging_state or query.paging_state
+        elif isinstance(query, PreparadoMemoria):
+            plano = query.plano
+        else:
+            plano = analisar(getattr(query, "query_string", query))
+        if not isinstance(fetch_size, int) or fetch_size <= 0:
+            fetch_size = self.default_fetch_size
+        return self.banco.executar(plano, list(parameters or ()), fetch_size, paging_state)
+
+    def _executar_batch(self, batch: BatchStatement) -> ResultadoMemoria:
+        with self.banco.trava:
+            for preparado, statement, valores in batch._statements_and_parameters:
+                plano = self.banco.preparados[statement].plano if preparado else analisar(statement)
+                self.banco.executar(plano, list(valores or ()))
+        return ResultadoMemoria()
+
+    def set_keyspace(self, keyspace: str) -> None:
+        if keyspace != self.keyspace:
+            raise InvalidRequest(f"O backend em memória usa só o keyspace {self.keyspace}")
+
+    def get_pool_state(self) -> dict:
+        return {}
+
+    def shutdown(self) -> None:
+        self.is_shutdown = True
+
+
+# Um banco por keyspace, mantido entre conexões do mesmo processo
+_BANCOS: Dict[str, BancoMemoria] = {}
+
+
+def conectar(keyspace: str) -> SessaoMemoria:
+    """Instala uma sessão em memória como a sessão assíncrona do caspyorm."""
+    banco = _BANCOS.setdefault(keyspace, BancoMemoria(keyspace))
+    sessao = SessaoMemoria(banco)
+    gerenciador = connection.connection
+    gerenciador.cluster = sessao.cluster
+    gerenciador.async_session = sessao
+    gerenciador.keyspace = keyspace
+    gerenciador._is_async_connected = True
+    return sessao
@@ -0,0 +1,175 @@
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from caspyorm.connection import get_async_session
+
+from app import cache
+from app.profiles import PERFIS
+
+# Limites superiores dos buckets (o último bucket, +Inf, é implícito)
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+BUCKETS_LINHAS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+
+class Histograma:
+    """Histograma de buckets fixos, registrado só pelo event loop.
+
+    Todas as observações vêm do middleware, que roda na thread do event loop: sem
+    concorrência entre threads, cada observação é uma busca binária e dois incrementos,
+    sem trava.
+    """
+
+    __slots__ = ("limites", "contagens", "soma", "total")
+
+    def __init__(self, limites: Sequence[float]):
+        self.limites = tuple(limites)
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float) -> None:
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def acumulado(self) -> List[Tuple[float, int]]:
+        """Pares (limite, observações <= limite), terminando em +Inf."""
+        pares, soma = [], 0
+        for limite, contagem in zip(self.limites + (float("inf"),), self.contagens):
+            soma += contagem
+            pares.append((limite, soma))
+        return pares
+
+
+def _rotulos(**rotulos: str) -> str:
+    def escapar(valor) -> str:
+        return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{nome}="{escapar(valor)}"' for nome, valor in rotulos.items())
+
+
+class FamiliaHistogramas:
+    """Um histograma por rota (template do path), criado na primeira observação."""
+
+    def __init__(self, nome: str, descricao: str, limites: Sequence[float]):
+        self.nome = nome
+        self.descricao = descricao
+        self.limites = limites
+        self.por_rota: Dict[str, Histograma] = {}
+
+    def observar(self, rota: str, valor: float) -> None:
+        histograma = self.por_rota.get(rota)
+        if histograma is None:
+            histograma = self.por_rota[rota] = Histograma(self.limites)
+        histograma.observar(valor)
+
+    def exportar(self) -> Iterable[str]:
+        yield f"# HELP {self.nome} {self.descricao}"
+        yield f"# TYPE {self.nome} histogram"
+        for rota, histograma in list(self.por_rota.items()):
+            for limite, acumulado in histograma.acumulado():
+                le = "+Inf" if limite == float("inf") else f"{limite:g}"
+                yield f"{self.nome}_bucket{{{_rotulos(rota=rota, le=le)}}} {acumulado}"
+            yield f"{self.nome}_sum{{{_rotulos(rota=rota)}}} {histograma.soma}"
+            yield f"{self.nome}_count{{{_rotulos(rota=rota)}}} {histograma.total}"
+
+
+LATENCIA = FamiliaHistogramas(
+    "rotafacil_requisicao_segundos", "Duração das requisições HTTP por rota", BUCKETS_SEGUNDOS,
+)
+DB_CONSULTAS = FamiliaHistogramas(
+    "rotafacil_db_consultas_por_requisicao", "Consultas ao Cassandra por requisição", BUCKETS_CONSULTAS,
+)
+DB_LINHAS = FamiliaHistogramas(
+    "rotafacil_db_linhas_por_requisicao", "Linhas lidas do Cassandra por requisição", BUCKETS_LINHAS,
+)
+DB_SEGUNDOS = FamiliaHistogramas(
+    "rotafacil_db_segundos_por_requisicao", "Tempo no Cassandra por requisição", BUCKETS_SEGUNDOS,
+)
+
+FAMILIAS = [LATENCIA, DB_CONSULTAS, DB_LINHAS, DB_SEGUNDOS]
+
+# (método, rota, status) -> requisições concluídas
+REQUISICOES: Counter = Counter()
+em_andamento = 0
+
+
+def entrar() -> None:
+    global em_andamento
+    em_andamento += 1
+
+
+def sair() -> None:
+    global em_andamento
+    em_andamento -= 1
+
+
+def registrar_requisicao(
+    metodo: str, rota: str, status: int, duracao: float, consultas: int, linhas: int, tempo_db: float,
+) -> None:
+    REQUISICOES[(metodo, rota, status)] += 1
+    LATENCIA.observar(rota, duracao)
+    DB_CONSULTAS.observar(rota, consultas)
+    DB_LINHAS.observar(rota, linhas)
+    DB_SEGUNDOS.observar(rota, tempo_db)
+
+
+def _metrica(nome: str, tipo: str, descricao: str, amostras: Iterable[Tuple[str, float]]) -> Iterable[str]:
+    yield f"# HELP {nome} {descricao}"
+    yield f"# TYPE {nome} {tipo}"
+    for rotulos, valor in amostras:
+        yield f"{nome}{{{rotulos}}} {valor}" if rotulos else f"{nome} {valor}"
+
+
+def _pool() -> Dict[str, dict]:
+    try:
+        sessao = get_async_session()
+    except RuntimeError:
+        return {}
+    return {str(host.endpoint): estado for host, estado in sessao.get_pool_state().items()}
+
+
+def exportar() -> str:
+    """Todas as métricas no formato de texto do Prometheus."""
+    linhas: List[str] = []
+    linhas += _metrica(
+        "rotafacil_requisicoes_total", "counter", "Requisições HTTP concluídas",
+        ((_rotulos(metodo=metodo, rota=rota, status=status), total)
+         for (metodo, rota, status), total in list(REQUISICOES.items())),
+    )
+    linhas += _metrica(
+        "rotafacil_requisicoes_em_andamento", "gauge", "Requisições HTTP em andamento", [("", em_andamento)],
+    )
+    for familia in FAMILIAS:
+        linhas += familia.exportar()
+
+    pool = _pool()
+    linhas += _metrica(
+        "rotafacil_cassandra_conexoes_abertas", "gauge", "Conexões abertas pelo driver por host",
+        ((_rotulos(host=host), estado["open_count"]) for host, estado in pool.items()),
+    )
+    linhas += _metrica(
+        "rotafacil_cassandra_requisicoes_em_voo", "gauge", "Requisições aguardando resposta por host",
+        ((_rotulos(host=host), sum(estado["in_flights"])) for host, estado in pool.items()),
+    )
+    linhas += _metrica(
+        "rotafacil_perfil_consultas_em_uso", "gauge", "Consultas em execução por perfil de execução",
+        ((_rotulos(perfil=nome), perfil.em_uso) for nome, perfil in PERFIS.items()),
+    )
+
+    estatisticas = cache.estatisticas()
+    for chave, tipo, descricao in [
+        ("hits", "counter", "Leituras atendidas pelo cache"),
+        ("misses", "counter", "Leituras que foram ao banco"),
+        ("evictions", "counter", "Itens removidos por falta de espaço"),
+        ("itens", "gauge", "Itens no cache"),
+        ("hit_ratio", "gauge", "Fração das leituras atendidas pelo cache"),
+    ]:
+        nome = f"rotafacil_cache_{chave}_total" if tipo == "counter" else f"rotafacil_cache_{chave}"
+        linhas += _metrica(
+            nome, tipo, descricao,
+            ((_rotulos(cache=tabela), valores[chave]) for tabela, valores in estatisticas.items()),
+        )
+    return "\n".join(linhas) + "\n"
@@ -74,4 +74,113 @@ class ViagemAlunos(Model):
     aluno_id = fields.UUID(partition_key=True)
     viagem_id = fields.UUID(clustering_key=True)
     data_inscricao = fields.Timestamp(default=datetime.now)
-    status_embarque = fields.Text(default="pendente")
\ No newline at end of file
+    status_embarque = fields.Text(default="pendente")
+    # Rota da viagem, gravada na inscrição para manter alunos_por_rota sem consultar viagens
+    rota_id = fields.UUID()
+
+class AlunoPorRota(Model):
+    __table_name__ = "alunos_por_rota"
+    # Tabela desnormalizada: uma partição por rota, uma linha por (aluno, viagem) inscrito
+    rota_id = fields.UUID(partition_key=True)
+    aluno_id = fields.UUID(clustering_key=True)
+    viagem_id = fields.UUID(clustering_key=True)
+    nome_completo = fields.Text()
+    matricula = fields.Text()
+    email = fields.Text()
+    telefone = fields.Text()
+
+class AlunoPorViagem(Model):
+    __table_name__ = "alunos_por_viagem"
+    # Lista de embarque: uma partição por viagem, uma linha por aluno inscrito, com o que o
+    # motorista confere na partida
+    viagem_id = fields.UUID(partition_key=True)
+    aluno_id = fields.UUID(clustering_key=True)
+    nome_completo = fields.Text()
+    matricula = fields.Text()
+    status_embarque = fields.Text()
+    data_inscricao = fields.Timestamp()
+    rota_id = fields.UUID()
+# Tabelas de lookup: cópias das linhas de origem particionadas pelos filtros mais usados
+# nas listagens. São mantidas pelos handlers em app/*/routes.py via app/lookups.py.
+
+class ViagemPorMotorista(Model):
+    __table_name__ = "viagens_por_motorista"
+    motorista_id = fields.UUID(partition_key=True)
+    data_viagem = fields.Timestamp(clustering_key=True)
+    id = fields.UUID(clustering_key=True)
+    rota_id = fields.UUID()
+    veiculo_id = fields.UUID()
+    hora_partida = fields.Timestamp()
+    vagas_disponiveis = fields.Integer()
+    status = fields.Text()
+
+class ViagemPorVeiculo(Model):
+    __table_name__ = "viagens_por_veiculo"
+    veiculo_id = fields.UUID(partition_key=True)
+    data_viagem = fields.Timestamp(clustering_key=True)
+    id = fields.UUID(clustering_key=True)
+    rota_id = fields.UUID()
+    motorista_id = fields.UUID()
+    hora_partida = fields.Timestamp()
+    vagas_disponiveis = fields.Integer()
+    status = fields.Text()
+
+class ViagemPorStatus(Model):
+    __table_name__ = "viagens_por_status"
+    status = fields.Text(partition_key=True)
+    data_viagem = fields.Timestamp(clustering_key=True)
+    id = fields.UUID(clustering_key=True)
+    rota_id = fields.UUID()
+    veiculo_id = fields.UUID()
+    motorista_id = fields.UUID()
+    hora_partida = fields.Timestamp()
+    vagas_disponiveis = fields.Integer()
+
+class ViagemPorDia(Model):
+    __table_name__ = "viagens_por_dia"
+    # Uma partição por rota e dia (data_viagem em UTC, 'AAAA-MM-DD'): as viagens de um dia
+    # saem numa única leitura, em ordem de partida
+    rota_id = fields.UUID(partition_key=True)
+    dia = fields.Text(partition_key=True)
+    hora_partida = fields.Timestamp(clustering_key=True)
+    id = fields.UUID(clustering_key=True)
+    data_viagem = fields.Timestamp()
+    veiculo_id = fields.UUID()
+    motorista_id = fields.UUID()
+    vagas_disponiveis = fields.Integer()
+    status = fields.Text()
+
+class ViagemPorId(Model):
+    __table_name__ = "viagens_por_id"
+    # Cópia completa particionada pelo id: quem só conhece o id (inscrições, clientes)
+    # resolve a viagem numa única leitura
+    id = fields.UUID(partition_key=True)
+    data_viagem = fields.Timestamp()
+    rota_id = fields.UUID()
+    veiculo_id = fields.UUID()
+    motorista_id = fields.UUID()
+    hora_partida = fields.Timestamp()
+    vagas_disponiveis = fields.Integer()
+    status = fields.Text()
+
+class MotoristaPorCidade(Model):
+    __table_name__ = "motoristas_por_cidade"
+    endereco_cidade = fields.Text(partition_key=True)
+    id = fields.UUID(clustering_key=True)
+    nome_completo = fields.Text()
+    cpf = fields.Text()
+    cnh = fields.Text()
+    data_nascimento = fields.Timestamp()
+    telefone = fields.Text()
+    endereco_rua = fields.Text()
+    endereco_numero = fields.Text()
+    endereco_cep = fields.Text()
+    endereco_estado = fields.Text()
+
+class AlunoPorEmail(Model):
+    __table_name__ = "alunos_por_email"
+    email = fields.Text(partition_key=True)
+    id = fields.UUID(clustering_key=True)
+    nome_completo = fields.Text()
+    matricula = fields.Text()
+    telefone = fields.Text()
@@ -1,9 +1,17 @@
 from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 import uuid
 from datetime import datetime
 
-from app.models import Motorista, Viagem, Veiculo
+from app.models import Motorista, Veiculo, ViagemPorMotorista
+from app.lookups import gravar_lookups, remover_lookups, valores_de_lookup, consulta_com_lookup
+from app import cache, counters, statements
+from app.writes import atualizar_linha, carregar_para_atualizar
+from app.paging import LIMITE_MAXIMO, iterar_paginas, paginar
+from app.export import exportar_ndjson
+from app.profiles import perfil
+from app.multiget import IdsEntrada, obter_varios
 from . import schemas
 
 router = APIRouter(
@@ -13,76 +21,83 @@ router = APIRouter(
 
 @router.post("/", response_model=schemas.MotoristaOut, status_code=status.HTTP_201_CREATED)
 async def criar_motorista(motorista: schemas.MotoristaCreate):
-    novo_motorista = await Motorista.create_async(**motorista.dict())
+    novo_motorista = await statements.criar(Motorista, **motorista.dict())
+    await counters.incrementar(Motorista)
+    await gravar_lookups(novo_motorista)
     return novo_motorista
 
-@router.get("/", response_model=List[schemas.MotoristaOut])
+@router.post("/batch_get", response_model=schemas.MotoristaBatchGet)
+async def obter_motoristas_por_ids(entrada: IdsEntrada):
+    items, ausentes = await obter_varios(Motorista, entrada.ids)
+    return {"items": items, "ausentes": ausentes}
+
+@router.get("/", response_model=schemas.MotoristaPagina, dependencies=[perfil("scan")])
 async def listar_motoristas(
     cpf: Optional[str] = None,
     cidade: Optional[str] = None,
-    limit: int = Query(10, gt=0, description="O número de motoristas a serem retornados não pode ser negativo.")
+    limit: int = Query(10, gt=0, le=LIMITE_MAXIMO, description="O número de motoristas a serem retornados não pode ser negativo."),
+    cursor: Optional[str] = Query(None, description="Valor de next_cursor retornado pela página anterior.")
 ):
-    query = Motorista.all()
-    if cpf:
-        query = query.filter(cpf=cpf).allow_filtering()
-    if cidade:
-        query = query.filter(endereco_cidade=cidade).allow_filtering()
-    
-    motoristas = await query.limit(limit).all_async()
-    return motoristas
+    query = consulta_com_lookup(Motorista, {"cpf": cpf, "endereco_cidade": cidade})
+
+    return await paginar(query, limit, cursor)
 
 @router.get("/count/", response_model=int)
 async def contar_motoristas():
-    return await Motorista.all().allow_filtering().count_async()
+    return await counters.ler(Motorista)
+
+@router.get("/export", response_class=StreamingResponse, dependencies=[perfil("scan")])
+async def exportar_motoristas():
+    return exportar_ndjson(Motorista, schemas.MotoristaOut)
 
 @router.get("/{motorista_id}", response_model=schemas.MotoristaOut)
 async def obter_motorista(motorista_id: uuid.UUID):
-    try:
-        motorista = await Motorista.get_async(id=motorista_id)
-        return motorista
-    except Motorista.DoesNotExist:
+    motorista = await cache.obter_em_cache(Motorista, id=motorista_id)
+    if motorista is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Motorista não encontrado")
+    return motorista
 
 @router.put("/{motorista_id}", response_model=schemas.MotoristaOut)
 async def atualizar_motorista(motorista_id: uuid.UUID, motorista_data: schemas.MotoristaUpdate):
-    try:
-        motorista = await Motorista.get_async(id=motorista_id)
-    except Motorista.DoesNotExist:
+    motorista = await carregar_para_atualizar(Motorista, id=motorista_id)
+    if motorista is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Motorista não encontrado")
 
     update_data = motorista_data.dict(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nenhum dado fornecido para atualização")
 
-    await motorista.update_async(**update_data)
-    motorista_atualizado = await Motorista.get_async(id=motorista_id)
+    anteriores = valores_de_lookup(motorista)
+    motorista_atualizado = await atualizar_linha(motorista, update_data)
+    if motorista_atualizado is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Motorista não encontrado")
+    cache.invalidar(Motorista, id=motorista_id)
+    await gravar_lookups(motorista_atualizado, anteriores)
     return motorista_atualizado
 
 @router.delete("/{motorista_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def deletar_motorista(motorista_id: uuid.UUID):
-    try:
-        motorista = await Motorista.get_async(id=motorista_id)
-        await motorista.delete_async()
-        return {}
-    except Motorista.DoesNotExist:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Motorista não encontrado")   
+    motorista = await statements.obter(Motorista, id=motorista_id)
+    if motorista is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Motorista não encontrado")
+    await statements.remover_instancia(motorista)
+    cache.invalidar(Motorista, id=motorista_id)
+    await counters.decrementar(Motorista)
+    await remover_lookups(motorista)
+    return {}
 
-@router.get("/{motorista_id}/viagens_com_veiculo/{veiculo_id}", response_model=List[schemas.ViagemOut])
+@router.get("/{motorista_id}/viagens_com_veiculo/{veiculo_id}", response_model=List[schemas.ViagemOut], dependencies=[perfil("scan")])
 async def listar_viagens_motorista_veiculo(motorista_id: uuid.UUID, veiculo_id: uuid.UUID):
-    try:
-        await Motorista.get_async(id=motorista_id)
-    except Motorista.DoesNotExist:
+    if await cache.obter_em_cache(Motorista, id=motorista_id) is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Motorista não encontrado")
     
-    try:
-        await Veiculo.get_async(id=veiculo_id)
-    except Veiculo.DoesNotExist:
+    if await cache.obter_em_cache(Veiculo, id=veiculo_id) is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Veículo não encontrado")
 
-    viagens = await Viagem.filter(
-        motorista_id=motorista_id,
-        veiculo_id=veiculo_id,
-        data_viagem__gte=datetime.now()
-    ).allow_filtering().all_async()
-
+    # Partição do motorista em viagens_por_motorista; data_viagem é clustering, então o
+    # intervalo é lido em ordem e só o veículo é filtrado dentro da partição.
+    filtros = {"motorista_id": motorista_id, "data_viagem__gte": datetime.now(), "veiculo_id": veiculo_id}
+    viagens = []
+    async for pagina in iterar_paginas(ViagemPorMotorista, filtros, allow_filtering=True):
+        viagens.extend(pagina)
     return viagens
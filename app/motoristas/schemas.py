@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 import uuid
 from datetime import datetime
 
@@ -45,3 +45,11 @@ class ViagemOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+class MotoristaPagina(BaseModel):
+    items: List[MotoristaOut]
+    next_cursor: Optional[str] = None
+
+class MotoristaBatchGet(BaseModel):
+    items: List[Optional[MotoristaOut]]
+    ausentes: List[uuid.UUID]
@@ -0,0 +1,38 @@
+import os
+import uuid
+from typing import List, Optional, Tuple, Type
+
+from caspyorm import Model
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+from app import cache
+from app.bulk import em_paralelo
+
+# Máximo de ids aceitos por POST /{entidade}/batch_get
+BATCH_GET_MAXIMO = int(os.getenv("BATCH_GET_MAXIMO", "500"))
+# Leituras simultâneas por requisição
+BATCH_GET_CONCORRENCIA = int(os.getenv("BATCH_GET_CONCORRENCIA", "32"))
+
+
+class IdsEntrada(BaseModel):
+    ids: List[uuid.UUID]
+
+
+async def obter_varios(modelo: Type[Model], ids: List[uuid.UUID]) -> Tuple[List[Optional[Model]], List[uuid.UUID]]:
+    """Lê as entidades de `ids` pelo cache, cada id distinto uma vez.
+
+    Devolve os resultados na ordem pedida (None nos ausentes) e os ids ausentes, sem repetição.
+    """
+    if len(ids) > BATCH_GET_MAXIMO:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo de {BATCH_GET_MAXIMO} ids por requisição",
+        )
+    unicos = list(dict.fromkeys(ids))
+
+    async def obter(entidade_id: uuid.UUID) -> Optional[Model]:
+        return await cache.obter_em_cache(modelo, id=entidade_id)
+
+    encontrados = dict(zip(unicos, await em_paralelo(obter, unicos, concorrencia=BATCH_GET_CONCORRENCIA)))
+    return [encontrados[entidade_id] for entidade_id in ids], [i for i in unicos if encontrados[i] is None]
@@ -0,0 +1,154 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, status
+from caspyorm import Model
+from caspyorm._internal import query_builder
+from caspyorm.connection import get_async_session
+
+from app.database import aguardar, preparar
+from app.profiles import limitar
+
+# Maior página (fetch_size) aceita pelos endpoints de listagem
+LIMITE_MAXIMO = int(os.getenv("PAGINACAO_LIMITE_MAXIMO", "1000"))
+
+# Bytes iniciais do cursor que identificam a consulta que o gerou
+_TAMANHO_ASSINATURA = 8
+
+
+async def buscar_pagina(
+    model_cls: Type[Model],
+    filtros: Optional[Dict[str, Any]] = None,
+    fetch_size: Optional[int] = None,
+    paging_state: Optional[bytes] = None,
+    allow_filtering: bool = False,
+) -> Tuple[List[Model], Optional[bytes]]:
+    # Lê exatamente uma página do driver. O QuerySet.page_async do caspyorm itera o
+    # ResultSet além da página atual, o que dispara a busca da página seguinte e
+    # devolve um paging_state adiantado; aqui usamos apenas current_rows.
+    cql, params = query_builder.build_select_cql(
+        model_cls.__caspy_schema__,
+        filters=filtros or {},
+        allow_filtering=allow_filtering,
+    )
+    return await _executar_pagina(model_cls, cql, params, fetch_size, paging_state)
+
+
+async def _executar_pagina(
+    model_cls: Type[Model],
+    cql: str,
+    params: List[Any],
+    fetch_size: Optional[int],
+    paging_state: Optional[bytes],
+    perfil: Optional[str] = None,
+) -> Tuple[List[Model], Optional[bytes]]:
+    session = get_async_session()
+    statement = preparar(cql).bind(params)
+    async with limitar(perfil) as escolhido:
+        # Sem fetch_size explícito, vale o tamanho de página do perfil da requisição
+        statement.fetch_size = fetch_size or escolhido.fetch_size
+        future = session.execute_async(statement, paging_state=paging_state, execution_profile=escolhido.nome)
+        result_set = await aguardar(future)
+    linhas = [model_cls(**row._asdict()) for row in result_set.current_rows]
+    return linhas, result_set.paging_state
+
+
+def iterar_paginas(
+    model_cls: Type[Model],
+    filtros: Optional[Dict[str, Any]] = None,
+    fetch_size: Optional[int] = None,
+    allow_filtering: bool = False,
+) -> AsyncIterator[List[Model]]:
+    return _iterar(lambda paging_state: buscar_pagina(
+        model_cls, filtros, fetch_size, paging_state, allow_filtering
+    ))
+
+
+def cql_faixa(model_cls: Type[Model]) -> str:
+    schema = model_cls.__caspy_schema__
+    particao = ", ".join(schema["partition_keys"])
+    return (
+        f"SELECT {', '.join(model_cls.model_fields)} FROM {schema['table_name']} "
+        f"WHERE token({particao}) > ? AND token({particao}) <= ?"
+    )
+
+
+def iterar_faixa(
+    model_cls: Type[Model], inicio: int, fim: int, fetch_size: Optional[int] = None,
+) -> AsyncIterator[List[Model]]:
+    """Páginas das partições com token em (inicio, fim], no perfil de scan.
+
+    Com as faixas de counters.faixas_de_token, cada faixa é lida por uma tarefa e a tabela
+    inteira é percorrida em paralelo.
+    """
+    cql = cql_faixa(model_cls)
+    return _iterar(lambda paging_state: _executar_pagina(
+        model_cls, cql, [inicio, fim], fetch_size, paging_state, perfil="scan"
+    ))
+
+
+async def _iterar(buscar) -> AsyncIterator[List[Model]]:
+    # A próxima página já é pedida ao driver enquanto o consumidor processa a atual
+    def proxima(paging_state):
+        return asyncio.ensure_future(buscar(paging_state))
+
+    pendente = proxima(None)
+    try:
+        while True:
+            linhas, paging_state = await pendente
+            if paging_state is not None:
+                pendente = proxima(paging_state)
+            if linhas:
+                yield linhas
+            if paging_state is None:
+                break
+    finally:
+        # O consumidor pode parar antes do fim (ex.: cliente desconectou no meio do export)
+        if not pendente.done():
+            pendente.cancel()
+
+
+def _assinatura(query) -> bytes:
+    base = repr((
+        query.model_cls.__table_name__,
+        sorted((campo, str(valor)) for campo, valor in query._filters.items()),
+    ))
+    return hashlib.blake2b(base.encode(), digest_size=_TAMANHO_ASSINATURA).digest()
+
+
+def codificar_cursor(query, paging_state: Optional[bytes]) -> Optional[str]:
+    if paging_state is None:
+        return None
+    bruto = _assinatura(query) + paging_state
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(query, cursor: Optional[str]) -> Optional[bytes]:
+    # O paging_state do driver só vale para a mesma consulta; a assinatura evita que um
+    # cursor seja reaproveitado com outros filtros.
+    if not cursor:
+        return None
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    except (ValueError, binascii.Error):
+        bruto = b""
+    if len(bruto) <= _TAMANHO_ASSINATURA or bruto[:_TAMANHO_ASSINATURA] != _assinatura(query):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+    return bruto[_TAMANHO_ASSINATURA:]
+
+
+async def paginar(query, limit: int, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """Executa um QuerySet como uma página de `limit` linhas a partir de `cursor`.
+
+    O custo de cada página é o mesmo da primeira: o driver retoma a leitura do ponto
+    guardado no paging_state em vez de reler as páginas anteriores.
+    """
+    paging_state = decodificar_cursor(query, cursor)
+    items, proximo = await buscar_pagina(
+        query.model_cls, query._filters, limit, paging_state, query._allow_filtering
+    )
+    return {"items": items, "next_cursor": codificar_cursor(query, proximo)}
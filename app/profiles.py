@@ -0,0 +1,91 @@
+import asyncio
+import contextvars
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from fastapi import Depends
+
+
+class PerfilExecucao:
+    """Consistência, timeout, fetch size e limite de consultas simultâneas de uma classe de carga.
+
+    Cada perfil vira um ExecutionProfile do driver com o mesmo nome (ver app/cluster.py) e
+    tem seu próprio semáforo, então as varreduras esperam a vez entre si sem ocupar as
+    vagas das leituras por chave.
+    """
+
+    def __init__(self, nome: str, consistencia: str, timeout: float, fetch_size: int, concorrencia: int):
+        self.nome = nome
+        self.consistencia = consistencia.upper()
+        self.timeout = timeout
+        self.fetch_size = fetch_size
+        self.concorrencia = concorrencia
+        self.limite = asyncio.Semaphore(concorrencia)
+        # Consultas com vaga ocupada agora; exportado em /metrics
+        self.em_uso = 0
+
+    @classmethod
+    def do_ambiente(cls, nome: str, consistencia: str, timeout: float, fetch_size: int, concorrencia: int) -> "PerfilExecucao":
+        prefixo = f"CASSANDRA_{nome.upper()}_"
+        return cls(
+            nome,
+            os.getenv(prefixo + "CONSISTENCIA", consistencia),
+            float(os.getenv(prefixo + "TIMEOUT", str(timeout))),
+            int(os.getenv(prefixo + "FETCH_SIZE", str(fetch_size))),
+            int(os.getenv(prefixo + "CONCORRENCIA", str(concorrencia))),
+        )
+
+    def descrever(self) -> str:
+        return (
+            f"{self.nome}(consistencia={self.consistencia} timeout={self.timeout:g}s "
+            f"fetch_size={self.fetch_size} concorrencia={self.concorrencia})"
+        )
+
+
+# oltp: leituras e escritas por chave, o caminho sensível à latência.
+# scan: listagens, exportações e consultas que varrem partições grandes ou a tabela toda.
+OLTP = PerfilExecucao.do_ambiente(
+    "oltp",
+    os.getenv("CASSANDRA_CONSISTENCIA", "LOCAL_ONE"),
+    float(os.getenv("CASSANDRA_TIMEOUT_REQUISICAO", "10")),
+    fetch_size=500,
+    concorrencia=512,
+)
+SCAN = PerfilExecucao.do_ambiente("scan", "LOCAL_ONE", 60, fetch_size=1000, concorrencia=8)
+
+PERFIS = {perfil.nome: perfil for perfil in (OLTP, SCAN)}
+
+_perfil_atual: contextvars.ContextVar[PerfilExecucao] = contextvars.ContextVar("perfil_execucao", default=OLTP)
+
+
+def perfil_atual() -> PerfilExecucao:
+    return _perfil_atual.get()
+
+
+def perfil(nome: str):
+    """Dependência que declara o perfil das consultas de uma rota.
+
+    Uso: ``@router.get("/export", dependencies=[perfil("scan")])``. Rotas sem declaração
+    usam oltp.
+    """
+    escolhido = PERFIS[nome]
+
+    async def usar_perfil() -> None:
+        # Dependências async rodam no mesmo contexto do handler, então o valor vale para
+        # todas as consultas da requisição, inclusive as do corpo de um StreamingResponse.
+        _perfil_atual.set(escolhido)
+
+    return Depends(usar_perfil)
+
+
+@asynccontextmanager
+async def limitar(nome: Optional[str] = None) -> AsyncIterator[PerfilExecucao]:
+    """Ocupa uma vaga do perfil (o da requisição, se `nome` não for dado) durante uma consulta."""
+    escolhido = PERFIS[nome] if nome else perfil_atual()
+    async with escolhido.limite:
+        escolhido.em_uso += 1
+        try:
+            yield escolhido
+        finally:
+            escolhido.em_uso -= 1
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import random
+from typing import Optional
+
+from app import statements
+from app.database import executar_cql
+from app.lookups import atualizar_vagas_por_id
+from app.models import Viagem, ViagemAlunos
+
+logger = logging.getLogger(__name__)
+
+# Tentativas de compare-and-set antes de desistir quando muitos pedidos disputam a mesma viagem
+MAX_TENTATIVAS = 64
+
+CQL_AJUSTAR_VAGAS = (
+    "UPDATE viagens SET vagas_disponiveis = ? "
+    "WHERE data_viagem = ? AND id = ? AND rota_id = ? IF vagas_disponiveis = ?"
+)
+CQL_CANCELAR = "DELETE FROM viagem_alunos WHERE aluno_id = ? AND viagem_id = ? IF EXISTS"
+CQL_INSCREVER = (
+    "INSERT INTO viagem_alunos (aluno_id, viagem_id, data_inscricao, status_embarque, rota_id) "
+    "VALUES (?, ?, ?, ?, ?) IF NOT EXISTS"
+)
+
+
+class ViagemLotada(Exception):
+    pass
+
+
+class InscricaoDuplicada(Exception):
+    pass
+
+
+class VagasNaoReservadas(Exception):
+    """A disputa pela viagem não terminou dentro de MAX_TENTATIVAS."""
+
+
+class ViagemNaoEncontrada(Exception):
+    pass
+
+
+async def _ler_viagem(viagem: Viagem) -> Viagem:
+    atual = await statements.obter(Viagem, data_viagem=viagem.data_viagem, id=viagem.id, rota_id=viagem.rota_id)
+    if atual is None:
+        raise ViagemNaoEncontrada(f"Viagem {viagem.id} não encontrada")
+    return atual
+
+
+async def _ajustar_vagas(viagem: Viagem, quantidade: int) -> int:
+    """Soma `quantidade` (negativa para reservar) a vagas_disponiveis com LWT.
+
+    Cada tentativa é um compare-and-set sobre o valor lido; quando outro pedido vence, a
+    resposta do LWT já traz o valor atual e a próxima tentativa parte dele. Ao reservar,
+    aplica só o que couber e devolve quantas vagas foram efetivamente movidas.
+    """
+    atual = viagem.vagas_disponiveis
+    for tentativa in range(MAX_TENTATIVAS):
+        if atual is None:
+            # A cópia lida ou a resposta do LWT vêm sem valor também quando a linha de viagens
+            # não existe; só uma viagem existente sem capacidade definida dispensa o controle
+            atual = (await _ler_viagem(viagem)).vagas_disponiveis
+            if atual is None:
+                return abs(quantidade)
+        delta = max(quantidade, -atual)
+        if delta == 0:
+            return 0
+        resultado = await executar_cql(
+            CQL_AJUSTAR_VAGAS,
+            [atual + delta, viagem.data_viagem, viagem.id, viagem.rota_id, atual],
+        )
+        if resultado.was_applied:
+            viagem.vagas_disponiveis = atual + delta
+            return abs(delta)
+        atual = getattr(resultado.one(), "vagas_disponiveis", None)
+        # Espalha os pedidos que perderam a disputa para reduzir a contenção no Paxos
+        await asyncio.sleep(random.uniform(0, 0.002 * min(tentativa + 1, 10)))
+    raise VagasNaoReservadas(f"Não foi possível ajustar as vagas da viagem {viagem.id}")
+
+
+async def _propagar_vagas(viagem: Viagem) -> None:
+    # Sem reler a viagem: o valor é o que o compare-and-set acabou de gravar
+    try:
+        await atualizar_vagas_por_id(viagem)
+    except Exception:
+        logger.warning("Falha ao copiar vagas da viagem %s para viagens_por_id", viagem.id, exc_info=True)
+
+
+async def reservar_vagas(viagem: Viagem, quantidade: int = 1) -> int:
+    """Reserva até `quantidade` vagas e devolve quantas foram obtidas (0 se lotada).
+
+    Um timeout do LWT pode ter sido aplicado mesmo assim; a nova tentativa então desconta
+    de novo. O erro possível é sobrar vaga, nunca vender acima da capacidade.
+    """
+    reservadas = await _ajustar_vagas(viagem, -quantidade)
+    if reservadas:
+        await _propagar_vagas(viagem)
+    return reservadas
+
+
+async def liberar_vagas(viagem: Viagem, quantidade: int = 1) -> None:
+    try:
+        await _ajustar_vagas(viagem, quantidade)
+    except Exception:
+        logger.exception("Falha ao devolver %d vaga(s) da viagem %s", quantidade, viagem.id)
+        return
+    await _propagar_vagas(viagem)
+
+
+async def gravar_inscricao(inscricao: ViagemAlunos) -> bool:
+    """INSERT ... IF NOT EXISTS da inscrição; devolve False se o aluno já estava inscrito."""
+    resultado = await executar_cql(CQL_INSCREVER, [
+        inscricao.aluno_id, inscricao.viagem_id, inscricao.data_inscricao,
+        inscricao.status_embarque, inscricao.rota_id,
+    ])
+    return resultado.was_applied
+
+
+async def inscrever(viagem: Viagem, inscricao: ViagemAlunos) -> ViagemAlunos:
+    """Reserva uma vaga e grava a inscrição com INSERT ... IF NOT EXISTS.
+
+    A vaga é reservada antes da inscrição: com a viagem lotada nada é gravado. Se o aluno
+    já estava inscrito, a vaga é devolvida. Levanta ViagemLotada, InscricaoDuplicada ou
+    ViagemNaoEncontrada.
+    """
+    if not await reservar_vagas(viagem):
+        raise ViagemLotada(f"Viagem {viagem.id} sem vagas disponíveis")
+    # Se o INSERT falhar (ex.: timeout) a inscrição pode ter sido gravada, então a vaga
+    # fica reservada: devolvê-la poderia vender acima da capacidade.
+    if not await gravar_inscricao(inscricao):
+        await liberar_vagas(viagem)
+        raise InscricaoDuplicada(f"Aluno {inscricao.aluno_id} já inscrito na viagem {viagem.id}")
+    return inscricao
+
+
+async def cancelar_inscricao(viagem: Optional[Viagem], inscricao: ViagemAlunos) -> bool:
+    # O IF EXISTS garante que dois DELETEs concorrentes da mesma inscrição devolvam uma vaga só
+    resultado = await executar_cql(CQL_CANCELAR, [inscricao.aluno_id, inscricao.viagem_id])
+    if not resultado.was_applied:
+        return False
+    if viagem is not None:
+        await liberar_vagas(viagem)
+    return True
@@ -1,9 +1,15 @@
 from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 import uuid
-import asyncio
 
-from app.models import Rota, Viagem, ViagemAlunos, Aluno
+from app.models import Rota, AlunoPorRota
+from app import cache, counters, statements
+from app.writes import atualizar_linha, carregar_para_atualizar
+from app.paging import LIMITE_MAXIMO, paginar
+from app.export import exportar_ndjson
+from app.profiles import perfil
+from app.multiget import IdsEntrada, obter_varios
 from . import schemas
 from app.alunos.schemas import AlunoOut
 
@@ -14,15 +20,22 @@ router = APIRouter(
 
 @router.post("/", response_model=schemas.RotaOut, status_code=status.HTTP_201_CREATED)
 async def criar_rota(rota: schemas.RotaCreate):
-    nova_rota = await Rota.create_async(**rota.dict())
+    nova_rota = await statements.criar(Rota, **rota.dict())
+    await counters.incrementar(Rota)
     return nova_rota
 
-@router.get("/", response_model=List[schemas.RotaOut])
+@router.post("/batch_get", response_model=schemas.RotaBatchGet)
+async def obter_rotas_por_ids(entrada: IdsEntrada):
+    items, ausentes = await obter_varios(Rota, entrada.ids)
+    return {"items": items, "ausentes": ausentes}
+
+@router.get("/", response_model=schemas.RotaPagina, dependencies=[perfil("scan")])
 async def listar_rotas(
     nome: Optional[str] = None,
     origem: Optional[str] = None,
     destino: Optional[str] = None,
-    limit: int = Query(10, gt=0, description="O número de rotas a serem retornadas não pode ser negativo.")
+    limit: int = Query(10, gt=0, le=LIMITE_MAXIMO, description="O número de rotas a serem retornadas não pode ser negativo."),
+    cursor: Optional[str] = Query(None, description="Valor de next_cursor retornado pela página anterior.")
 ):
     query = Rota.all()
     if nome:
@@ -32,66 +45,65 @@ async def listar_rotas(
     if destino:
         query = query.filter(destino=destino).allow_filtering()
     
-    rotas = await query.limit(limit).all_async()
-    return rotas
+    return await paginar(query, limit, cursor)
 
 @router.get("/count/", response_model=int)
 async def contar_rotas():
-    return await Rota.all().allow_filtering().count_async()
+    return await counters.ler(Rota)
+
+@router.get("/export", response_class=StreamingResponse, dependencies=[perfil("scan")])
+async def exportar_rotas():
+    return exportar_ndjson(Rota, schemas.RotaOut)
 
 @router.get("/{rota_id}", response_model=schemas.RotaOut)
 async def obter_rota(rota_id: uuid.UUID):
-    try:
-        rota = await Rota.get_async(id=rota_id)
-        return rota
-    except Rota.DoesNotExist:
+    rota = await cache.obter_em_cache(Rota, id=rota_id)
+    if rota is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rota não encontrada")
+    return rota
 
 @router.put("/{rota_id}", response_model=schemas.RotaOut)
 async def atualizar_rota(rota_id: uuid.UUID, rota_data: schemas.RotaUpdate):
-    try:
-        rota = await Rota.get_async(id=rota_id)
-    except Rota.DoesNotExist:
+    rota = await carregar_para_atualizar(Rota, id=rota_id)
+    if rota is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rota não encontrada")
 
     update_data = rota_data.dict(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nenhum dado fornecido para atualização")
 
-    await rota.update_async(**update_data)
-    rota_atualizada = await Rota.get_async(id=rota_id)
+    rota_atualizada = await atualizar_linha(rota, update_data)
+    if rota_atualizada is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rota não encontrada")
+    cache.invalidar(Rota, id=rota_id)
     return rota_atualizada
 
 @router.delete("/{rota_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def deletar_rota(rota_id: uuid.UUID):
-    try:
-        rota = await Rota.get_async(id=rota_id)
-        await rota.delete_async()
-        return {}
-    except Rota.DoesNotExist:
+    rota = await statements.obter(Rota, id=rota_id)
+    if rota is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rota não encontrada")
+    await statements.remover_instancia(rota)
+    cache.invalidar(Rota, id=rota_id)
+    await counters.decrementar(Rota)
+    return {}
 
 # CONSULTA COMPLEXA 1: Listar todos os alunos de uma rota específica    
-@router.get("/{rota_id}/alunos", response_model=List[AlunoOut])
+@router.get("/{rota_id}/alunos", response_model=List[AlunoOut], dependencies=[perfil("scan")])
 async def listar_alunos_na_rota(rota_id: uuid.UUID):
-    viagens = await Viagem.filter(rota_id=rota_id).all_async()
-    if not viagens:
-        return []
+    # Uma única leitura na partição da rota em alunos_por_rota; o aluno aparece uma vez
+    # por viagem em que está inscrito, então removemos as repetições aqui.
+    linhas = await statements.listar_particao(AlunoPorRota, rota_id=rota_id)
 
-    viagem_ids = [v.id for v in viagens]
-    
-    tasks_viagem_alunos = [ViagemAlunos.filter(viagem_id=vid).all_async() for vid in viagem_ids]
-    resultados_inscricoes = await asyncio.gather(*tasks_viagem_alunos)
+    alunos = {}
+    for linha in linhas:
+        if linha.aluno_id not in alunos:
+            alunos[linha.aluno_id] = {
+                "id": linha.aluno_id,
+                "nome_completo": linha.nome_completo,
+                "matricula": linha.matricula,
+                "email": linha.email,
+                "telefone": linha.telefone,
+            }
 
-    aluno_ids = set()
-    for inscricoes in resultados_inscricoes:
-        for inscricao in inscricoes:
-            aluno_ids.add(inscricao.aluno_id)
-
-    if not aluno_ids:
-        return []
-
-    tasks_alunos = [Aluno.get_async(id=aid) for aid in aluno_ids]
-    alunos = await asyncio.gather(*tasks_alunos)
-    
-    return [aluno for aluno in alunos if aluno is not None]
+    return list(alunos.values())
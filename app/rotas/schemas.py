@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import uuid
 
 # Schema base para Rota
@@ -28,3 +28,11 @@ class RotaOut(RotaBase):
 
     class Config:
         orm_mode = True
+
+class RotaPagina(BaseModel):
+    items: List[RotaOut]
+    next_cursor: Optional[str] = None
+
+class RotaBatchGet(BaseModel):
+    items: List[Optional[RotaOut]]
+    ausentes: List[uuid.UUID]
@@ -18,13 +18,13 @@ class AdminUpdate(BaseModel):
 
 @router.post("/", response_model=PydanticAdmin, status_code=201)
 async def criar_admin(admin: PydanticAdminCreate):
-    logger.info(f"Recebida solicitação para criar admin: {admin.nome}")
+    logger.info("Recebida solicitação para criar admin: %s", admin.nome)
     try:
         novo_admin = await Admin.create_async(**admin.dict())
-        logger.info(f"Admin {admin.nome} criado com sucesso com ID: {novo_admin.id}")
+        logger.info("Admin %s criado com sucesso com ID: %s", admin.nome, novo_admin.id)
         return novo_admin
     except Exception as e:
-        logger.error(f"Erro ao criar admin {admin.nome}: {e}", exc_info=True)
+        logger.error("Erro ao criar admin %s: %s", admin.nome, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao criar o admin.")
 
 @router.get("/", response_model=List[PydanticAdmin])
@@ -42,10 +42,10 @@ async def listar_admins(
             query = query.filter(nivel_permissao=nivel_permissao).allow_filtering()
         
         admins = await query.limit(limit).all_async()
-        logger.info(f"{len(admins)} admins listados com sucesso")
+        logger.info("%s admins listados com sucesso", len(admins))
         return admins
     except Exception as e:
-        logger.error(f"Erro ao listar admins: {e}", exc_info=True)
+        logger.error("Erro ao listar admins: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao listar os admins.")
 
 @router.get("/count/", response_model=int)
@@ -53,33 +53,33 @@ async def contar_admins():
     logger.info("Recebida solicitação para contar admins")
     try:
         count = await Admin.all().allow_filtering().count_async()
-        logger.info(f"Total de admins: {count}")
+        logger.info("Total de admins: %s", count)
         return count
     except Exception as e:
-        logger.error(f"Erro ao contar admins: {e}", exc_info=True)
+        logger.error("Erro ao contar admins: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao contar os admins.")
 
 @router.get("/{admin_id}", response_model=PydanticAdmin)
 async def obter_admin(admin_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para obter admin com ID: {admin_id}")
+    logger.info("Recebida solicitação para obter admin com ID: %s", admin_id)
     try:
         admin = await Admin.get_async(id=admin_id)
         if not admin:
-            logger.warning(f"Admin com ID {admin_id} não encontrado")
+            logger.warning("Admin com ID %s não encontrado", admin_id)
             raise HTTPException(status_code=404, detail="Admin não encontrado")
-        logger.info(f"Admin {admin.nome} com ID {admin_id} obtido com sucesso")
+        logger.info("Admin %s com ID %s obtido com sucesso", admin.nome, admin_id)
         return admin
     except Exception as e:
-        logger.error(f"Erro ao obter admin com ID {admin_id}: {e}", exc_info=True)
+        logger.error("Erro ao obter admin com ID %s: %s", admin_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao obter o admin.")
 
 @router.put("/{admin_id}", response_model=PydanticAdmin)
 async def atualizar_admin(admin_id: uuid.UUID, admin_data: AdminUpdate):
-    logger.info(f"Recebida solicitação para atualizar admin com ID: {admin_id}")
+    logger.info("Recebida solicitação para atualizar admin com ID: %s", admin_id)
     try:
         admin = await Admin.get_async(id=admin_id)
         if not admin:
-            logger.warning(f"Admin com ID {admin_id} não encontrado para atualização")
+            logger.warning("Admin com ID %s não encontrado para atualização", admin_id)
             raise HTTPException(status_code=404, detail="Admin não encontrado")
 
         update_data = admin_data.dict(exclude_unset=True)
@@ -87,24 +87,24 @@ async def atualizar_admin(admin_id: uuid.UUID, admin_data: AdminUpdate):
             raise HTTPException(status_code=400, detail="Nenhum dado fornecido para atualização")
 
         await admin.update_async(**update_data)
-        logger.info(f"Admin com ID {admin_id} atualizado com sucesso")
+        logger.info("Admin com ID %s atualizado com sucesso", admin_id)
         return admin
     except Exception as e:
-        logger.error(f"Erro ao atualizar admin com ID {admin_id}: {e}", exc_info=True)
+        logger.error("Erro ao atualizar admin com ID %s: %s", admin_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao atualizar o admin.")
 
 @router.delete("/{admin_id}", status_code=204)
 async def deletar_admin(admin_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para deletar admin com ID: {admin_id}")
+    logger.info("Recebida solicitação para deletar admin com ID: %s", admin_id)
     try:
         admin = await Admin.get_async(id=admin_id)
         if not admin:
-            logger.warning(f"Admin com ID {admin_id} não encontrado para deleção")
+            logger.warning("Admin com ID %s não encontrado para deleção", admin_id)
             raise HTTPException(status_code=404, detail="Admin não encontrado")
 
         await admin.delete_async()
-        logger.info(f"Admin com ID {admin_id} deletado com sucesso")
+        logger.info("Admin com ID %s deletado com sucesso", admin_id)
         return {}
     except Exception as e:
-        logger.error(f"Erro ao deletar admin com ID {admin_id}: {e}", exc_info=True)
+        logger.error("Erro ao deletar admin com ID %s: %s", admin_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao deletar o admin.")
\ No newline at end of file
@@ -18,13 +18,13 @@ class AlunoUpdate(BaseModel):
 
 @router.post("/", response_model=PydanticAluno, status_code=201)
 async def criar_aluno(aluno: PydanticAlunoCreate):
-    logger.info(f"Recebida solicitação para criar aluno: {aluno.nome_completo}")
+    logger.info("Recebida solicitação para criar aluno: %s", aluno.nome_completo)
     try:
         novo_aluno = await Aluno.create_async(**aluno.dict())
-        logger.info(f"Aluno {aluno.nome_completo} criado com sucesso com ID: {novo_aluno.id}")
+        logger.info("Aluno %s criado com sucesso com ID: %s", aluno.nome_completo, novo_aluno.id)
         return novo_aluno
     except Exception as e:
-        logger.error(f"Erro ao criar aluno {aluno.nome_completo}: {e}", exc_info=True)
+        logger.error("Erro ao criar aluno %s: %s", aluno.nome_completo, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao criar o aluno.")
 
 @router.get("/", response_model=List[PydanticAluno])
@@ -45,10 +45,10 @@ async def listar_alunos(
             query = query.filter(email=email).allow_filtering()
 
         alunos = await query.limit(limit).all_async()
-        logger.info(f"{len(alunos)} alunos listados com sucesso")
+        logger.info("%s alunos listados com sucesso", len(alunos))
         return alunos
     except Exception as e:
-        logger.error(f"Erro ao listar alunos: {e}", exc_info=True)
+        logger.error("Erro ao listar alunos: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao listar os alunos.")
 
 @router.get("/count/", response_model=int)
@@ -56,33 +56,33 @@ async def contar_alunos():
     logger.info("Recebida solicitação para contar alunos")
     try:
         count = await Aluno.all().allow_filtering().count_async()
-        logger.info(f"Total de alunos: {count}")
+        logger.info("Total de alunos: %s", count)
         return count
     except Exception as e:
-        logger.error(f"Erro ao contar alunos: {e}", exc_info=True)
+        logger.error("Erro ao contar alunos: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao contar os alunos.")
 
 @router.get("/{aluno_id}", response_model=PydanticAluno)
 async def obter_aluno(aluno_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para obter aluno com ID: {aluno_id}")
+    logger.info("Recebida solicitação para obter aluno com ID: %s", aluno_id)
     try:
         aluno = await Aluno.get_async(id=aluno_id)
         if not aluno:
-            logger.warning(f"Aluno com ID {aluno_id} não encontrado")
+            logger.warning("Aluno com ID %s não encontrado", aluno_id)
             raise HTTPException(status_code=404, detail="Aluno não encontrado")
-        logger.info(f"Aluno {aluno.nome_completo} com ID {aluno_id} obtido com sucesso")
+        logger.info("Aluno %s com ID %s obtido com sucesso", aluno.nome_completo, aluno_id)
         return aluno
     except Exception as e:
-        logger.error(f"Erro ao obter aluno com ID {aluno_id}: {e}", exc_info=True)
+        logger.error("Erro ao obter aluno com ID %s: %s", aluno_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao obter o aluno.")
 
 @router.put("/{aluno_id}", response_model=PydanticAluno)
 async def atualizar_aluno(aluno_id: uuid.UUID, aluno_data: AlunoUpdate):
-    logger.info(f"Recebida solicitação para atualizar aluno com ID: {aluno_id}")
+    logger.info("Recebida solicitação para atualizar aluno com ID: %s", aluno_id)
     try:
         aluno = await Aluno.get_async(id=aluno_id)
         if not aluno:
-            logger.warning(f"Aluno com ID {aluno_id} não encontrado para atualização")
+            logger.warning("Aluno com ID %s não encontrado para atualização", aluno_id)
             raise HTTPException(status_code=404, detail="Aluno não encontrado")
 
         update_data = aluno_data.dict(exclude_unset=True)
@@ -90,24 +90,24 @@ async def atualizar_aluno(aluno_id: uuid.UUID, aluno_data: AlunoUpdate):
             raise HTTPException(status_code=400, detail="Nenhum dado fornecido para atualização")
 
         await aluno.update_async(**update_data)
-        logger.info(f"Aluno com ID {aluno_id} atualizado com sucesso")
+        logger.info("Aluno com ID %s atualizado com sucesso", aluno_id)
         return aluno
     except Exception as e:
-        logger.error(f"Erro ao atualizar aluno com ID {aluno_id}: {e}", exc_info=True)
+        logger.error("Erro ao atualizar aluno com ID %s: %s", aluno_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao atualizar o aluno.")
 
 @router.delete("/{aluno_id}", status_code=204)
 async def deletar_aluno(aluno_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para deletar aluno com ID: {aluno_id}")
+    logger.info("Recebida solicitação para deletar aluno com ID: %s", aluno_id)
     try:
         aluno = await Aluno.get_async(id=aluno_id)
         if not aluno:
-            logger.warning(f"Aluno com ID {aluno_id} não encontrado para deleção")
+            logger.warning("Aluno com ID %s não encontrado para deleção", aluno_id)
             raise HTTPException(status_code=404, detail="Aluno não encontrado")
 
         await aluno.delete_async()
-        logger.info(f"Aluno com ID {aluno_id} deletado com sucesso")
+        logger.info("Aluno com ID %s deletado com sucesso", aluno_id)
         return {}
     except Exception as e:
-        logger.error(f"Erro ao deletar aluno com ID {aluno_id}: {e}", exc_info=True)
+        logger.error("Erro ao deletar aluno com ID %s: %s", aluno_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao deletar o aluno.")
\ No newline at end of file
@@ -25,13 +25,13 @@ class MotoristaUpdate(BaseModel):
 
 @router.post("/", response_model=PydanticMotorista, status_code=201)
 async def criar_motorista(motorista: PydanticMotoristaCreate):
-    logger.info(f"Recebida solicitação para criar motorista: {motorista.nome_completo}")
+    logger.info("Recebida solicitação para criar motorista: %s", motorista.nome_completo)
     try:
         novo_motorista = await Motorista.create_async(**motorista.dict())
-        logger.info(f"Motorista {motorista.nome_completo} criado com sucesso com ID: {novo_motorista.id}")
+        logger.info("Motorista %s criado com sucesso com ID: %s", motorista.nome_completo, novo_motorista.id)
         return novo_motorista
     except Exception as e:
-        logger.error(f"Erro ao criar motorista {motorista.nome_completo}: {e}", exc_info=True)
+        logger.error("Erro ao criar motorista %s: %s", motorista.nome_completo, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao criar o motorista.")
 
 @router.get("/", response_model=List[PydanticMotorista])
@@ -49,10 +49,10 @@ async def listar_motoristas(
             query = query.filter(endereco_cidade=cidade).allow_filtering()
         
         motoristas = await query.limit(limit).all_async()
-        logger.info(f"{len(motoristas)} motoristas listados com sucesso")
+        logger.info("%s motoristas listados com sucesso", len(motoristas))
         return motoristas
     except Exception as e:
-        logger.error(f"Erro ao listar motoristas: {e}", exc_info=True)
+        logger.error("Erro ao listar motoristas: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao listar os motoristas.")
 
 @router.get("/count/", response_model=int)
@@ -60,33 +60,33 @@ async def contar_motoristas():
     logger.info("Recebida solicitação para contar motoristas")
     try:
         count = await Motorista.all().allow_filtering().count_async()
-        logger.info(f"Total de motoristas: {count}")
+        logger.info("Total de motoristas: %s", count)
         return count
     except Exception as e:
-        logger.error(f"Erro ao contar motoristas: {e}", exc_info=True)
+        logger.error("Erro ao contar motoristas: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao contar os motoristas.")
 
 @router.get("/{motorista_id}", response_model=PydanticMotorista)
 async def obter_motorista(motorista_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para obter motorista com ID: {motorista_id}")
+    logger.info("Recebida solicitação para obter motorista com ID: %s", motorista_id)
     try:
         motorista = await Motorista.get_async(id=motorista_id)
         if not motorista:
-            logger.warning(f"Motorista com ID {motorista_id} não encontrado")
+            logger.warning("Motorista com ID %s não encontrado", motorista_id)
             raise HTTPException(status_code=404, detail="Motorista não encontrado")
-        logger.info(f"Motorista {motorista.nome_completo} com ID {motorista_id} obtido com sucesso")
+        logger.info("Motorista %s com ID %s obtido com sucesso", motorista.nome_completo, motorista_id)
         return motorista
     except Exception as e:
-        logger.error(f"Erro ao obter motorista com ID {motorista_id}: {e}", exc_info=True)
+        logger.error("Erro ao obter motorista com ID %s: %s", motorista_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao obter o motorista.")
 
 @router.put("/{motorista_id}", response_model=PydanticMotorista)
 async def atualizar_motorista(motorista_id: uuid.UUID, motorista_data: MotoristaUpdate):
-    logger.info(f"Recebida solicitação para atualizar motorista com ID: {motorista_id}")
+    logger.info("Recebida solicitação para atualizar motorista com ID: %s", motorista_id)
     try:
         motorista = await Motorista.get_async(id=motorista_id)
         if not motorista:
-            logger.warning(f"Motorista com ID {motorista_id} não encontrado para atualização")
+            logger.warning("Motorista com ID %s não encontrado para atualização", motorista_id)
             raise HTTPException(status_code=404, detail="Motorista não encontrado")
 
         update_data = motorista_data.dict(exclude_unset=True)
@@ -94,31 +94,31 @@ async def atualizar_motorista(motorista_id: uuid.UUID, motorista_data: Motorista
             raise HTTPException(status_code=400, detail="Nenhum dado fornecido para atualização")
 
         await motorista.update_async(**update_data)
-        logger.info(f"Motorista com ID {motorista_id} atualizado com sucesso")
+        logger.info("Motorista com ID %s atualizado com sucesso", motorista_id)
         return motorista
     except Exception as e:
-        logger.error(f"Erro ao atualizar motorista com ID {motorista_id}: {e}", exc_info=True)
+        logger.error("Erro ao atualizar motorista com ID %s: %s", motorista_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao atualizar o motorista.")
 
 @router.delete("/{motorista_id}", status_code=204)
 async def deletar_motorista(motorista_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para deletar motorista com ID: {motorista_id}")
+    logger.info("Recebida solicitação para deletar motorista com ID: %s", motorista_id)
     try:
         motorista = await Motorista.get_async(id=motorista_id)
         if not motorista:
-            logger.warning(f"Motorista com ID {motorista_id} não encontrado para deleção")
+            logger.warning("Motorista com ID %s não encontrado para deleção", motorista_id)
             raise HTTPException(status_code=404, detail="Motorista não encontrado")
 
         await motorista.delete_async()
-        logger.info(f"Motorista com ID {motorista_id} deletado com sucesso")
+        logger.info("Motorista com ID %s deletado com sucesso", motorista_id)
         return {}
     except Exception as e:
-        logger.error(f"Erro ao deletar motorista com ID {motorista_id}: {e}", exc_info=True)
+        logger.error("Erro ao deletar motorista com ID %s: %s", motorista_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao deletar o motorista.")
 
 @router.get("/{motorista_id}/viagens_com_veiculo/{veiculo_id}", response_model=List[PydanticViagem])
 async def listar_viagens_motorista_veiculo(motorista_id: uuid.UUID, veiculo_id: uuid.UUID):
-    logger.info(f"Listando viagens para o motorista {motorista_id} com o veículo {veiculo_id}")
+    logger.info("Listando viagens para o motorista %s com o veículo %s", motorista_id, veiculo_id)
     try:
         motorista = await Motorista.get_async(id=motorista_id)
         if not motorista:
@@ -134,8 +134,8 @@ async def listar_viagens_motorista_veiculo(motorista_id: uuid.UUID, veiculo_id:
             hora_partida__gte=datetime.now()
         ).allow_filtering().all_async()
 
-        logger.info(f"{len(viagens)} viagens encontradas.")
+        logger.info("%s viagens encontradas.", len(viagens))
         return viagens
     except Exception as e:
-        logger.error(f"Erro ao listar viagens: {e}", exc_info=True)
+        logger.error("Erro ao listar viagens: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro ao processar a solicitação")
\ No newline at end of file
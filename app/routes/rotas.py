@@ -23,13 +23,13 @@ class RotaUpdate(BaseModel):
 
 @router.post("/", response_model=PydanticRota, status_code=201)
 async def criar_rota(rota: PydanticRotaCreate):
-    logger.info(f"Recebida solicitação para criar rota: {rota.nome}")
+    logger.info("Recebida solicitação para criar rota: %s", rota.nome)
     try:
         nova_rota = await Rota.create_async(**rota.dict())
-        logger.info(f"Rota {rota.nome} criada com sucesso com ID: {nova_rota.id}")
+        logger.info("Rota %s criada com sucesso com ID: %s", rota.nome, nova_rota.id)
         return nova_rota
     except Exception as e:
-        logger.error(f"Erro ao criar rota {rota.nome}: {e}", exc_info=True)
+        logger.error("Erro ao criar rota %s: %s", rota.nome, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao criar a rota.")
 
 @router.get("/", response_model=List[PydanticRota])
@@ -50,10 +50,10 @@ async def listar_rotas(
             query = query.filter(destino=destino).allow_filtering()
         
         rotas = await query.limit(limit).all_async()
-        logger.info(f"{len(rotas)} rotas listadas com sucesso")
+        logger.info("%s rotas listadas com sucesso", len(rotas))
         return rotas
     except Exception as e:
-        logger.error(f"Erro ao listar rotas: {e}", exc_info=True)
+        logger.error("Erro ao listar rotas: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao listar as rotas.")
 
 @router.get("/count/", response_model=int)
@@ -61,33 +61,33 @@ async def contar_rotas():
     logger.info("Recebida solicitação para contar rotas")
     try:
         count = await Rota.all().allow_filtering().count_async()
-        logger.info(f"Total de rotas: {count}")
+        logger.info("Total de rotas: %s", count)
         return count
     except Exception as e:
-        logger.error(f"Erro ao contar rotas: {e}", exc_info=True)
+        logger.error("Erro ao contar rotas: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao contar as rotas.")
 
 @router.get("/{rota_id}", response_model=PydanticRota)
 async def obter_rota(rota_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para obter rota com ID: {rota_id}")
+    logger.info("Recebida solicitação para obter rota com ID: %s", rota_id)
     try:
         rota = await Rota.get_async(id=rota_id)
         if not rota:
-            logger.warning(f"Rota com ID {rota_id} não encontrada")
+            logger.warning("Rota com ID %s não encontrada", rota_id)
             raise HTTPException(status_code=404, detail="Rota não encontrada")
-        logger.info(f"Rota {rota.nome} com ID {rota_id} obtida com sucesso")
+        logger.info("Rota %s com ID %s obtida com sucesso", rota.nome, rota_id)
         return rota
     except Exception as e:
-        logger.error(f"Erro ao obter rota com ID {rota_id}: {e}", exc_info=True)
+        logger.error("Erro ao obter rota com ID %s: %s", rota_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao obter a rota.")
 
 @router.put("/{rota_id}", response_model=PydanticRota)
 async def atualizar_rota(rota_id: uuid.UUID, rota_data: RotaUpdate):
-    logger.info(f"Recebida solicitação para atualizar rota com ID: {rota_id}")
+    logger.info("Recebida solicitação para atualizar rota com ID: %s", rota_id)
     try:
         rota = await Rota.get_async(id=rota_id)
         if not rota:
-            logger.warning(f"Rota com ID {rota_id} não encontrada para atualização")
+            logger.warning("Rota com ID %s não encontrada para atualização", rota_id)
             raise HTTPException(status_code=404, detail="Rota não encontrada")
 
         update_data = rota_data.dict(exclude_unset=True)
@@ -95,31 +95,31 @@ async def atualizar_rota(rota_id: uuid.UUID, rota_data: RotaUpdate):
             raise HTTPException(status_code=400, detail="Nenhum dado fornecido para atualização")
 
         await rota.update_async(**update_data)
-        logger.info(f"Rota com ID {rota_id} atualizada com sucesso")
+        logger.info("Rota com ID %s atualizada com sucesso", rota_id)
         return rota
     except Exception as e:
-        logger.error(f"Erro ao atualizar rota com ID {rota_id}: {e}", exc_info=True)
+        logger.error("Erro ao atualizar rota com ID %s: %s", rota_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao atualizar a rota.")
 
 @router.delete("/{rota_id}", status_code=204)
 async def deletar_rota(rota_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para deletar rota com ID: {rota_id}")
+    logger.info("Recebida solicitação para deletar rota com ID: %s", rota_id)
     try:
         rota = await Rota.get_async(id=rota_id)
         if not rota:
-            logger.warning(f"Rota com ID {rota_id} não encontrada para deleção")
+            logger.warning("Rota com ID %s não encontrada para deleção", rota_id)
             raise HTTPException(status_code=404, detail="Rota não encontrada")
 
         await rota.delete_async()
-        logger.info(f"Rota com ID {rota_id} deletada com sucesso")
+        logger.info("Rota com ID %s deletada com sucesso", rota_id)
         return {}
     except Exception as e:
-        logger.error(f"Erro ao deletar rota com ID {rota_id}: {e}", exc_info=True)
+        logger.error("Erro ao deletar rota com ID %s: %s", rota_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao deletar a rota.")
 
 @router.get("/{rota_id}/alunos", response_model=List[PydanticAluno])
 async def listar_alunos_na_rota(rota_id: uuid.UUID):
-    logger.info(f"Listando alunos para a rota {rota_id}")
+    logger.info("Listando alunos para a rota %s", rota_id)
     try:
         viagens = await Viagem.filter(rota_id=rota_id).all_async()
         if not viagens:
@@ -142,8 +142,8 @@ async def listar_alunos_na_rota(rota_id: uuid.UUID):
         alunos_result = await asyncio.gather(*tasks_alunos)
 
         alunos_finais = [aluno for aluno in alunos_result if aluno is not None]
-        logger.info(f"{len(alunos_finais)} alunos encontrados para a rota {rota_id}")
+        logger.info("%s alunos encontrados para a rota %s", len(alunos_finais), rota_id)
         return alunos_finais
     except Exception as e:
-        logger.error(f"Erro ao listar alunos da rota {rota_id}: {e}", exc_info=True)
+        logger.error("Erro ao listar alunos da rota %s: %s", rota_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro ao processar a solicitação")
\ No newline at end of file
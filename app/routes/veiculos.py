@@ -19,13 +19,13 @@ class VeiculoUpdate(BaseModel):
 
 @router.post("/", response_model=PydanticVeiculo, status_code=201)
 async def criar_veiculo(veiculo: PydanticVeiculoCreate):
-    logger.info(f"Recebida solicitação para criar veículo: {veiculo.placa}")
+    logger.info("Recebida solicitação para criar veículo: %s", veiculo.placa)
     try:
         novo_veiculo = await Veiculo.create_async(**veiculo.dict())
-        logger.info(f"Veículo {veiculo.placa} criado com sucesso com ID: {novo_veiculo.id}")
+        logger.info("Veículo %s criado com sucesso com ID: %s", veiculo.placa, novo_veiculo.id)
         return novo_veiculo
     except Exception as e:
-        logger.error(f"Erro ao criar veículo {veiculo.placa}: {e}", exc_info=True)
+        logger.error("Erro ao criar veículo %s: %s", veiculo.placa, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao criar o veículo.")
 
 @router.get("/", response_model=List[PydanticVeiculo])
@@ -43,10 +43,10 @@ async def listar_veiculos(
             query = query.filter(modelo=modelo).allow_filtering()
         
         veiculos = await query.limit(limit).all_async()
-        logger.info(f"{len(veiculos)} veículos listados com sucesso")
+        logger.info("%s veículos listados com sucesso", len(veiculos))
         return veiculos
     except Exception as e:
-        logger.error(f"Erro ao listar veículos: {e}", exc_info=True)
+        logger.error("Erro ao listar veículos: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao listar os veículos.")
 
 @router.get("/count/", response_model=int)
@@ -54,33 +54,33 @@ async def contar_veiculos():
     logger.info("Recebida solicitação para contar veículos")
     try:
         count = await Veiculo.all().allow_filtering().count_async()
-        logger.info(f"Total de veículos: {count}")
+        logger.info("Total de veículos: %s", count)
         return count
     except Exception as e:
-        logger.error(f"Erro ao contar veículos: {e}", exc_info=True)
+        logger.error("Erro ao contar veículos: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao contar os veículos.")
 
 @router.get("/{veiculo_id}", response_model=PydanticVeiculo)
 async def obter_veiculo(veiculo_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para obter veículo com ID: {veiculo_id}")
+    logger.info("Recebida solicitação para obter veículo com ID: %s", veiculo_id)
     try:
         veiculo = await Veiculo.get_async(id=veiculo_id)
         if not veiculo:
-            logger.warning(f"Veículo com ID {veiculo_id} não encontrado")
+            logger.warning("Veículo com ID %s não encontrado", veiculo_id)
             raise HTTPException(status_code=404, detail="Veículo não encontrado")
-        logger.info(f"Veículo {veiculo.placa} com ID {veiculo_id} obtido com sucesso")
+        logger.info("Veículo %s com ID %s obtido com sucesso", veiculo.placa, veiculo_id)
         return veiculo
     except Exception as e:
-        logger.error(f"Erro ao obter veículo com ID {veiculo_id}: {e}", exc_info=True)
+        logger.error("Erro ao obter veículo com ID %s: %s", veiculo_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao obter o veículo.")
 
 @router.put("/{veiculo_id}", response_model=PydanticVeiculo)
 async def atualizar_veiculo(veiculo_id: uuid.UUID, veiculo_data: VeiculoUpdate):
-    logger.info(f"Recebida solicitação para atualizar veículo com ID: {veiculo_id}")
+    logger.info("Recebida solicitação para atualizar veículo com ID: %s", veiculo_id)
     try:
         veiculo = await Veiculo.get_async(id=veiculo_id)
         if not veiculo:
-            logger.warning(f"Veículo com ID {veiculo_id} não encontrado para atualização")
+            logger.warning("Veículo com ID %s não encontrado para atualização", veiculo_id)
             raise HTTPException(status_code=404, detail="Veículo não encontrado")
 
         update_data = veiculo_data.dict(exclude_unset=True)
@@ -88,24 +88,24 @@ async def atualizar_veiculo(veiculo_id: uuid.UUID, veiculo_data: VeiculoUpdate):
             raise HTTPException(status_code=400, detail="Nenhum dado fornecido para atualização")
 
         await veiculo.update_async(**update_data)
-        logger.info(f"Veículo com ID {veiculo_id} atualizado com sucesso")
+        logger.info("Veículo com ID %s atualizado com sucesso", veiculo_id)
         return veiculo
     except Exception as e:
-        logger.error(f"Erro ao atualizar veículo com ID {veiculo_id}: {e}", exc_info=True)
+        logger.error("Erro ao atualizar veículo com ID %s: %s", veiculo_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao atualizar o veículo.")
 
 @router.delete("/{veiculo_id}", status_code=204)
 async def deletar_veiculo(veiculo_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para deletar veículo com ID: {veiculo_id}")
+    logger.info("Recebida solicitação para deletar veículo com ID: %s", veiculo_id)
     try:
         veiculo = await Veiculo.get_async(id=veiculo_id)
         if not veiculo:
-            logger.warning(f"Veículo com ID {veiculo_id} não encontrado para deleção")
+            logger.warning("Veículo com ID %s não encontrado para deleção", veiculo_id)
             raise HTTPException(status_code=404, detail="Veículo não encontrado")
 
         await veiculo.delete_async()
-        logger.info(f"Veículo com ID {veiculo_id} deletado com sucesso")
+        logger.info("Veículo com ID %s deletado com sucesso", veiculo_id)
         return {}
     except Exception as e:
-        logger.error(f"Erro ao deletar veículo com ID {veiculo_id}: {e}", exc_info=True)
+        logger.error("Erro ao deletar veículo com ID %s: %s", veiculo_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao deletar o veículo.")
\ No newline at end of file
@@ -17,13 +17,13 @@ class ViagemAlunosUpdate(BaseModel):
 
 @router.post("/", response_model=PydanticViagemAlunos, status_code=201)
 async def criar_viagem_aluno(viagem_aluno: PydanticViagemAlunosCreate):
-    logger.info(f"Recebida solicitação para criar inscrição de aluno em viagem: {viagem_aluno}")
+    logger.info("Recebida solicitação para criar inscrição de aluno em viagem: %s", viagem_aluno)
     try:
         nova_inscricao = await ViagemAlunos.create_async(**viagem_aluno.dict())
-        logger.info(f"Inscrição de aluno em viagem criada com sucesso: {nova_inscricao}")
+        logger.info("Inscrição de aluno em viagem criada com sucesso: %s", nova_inscricao)
         return nova_inscricao
     except Exception as e:
-        logger.error(f"Erro ao criar inscrição de aluno em viagem: {e}", exc_info=True)
+        logger.error("Erro ao criar inscrição de aluno em viagem: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao criar a inscrição.")
 
 @router.get("/", response_model=List[PydanticViagemAlunos])
@@ -44,10 +44,10 @@ async def listar_viagem_alunos(
             query = query.filter(status_embarque=status_embarque).allow_filtering()
         
         inscricoes = await query.limit(limit).all_async()
-        logger.info(f"{len(inscricoes)} inscrições listadas com sucesso")
+        logger.info("%s inscrições listadas com sucesso", len(inscricoes))
         return inscricoes
     except Exception as e:
-        logger.error(f"Erro ao listar inscrições: {e}", exc_info=True)
+        logger.error("Erro ao listar inscrições: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao listar as inscrições.")
 
 @router.get("/count/", response_model=int)
@@ -55,24 +55,24 @@ async def contar_viagem_alunos():
     logger.info("Recebida solicitação para contar inscrições de alunos em viagens")
     try:
         count = await ViagemAlunos.all().allow_filtering().count_async()
-        logger.info(f"Total de inscrições: {count}")
+        logger.info("Total de inscrições: %s", count)
         return count
     except Exception as e:
-        logger.error(f"Erro ao contar inscrições: {e}", exc_info=True)
+        logger.error("Erro ao contar inscrições: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao contar as inscrições.")
 
 @router.get("/{viagem_id}/{aluno_id}", response_model=PydanticViagemAlunos)
 async def obter_viagem_aluno(viagem_id: uuid.UUID, aluno_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para obter inscrição com viagem ID {viagem_id} e aluno ID {aluno_id}")
+    logger.info("Recebida solicitação para obter inscrição com viagem ID %s e aluno ID %s", viagem_id, aluno_id)
     try:
         viagem_aluno = await ViagemAlunos.get_async(viagem_id=viagem_id, aluno_id=aluno_id)
         if not viagem_aluno:
-            logger.warning(f"Inscrição com viagem ID {viagem_id} e aluno ID {aluno_id} não encontrada")
+            logger.warning("Inscrição com viagem ID %s e aluno ID %s não encontrada", viagem_id, aluno_id)
             raise HTTPException(status_code=404, detail="Inscrição não encontrada")
-        logger.info(f"Inscrição obtida com sucesso: {viagem_aluno}")
+        logger.info("Inscrição obtida com sucesso: %s", viagem_aluno)
         return viagem_aluno
     except Exception as e:
-        logger.error(f"Erro ao obter inscrição: {e}", exc_info=True)
+        logger.error("Erro ao obter inscrição: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao obter a inscrição.")
 
 @router.put("/{viagem_id}/{aluno_id}", response_model=PydanticViagemAlunos)
@@ -81,11 +81,11 @@ async def atualizar_viagem_aluno(
     aluno_id: uuid.UUID, 
     viagem_aluno_data: ViagemAlunosUpdate
 ):
-    logger.info(f"Recebida solicitação para atualizar inscrição com viagem ID {viagem_id} e aluno ID {aluno_id}")
+    logger.info("Recebida solicitação para atualizar inscrição com viagem ID %s e aluno ID %s", viagem_id, aluno_id)
     try:
         viagem_aluno = await ViagemAlunos.get_async(viagem_id=viagem_id, aluno_id=aluno_id)
         if not viagem_aluno:
-            logger.warning(f"Inscrição com viagem ID {viagem_id} e aluno ID {aluno_id} não encontrada para atualização")
+            logger.warning("Inscrição com viagem ID %s e aluno ID %s não encontrada para atualização", viagem_id, aluno_id)
             raise HTTPException(status_code=404, detail="Inscrição não encontrada")
 
         update_data = viagem_aluno_data.dict(exclude_unset=True)
@@ -93,24 +93,24 @@ async def atualizar_viagem_aluno(
             raise HTTPException(status_code=400, detail="Nenhum dado fornecido para atualização")
 
         await viagem_aluno.update_async(**update_data)
-        logger.info(f"Inscrição atualizada com sucesso: {viagem_aluno}")
+        logger.info("Inscrição atualizada com sucesso: %s", viagem_aluno)
         return viagem_aluno
     except Exception as e:
-        logger.error(f"Erro ao atualizar inscrição: {e}", exc_info=True)
+        logger.error("Erro ao atualizar inscrição: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao atualizar a inscrição.")
 
 @router.delete("/{viagem_id}/{aluno_id}", status_code=204)
 async def deletar_viagem_aluno(viagem_id: uuid.UUID, aluno_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para deletar inscrição com viagem ID {viagem_id} e aluno ID {aluno_id}")
+    logger.info("Recebida solicitação para deletar inscrição com viagem ID %s e aluno ID %s", viagem_id, aluno_id)
     try:
         viagem_aluno = await ViagemAlunos.get_async(viagem_id=viagem_id, aluno_id=aluno_id)
         if not viagem_aluno:
-            logger.warning(f"Inscrição com viagem ID {viagem_id} e aluno ID {aluno_id} não encontrada para deleção")
+            logger.warning("Inscrição com viagem ID %s e aluno ID %s não encontrada para deleção", viagem_id, aluno_id)
             raise HTTPException(status_code=404, detail="Inscrição não encontrada")
 
         await viagem_aluno.delete_async()
-        logger.info(f"Inscrição deletada com sucesso")
+        logger.info("Inscrição deletada com sucesso")
         return {}
     except Exception as e:
-        logger.error(f"Erro ao deletar inscrição: {e}", exc_info=True)
+        logger.error("Erro ao deletar inscrição: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao deletar a inscrição.")
\ No newline at end of file
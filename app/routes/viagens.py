@@ -22,13 +22,13 @@ class ViagemUpdate(BaseModel):
 
 @router.post("/", response_model=PydanticViagem, status_code=201)
 async def criar_viagem(viagem: PydanticViagemCreate):
-    logger.info(f"Recebida solicitação para criar viagem: {viagem}")
+    logger.info("Recebida solicitação para criar viagem: %s", viagem)
     try:
         nova_viagem = await Viagem.create_async(**viagem.dict())
-        logger.info(f"Viagem criada com sucesso com ID: {nova_viagem.id}")
+        logger.info("Viagem criada com sucesso com ID: %s", nova_viagem.id)
         return nova_viagem
     except Exception as e:
-        logger.error(f"Erro ao criar viagem: {e}", exc_info=True)
+        logger.error("Erro ao criar viagem: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao criar a viagem.")
 
 @router.get("/", response_model=List[PydanticViagem])
@@ -52,10 +52,10 @@ async def listar_viagens(
             query = query.filter(status=status).allow_filtering()
         
         viagens = await query.limit(limit).all_async()
-        logger.info(f"{len(viagens)} viagens listadas com sucesso")
+        logger.info("%s viagens listadas com sucesso", len(viagens))
         return viagens
     except Exception as e:
-        logger.error(f"Erro ao listar viagens: {e}", exc_info=True)
+        logger.error("Erro ao listar viagens: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao listar as viagens.")
 
 @router.get("/count/", response_model=int)
@@ -63,24 +63,24 @@ async def contar_viagens():
     logger.info("Recebida solicitação para contar viagens")
     try:
         count = await Viagem.all().allow_filtering().count_async()
-        logger.info(f"Total de viagens: {count}")
+        logger.info("Total de viagens: %s", count)
         return count
     except Exception as e:
-        logger.error(f"Erro ao contar viagens: {e}", exc_info=True)
+        logger.error("Erro ao contar viagens: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao contar as viagens.")
 
 @router.get("/{rota_id}/{data_viagem}/{viagem_id}", response_model=PydanticViagem)
 async def obter_viagem(rota_id: uuid.UUID, data_viagem: datetime, viagem_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para obter viagem com ID {viagem_id}")
+    logger.info("Recebida solicitação para obter viagem com ID %s", viagem_id)
     try:
         viagem = await Viagem.get_async(rota_id=rota_id, data_viagem=data_viagem, id=viagem_id)
         if not viagem:
-            logger.warning(f"Viagem com ID {viagem_id} não encontrada")
+            logger.warning("Viagem com ID %s não encontrada", viagem_id)
             raise HTTPException(status_code=404, detail="Viagem não encontrada")
-        logger.info(f"Viagem obtida com sucesso: {viagem}")
+        logger.info("Viagem obtida com sucesso: %s", viagem)
         return viagem
     except Exception as e:
-        logger.error(f"Erro ao obter viagem: {e}", exc_info=True)
+        logger.error("Erro ao obter viagem: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao obter a viagem.")
 
 @router.put("/{rota_id}/{data_viagem}/{viagem_id}", response_model=PydanticViagem)
@@ -90,11 +90,11 @@ async def atualizar_viagem(
     viagem_id: uuid.UUID, 
     viagem_data: ViagemUpdate
 ):
-    logger.info(f"Recebida solicitação para atualizar viagem com ID {viagem_id}")
+    logger.info("Recebida solicitação para atualizar viagem com ID %s", viagem_id)
     try:
         viagem = await Viagem.get_async(rota_id=rota_id, data_viagem=data_viagem, id=viagem_id)
         if not viagem:
-            logger.warning(f"Viagem com ID {viagem_id} não encontrada para atualização")
+            logger.warning("Viagem com ID %s não encontrada para atualização", viagem_id)
             raise HTTPException(status_code=404, detail="Viagem não encontrada")
 
         update_data = viagem_data.dict(exclude_unset=True)
@@ -102,24 +102,24 @@ async def atualizar_viagem(
             raise HTTPException(status_code=400, detail="Nenhum dado fornecido para atualização")
 
         await viagem.update_async(**update_data)
-        logger.info(f"Viagem atualizada com sucesso: {viagem}")
+        logger.info("Viagem atualizada com sucesso: %s", viagem)
         return viagem
     except Exception as e:
-        logger.error(f"Erro ao atualizar viagem: {e}", exc_info=True)
+        logger.error("Erro ao atualizar viagem: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao atualizar a viagem.")
 
 @router.delete("/{rota_id}/{data_viagem}/{viagem_id}", status_code=204)
 async def deletar_viagem(rota_id: uuid.UUID, data_viagem: datetime, viagem_id: uuid.UUID):
-    logger.info(f"Recebida solicitação para deletar viagem com ID {viagem_id}")
+    logger.info("Recebida solicitação para deletar viagem com ID %s", viagem_id)
     try:
         viagem = await Viagem.get_async(rota_id=rota_id, data_viagem=data_viagem, id=viagem_id)
         if not viagem:
-            logger.warning(f"Viagem com ID {viagem_id} não encontrada para deleção")
+            logger.warning("Viagem com ID %s não encontrada para deleção", viagem_id)
             raise HTTPException(status_code=404, detail="Viagem não encontrada")
 
         await viagem.delete_async()
-        logger.info(f"Viagem deletada com sucesso")
+        logger.info("Viagem deletada com sucesso")
         return {}
     except Exception as e:
-        logger.error(f"Erro ao deletar viagem: {e}", exc_info=True)
+        logger.error("Erro ao deletar viagem: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro interno ao deletar a viagem.")
\ No newline at end of file
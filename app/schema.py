@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime
+from typing import List, Optional, Type
+
+from caspyorm import Model
+from caspyorm.connection import get_async_session
+from cassandra import InvalidRequest
+
+from app.counters import CQL_CRIAR_TABELA as CQL_CRIAR_CONTADORES, criar_tabela_contadores
+from app.database import executar_cql, executar_ddl
+from app.models import (
+    Rota, Veiculo, Motorista, Aluno, Admin, Viagem, ViagemAlunos, AlunoPorRota, AlunoPorViagem,
+    ViagemPorMotorista, ViagemPorVeiculo, ViagemPorStatus, ViagemPorDia, ViagemPorId, MotoristaPorCidade, AlunoPorEmail,
+)
+
+logger = logging.getLogger(__name__)
+
+# Tabelas sincronizadas a partir de app/models.py
+MODELOS: List[Type[Model]] = [
+    Rota, Veiculo, Motorista, Aluno, Admin, Viagem, ViagemAlunos, AlunoPorRota, AlunoPorViagem,
+    ViagemPorMotorista, ViagemPorVeiculo, ViagemPorStatus, ViagemPorDia, ViagemPorId, MotoristaPorCidade, AlunoPorEmail,
+]
+
+# Com INICIALIZACAO_RAPIDA=1 o startup só compara a impressão digital do schema com a
+# versão gravada pela última migração e pula a sincronização quando elas batem.
+INICIALIZACAO_RAPIDA = os.getenv("INICIALIZACAO_RAPIDA", "0").lower() in ("1", "true")
+
+# Tabelas sincronizadas ao mesmo tempo; DDL demais em paralelo atrasa o acordo de schema
+MIGRACAO_CONCORRENCIA = int(os.getenv("MIGRACAO_CONCORRENCIA", "4"))
+# Segundos: validade do lock (libera sozinho se o processo morrer), intervalo entre
+# tentativas de quem espera e tempo máximo aguardando o acordo de schema entre os nós
+MIGRACAO_LOCK_TTL = int(os.getenv("MIGRACAO_LOCK_TTL", "300"))
+MIGRACAO_ESPERA = float(os.getenv("MIGRACAO_ESPERA", "2"))
+MIGRACAO_ACORDO_TIMEOUT = float(os.getenv("MIGRACAO_ACORDO_TIMEOUT", "60"))
+
+CQL_CRIAR_TABELA = (
+    "CREATE TABLE IF NOT EXISTS schema_versao ("
+    "id text PRIMARY KEY, impressao text, aplicada_em timestamp)"
+)
+CQL_LER_VERSAO = "SELECT impressao FROM schema_versao WHERE id = 'app'"
+CQL_GRAVAR_VERSAO = "INSERT INTO schema_versao (id, impressao, aplicada_em) VALUES ('app', ?, ?)"
+
+CQL_CRIAR_LOCK = (
+    "CREATE TABLE IF NOT EXISTS migracao_lock ("
+    "id text PRIMARY KEY, dono text, adquirido_em timestamp)"
+)
+CQL_ADQUIRIR_LOCK = (
+    "INSERT INTO migracao_lock (id, dono, adquirido_em) VALUES ('schema', ?, ?) "
+    "IF NOT EXISTS USING TTL ?"
+)
+CQL_RENOVAR_LOCK = (
+    "UPDATE migracao_lock USING TTL ? SET dono = ?, adquirido_em = ? WHERE id = 'schema' IF dono = ?"
+)
+CQL_LIBERAR_LOCK = "DELETE FROM migracao_lock WHERE id = 'schema' IF dono = ?"
+CQL_TABELA_EXISTE = "SELECT table_name FROM system_schema.tables WHERE keyspace_name = ? AND table_name = ?"
+
+
+def impressao_digital() -> str:
+    """Hash do schema declarado: tabelas, colunas e tipos, chaves, índices e a DDL manual.
+
+    Vem do schema que o caspyorm extrai dos modelos, não do texto de app/models.py, então
+    comentários e defaults dos campos não mudam a impressão.
+    """
+    tabelas = []
+    for modelo in MODELOS:
+        schema = modelo.__caspy_schema__
+        tabelas.append({
+            "tabela": schema["table_name"],
+            "colunas": {nome: campo["type"] for nome, campo in schema["fields"].items()},
+            "particao": schema["partition_keys"],
+            "clustering": schema["clustering_keys"],
+            "indices": sorted(schema.get("indexes", [])),
+        })
+    base = json.dumps({"tabelas": tabelas, "ddl": [CQL_CRIAR_CONTADORES]}, sort_keys=True)
+    return hashlib.sha256(base.encode()).hexdigest()
+
+
+async def versao_aplicada() -> Optional[str]:
+    try:
+        linha = (await executar_cql(CQL_LER_VERSAO)).one()
+    except InvalidRequest:
+        # Keyspace ainda sem a tabela de versão: nenhuma migração rodou
+        return None
+    return linha.impressao if linha else None
+
+
+async def atualizado() -> bool:
+    return await versao_aplicada() == impressao_digital()
+
+
+async def aguardar_acordo() -> None:
+    """Espera todos os nós reportarem a mesma versão de schema."""
+    control = get_async_session().cluster.control_connection
+    # wait_for_schema_agreement consulta system.peers de forma síncrona
+    if not await asyncio.to_thread(control.wait_for_schema_agreement, wait_time=MIGRACAO_ACORDO_TIMEOUT):
+        raise RuntimeError(f"Sem acordo de schema entre os nós após {MIGRACAO_ACORDO_TIMEOUT:g}s")
+
+
+async def _sincronizar_tabelas() -> None:
+    # O sync_table do caspyorm é síncrono (consulta system_schema e aplica a DDL com
+    # session.execute); cada tabela roda numa thread para não travar o event loop e não
+    # serializar as tabelas, que são independentes entre si.
+    limite = asyncio.Semaphore(MIGRACAO_CONCORRENCIA)
+
+    async def sincronizar(modelo: Type[Model]) -> None:
+        async with limite:
+            await asyncio.to_thread(modelo.sync_table, auto_apply=True, verbose=False)
+
+    await asyncio.gather(*[sincronizar(modelo) for modelo in MODELOS])
+    await _criar_indices()
+    await criar_tabela_contadores()
+    await executar_ddl(CQL_CRIAR_TABELA)
+
+
+async def _criar_indices() -> None:
+    # O sync_table procura index=True nos campos, mas o caspyorm guarda os índices
+    # em schema["indexes"]; sem isso eles nunca seriam criados. Nomes iguais aos do caspyorm.
+    for modelo in MODELOS:
+        schema = modelo.__caspy_schema__
+        for campo in schema.get("indexes", []):
+            tabela = schema["table_name"]
+            await executar_ddl(f"CREATE INDEX IF NOT EXISTS {tabela}_{campo}_idx ON {tabela} ({campo})")
+
+
+async def criar_tabela_lock() -> None:
+    """Cria a tabela do lock de migração; roda em `manage.py migrar`, num único processo."""
+    await executar_ddl(CQL_CRIAR_LOCK)
+    await aguardar_acordo()
+
+
+async def _tabela_lock_existe() -> bool:
+    linhas = await executar_cql(CQL_TABELA_EXISTE, [get_async_session().keyspace, "migracao_lock"])
+    return linhas.one() is not None
+
+
+async def _adquirir_lock(dono: str) -> bool:
+    resultado = await executar_cql(CQL_ADQUIRIR_LOCK, [dono, datetime.utcnow(), MIGRACAO_LOCK_TTL])
+    return resultado.was_applied
+
+
+async def _renovar_lock(dono: str) -> None:
+    # Renova o TTL a cada terço da validade enquanto a DDL roda, para que uma migração longa
+    # não deixe o lock expirar e outro processo comece a aplicar DDL junto
+    while True:
+        await asyncio.sleep(MIGRACAO_LOCK_TTL / 3)
+        try:
+            resultado = await executar_cql(CQL_RENOVAR_LOCK, [MIGRACAO_LOCK_TTL, dono, datetime.utcnow(), dono])
+        except Exception:
+            logger.exception("Falha ao renovar o lock de migração; nova tentativa no próximo intervalo")
+            continue
+        if not resultado.was_applied:
+            logger.error("O lock de migração expirou durante a sincronização e não pertence mais a este processo")
+            return
+
+
+async def _liberar_lock(dono: str) -> None:
+    try:
+        await executar_cql(CQL_LIBERAR_LOCK, [dono])
+    except Exception:
+        logger.exception("Falha ao liberar o lock de migração; ele expira em %ds", MIGRACAO_LOCK_TTL)
+
+
+async def aplicar(forcar: bool = False) -> bool:
+    """Sincroniza o schema sob um lock do cluster e grava a versão aplicada.
+
+    Só um processo aplica DDL por vez: os demais esperam o lock e, se quem o detinha já
+    deixou o schema na versão atual, terminam sem sincronizar. Sem `forcar`, também não
+    sincroniza quando a versão gravada já bate. Devolve se sincronizou.
+    """
+    if not await _tabela_lock_existe():
+        # Só num keyspace onde 'manage.py migrar' ainda não rodou; nos demais boots nenhum
+        # processo faz DDL antes de ter o lock
+        logger.warning("Tabela migracao_lock ausente; criando no startup. Rode 'python manage.py migrar' no deploy.")
+        await criar_tabela_lock()
+    dono = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    while not await _adquirir_lock(dono):
+        logger.info("Migração em andamento em outro processo; aguardando o lock")
+        await asyncio.sleep(MIGRACAO_ESPERA)
+        if await atualizado():
+            await aguardar_acordo()
+            return False
+    try:
+        if not forcar and await atualizado():
+            return False
+        renovacao = asyncio.create_task(_renovar_lock(dono))
+        try:
+            await _sincronizar_tabelas()
+            impressao = impressao_digital()
+            await executar_cql(CQL_GRAVAR_VERSAO, [impressao, datetime.utcnow()])
+            await aguardar_acordo()
+        finally:
+            renovacao.cancel()
+        logger.info("Schema aplicado (versão %s)", impressao[:12])
+        return True
+    finally:
+        await _liberar_lock(dono)
+
+
+async def preparar_no_startup() -> bool:
+    """Aplica o schema no boot, ou só confere a versão no modo rápido. Devolve se aplicou."""
+    if INICIALIZACAO_RAPIDA:
+        if await atualizado():
+            logger.info("Schema já está na versão %s; sincronização ignorada", impressao_digital()[:12])
+            return False
+        logger.warning(
+            "Schema diferente da última migração; sincronizando no startup. "
+            "Rode 'python manage.py migrar' no deploy para evitar isso."
+        )
+        return await aplicar()
+    return await aplicar(forcar=True)
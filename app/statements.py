@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Type
+
+from caspyorm import Model
+from caspyorm._internal import query_builder
+from cassandra.query import UNSET_VALUE
+
+from app.database import executar_cql, preparar
+from app.paging import iterar_paginas
+from app.models import (
+    Rota, Veiculo, Motorista, Aluno, Admin, Viagem, ViagemAlunos, AlunoPorRota, AlunoPorViagem,
+    ViagemPorMotorista, ViagemPorVeiculo, ViagemPorStatus, ViagemPorDia, ViagemPorId, MotoristaPorCidade, AlunoPorEmail,
+)
+
+logger = logging.getLogger(__name__)
+
+# Entidades servidas pelos handlers: leitura, inserção, atualização e remoção por chave
+ENTIDADES: List[Type[Model]] = [Rota, Veiculo, Motorista, Aluno, Admin, Viagem, ViagemAlunos]
+
+# Tabelas derivadas, escritas junto com a origem: só inserção e remoção por chave
+DERIVADAS: List[Type[Model]] = [
+    AlunoPorRota, AlunoPorViagem, ViagemPorMotorista, ViagemPorVeiculo, ViagemPorStatus, ViagemPorDia, ViagemPorId,
+    MotoristaPorCidade, AlunoPorEmail,
+]
+
+# Tabelas lidas por partição inteira (lookups, desnormalizadas e inscrições de um aluno)
+PARTICOES: List[Type[Model]] = DERIVADAS + [ViagemAlunos]
+
+
+def _onde_pk(modelo: Type[Model]) -> str:
+    return " AND ".join(f"{pk} = ?" for pk in modelo.__caspy_schema__["primary_keys"])
+
+
+def _nao_pk(modelo: Type[Model]) -> List[str]:
+    pks = modelo.__caspy_schema__["primary_keys"]
+    return [campo for campo in modelo.model_fields if campo not in pks]
+
+
+@lru_cache(maxsize=None)
+def cql_obter(modelo: Type[Model]) -> str:
+    colunas = ", ".join(modelo.model_fields)
+    return f"SELECT {colunas} FROM {modelo.__table_name__} WHERE {_onde_pk(modelo)}"
+
+
+@lru_cache(maxsize=None)
+def cql_inserir(modelo: Type[Model], condicional: bool = False) -> str:
+    # Mesmo texto usado pelo save_async do caspyorm e pela criação em lote
+    cql = query_builder.build_insert_cql(modelo.__caspy_schema__)
+    return cql + " IF NOT EXISTS" if condicional else cql
+
+
+@lru_cache(maxsize=None)
+def cql_atualizar(modelo: Type[Model], condicional: bool = False) -> str:
+    # Um único UPDATE com todas as colunas: as que não mudam são enviadas como UNSET_VALUE
+    # e ficam intactas, então qualquer combinação de campos usa o mesmo statement.
+    atribuicoes = ", ".join(f"{campo} = ?" for campo in _nao_pk(modelo))
+    cql = f"UPDATE {modelo.__table_name__} SET {atribuicoes} WHERE {_onde_pk(modelo)}"
+    return cql + " IF EXISTS" if condicional else cql
+
+
+@lru_cache(maxsize=None)
+def cql_remover(modelo: Type[Model]) -> str:
+    return f"DELETE FROM {modelo.__table_name__} WHERE {_onde_pk(modelo)}"
+
+
+@lru_cache(maxsize=None)
+def cql_remover_particao(modelo: Type[Model]) -> str:
+    onde = " AND ".join(f"{pk} = ?" for pk in modelo.__caspy_schema__["partition_keys"])
+    return f"DELETE FROM {modelo.__table_name__} WHERE {onde}"
+
+
+def cql_particao(modelo: Type[Model]) -> str:
+    # Mesmo texto gerado por buscar_pagina/QuerySet para um filtro só pela partição
+    filtros = {chave: None for chave in modelo.__caspy_schema__["partition_keys"]}
+    cql, _ = query_builder.build_select_cql(modelo.__caspy_schema__, filters=filtros)
+    return cql
+
+
+def _valores_pk(modelo: Type[Model], pk: Dict[str, Any]) -> List[Any]:
+    return [pk[campo] for campo in modelo.__caspy_schema__["primary_keys"]]
+
+
+async def obter(modelo: Type[Model], /, **pk: Any) -> Optional[Model]:
+    linha = (await executar_cql(cql_obter(modelo), _valores_pk(modelo, pk))).one()
+    return modelo(**linha._asdict()) if linha else None
+
+
+async def listar_particao(modelo: Type[Model], **particao: Any) -> List[Model]:
+    linhas = []
+    async for pagina in iterar_paginas(modelo, particao):
+        linhas.extend(pagina)
+    return linhas
+
+
+async def inserir(instancia: Model, condicional: bool = False) -> bool:
+    """INSERT da instância. Devolve se foi aplicado (sempre True sem IF NOT EXISTS)."""
+    modelo = type(instancia)
+    if any(getattr(instancia, pk) is None for pk in modelo.__caspy_schema__["primary_keys"]):
+        raise ValueError(f"Chave primária ausente em {modelo.__name__}")
+    resultado = await executar_cql(cql_inserir(modelo, condicional), list(instancia.model_dump().values()))
+    return resultado.was_applied if condicional else True
+
+
+async def criar(modelo: Type[Model], /, **dados: Any) -> Model:
+    instancia = modelo(**dados)
+    await inserir(instancia)
+    return instancia
+
+
+async def criar_se_ausente(modelo: Type[Model], /, **dados: Any) -> Optional[Model]:
+    """INSERT ... IF NOT EXISTS; devolve None se a chave já existia."""
+    instancia = modelo(**dados)
+    return instancia if await inserir(instancia, condicional=True) else None
+
+
+async def atualizar(modelo: Type[Model], pk: Dict[str, Any], alteracoes: Dict[str, Any], condicional: bool = False) -> bool:
+    """UPDATE por chave primária das colunas em `alteracoes`. Devolve se foi aplicado (sempre True sem IF EXISTS)."""
+    valores = [alteracoes.get(campo, UNSET_VALUE) for campo in _nao_pk(modelo)]
+    resultado = await executar_cql(cql_atualizar(modelo, condicional), valores + _valores_pk(modelo, pk))
+    return resultado.was_applied if condicional else True
+
+
+async def remover(modelo: Type[Model], /, **pk: Any) -> None:
+    await executar_cql(cql_remover(modelo), _valores_pk(modelo, pk))
+
+
+async def remover_particao(modelo: Type[Model], /, **particao: Any) -> None:
+    await executar_cql(
+        cql_remover_particao(modelo), [particao[campo] for campo in modelo.__caspy_schema__["partition_keys"]]
+    )
+
+
+async def remover_instancia(instancia: Model) -> None:
+    schema = instancia.__caspy_schema__
+    await remover(type(instancia), **{campo: getattr(instancia, campo) for campo in schema["primary_keys"]})
+
+
+def _statements() -> List[str]:
+    cqls = []
+    for modelo in ENTIDADES:
+        cqls += [
+            cql_obter(modelo), cql_inserir(modelo), cql_remover(modelo),
+            cql_atualizar(modelo), cql_atualizar(modelo, True),
+        ]
+    for modelo in DERIVADAS:
+        cqls += [cql_inserir(modelo), cql_remover(modelo)]
+    cqls += [cql_particao(modelo) for modelo in PARTICOES]
+    return cqls
+
+
+async def aquecer() -> int:
+    """Prepara no startup os statements quentes, antes da primeira requisição."""
+    cqls = _statements()
+    # session.prepare é síncrono; prepará-los numa thread evita travar o event loop
+    await asyncio.gather(*[asyncio.to_thread(preparar, cql) for cql in cqls])
+    logger.info("%d prepared statements aquecidos", len(cqls))
+    return len(cqls)
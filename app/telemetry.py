@@ -0,0 +1,78 @@
+import contextvars
+import threading
+import time
+from typing import Optional
+
+
+class ContextoRequisicao:
+    """Identificador e idas ao banco (consultas, linhas, tempo) da requisição em andamento."""
+
+    __slots__ = ("id", "consultas", "linhas", "tempo_db", "_trava")
+
+    def __init__(self, id: str):
+        self.id = id
+        self.consultas = 0
+        self.linhas = 0
+        self.tempo_db = 0.0
+        # As respostas chegam nas threads do driver, possivelmente em paralelo
+        self._trava = threading.Lock()
+
+    def registrar_consulta(self) -> None:
+        with self._trava:
+            self.consultas += 1
+
+    def registrar_resposta(self, linhas: int, duracao: float) -> None:
+        with self._trava:
+            self.linhas += linhas
+            self.tempo_db += duracao
+
+
+# Propaga para as tarefas e threads (asyncio.to_thread) criadas durante a requisição, que
+# somam no mesmo objeto.
+_contexto: contextvars.ContextVar[Optional[ContextoRequisicao]] = contextvars.ContextVar(
+    "contexto_requisicao", default=None
+)
+
+
+def iniciar(id: str):
+    return _contexto.set(ContextoRequisicao(id))
+
+
+def encerrar(token) -> None:
+    _contexto.reset(token)
+
+
+def atual() -> Optional[ContextoRequisicao]:
+    return _contexto.get()
+
+
+def instrumentar_sessao(session) -> None:
+    """Envolve session.execute_async para contar toda consulta feita durante uma requisição.
+
+    Cobre tanto o código da aplicação quanto o caspyorm (Session.execute também passa por
+    execute_async). O contexto é capturado na chamada, ainda na tarefa da requisição; os
+    callbacks rodam nas threads do driver.
+    """
+    if getattr(session, "_instrumentada", False):
+        return
+    original = session.execute_async
+
+    def execute_async(*args, **kwargs):
+        inicio = time.perf_counter()
+        future = original(*args, **kwargs)
+        contexto = _contexto.get()
+        if contexto is None:
+            return future
+        contexto.registrar_consulta()
+
+        def respondeu(linhas):
+            contexto.registrar_resposta(len(linhas) if isinstance(linhas, list) else 0, time.perf_counter() - inicio)
+
+        def falhou(_):
+            contexto.registrar_resposta(0, time.perf_counter() - inicio)
+
+        future.add_callbacks(respondeu, falhou)
+        return future
+
+    session.execute_async = execute_async
+    session._instrumentada = True
@@ -1,8 +1,15 @@
 from fastapi import APIRouter, HTTPException, Query, status
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from typing import Optional
 import uuid
 
 from app.models import Veiculo
+from app import cache, counters, statements
+from app.writes import atualizar_linha, carregar_para_atualizar
+from app.paging import LIMITE_MAXIMO, paginar
+from app.export import exportar_ndjson
+from app.profiles import perfil
+from app.multiget import IdsEntrada, obter_varios
 from . import schemas
 
 router = APIRouter(
@@ -12,14 +19,25 @@ router = APIRouter(
 
 @router.post("/", response_model=schemas.VeiculoOut, status_code=status.HTTP_201_CREATED)
 async def criar_veiculo(veiculo: schemas.VeiculoCreate):
-    novo_veiculo = await Veiculo.create_async(**veiculo.dict())
+    # O id vem do cliente: sem o IF NOT EXISTS, repetir o POST sobrescreveria o veículo e
+    # contaria de novo no /count/
+    novo_veiculo = await statements.criar_se_ausente(Veiculo, **veiculo.dict())
+    if novo_veiculo is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Veículo já cadastrado")
+    await counters.incrementar(Veiculo)
     return novo_veiculo
 
-@router.get("/", response_model=List[schemas.VeiculoOut])
+@router.post("/batch_get", response_model=schemas.VeiculoBatchGet)
+async def obter_veiculos_por_ids(entrada: IdsEntrada):
+    items, ausentes = await obter_varios(Veiculo, entrada.ids)
+    return {"items": items, "ausentes": ausentes}
+
+@router.get("/", response_model=schemas.VeiculoPagina, dependencies=[perfil("scan")])
 async def listar_veiculos(
     placa: Optional[str] = None,
     modelo: Optional[str] = None,
-    limit: int = Query(10, gt=0, description="O número de veículos a serem retornados não pode ser negativo.")
+    limit: int = Query(10, gt=0, le=LIMITE_MAXIMO, description="O número de veículos a serem retornados não pode ser negativo."),
+    cursor: Optional[str] = Query(None, description="Valor de next_cursor retornado pela página anterior.")
 ):
     query = Veiculo.all()
     if placa:
@@ -27,41 +45,45 @@ async def listar_veiculos(
     if modelo:
         query = query.filter(modelo=modelo).allow_filtering()
     
-    veiculos = await query.limit(limit).all_async()
-    return veiculos
+    return await paginar(query, limit, cursor)
 
 @router.get("/count/", response_model=int)
 async def contar_veiculos():
-    return await Veiculo.all().allow_filtering().count_async()
+    return await counters.ler(Veiculo)
+
+@router.get("/export", response_class=StreamingResponse, dependencies=[perfil("scan")])
+async def exportar_veiculos():
+    return exportar_ndjson(Veiculo, schemas.VeiculoOut)
 
 @router.get("/{veiculo_id}", response_model=schemas.VeiculoOut)
 async def obter_veiculo(veiculo_id: uuid.UUID):
-    try:
-        veiculo = await Veiculo.get_async(id=veiculo_id)
-        return veiculo
-    except Veiculo.DoesNotExist:
+    veiculo = await cache.obter_em_cache(Veiculo, id=veiculo_id)
+    if veiculo is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Veículo não encontrado")
+    return veiculo
 
 @router.put("/{veiculo_id}", response_model=schemas.VeiculoOut)
 async def atualizar_veiculo(veiculo_id: uuid.UUID, veiculo_data: schemas.VeiculoUpdate):
-    try:
-        veiculo = await Veiculo.get_async(id=veiculo_id)
-    except Veiculo.DoesNotExist:
+    veiculo = await carregar_para_atualizar(Veiculo, id=veiculo_id)
+    if veiculo is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Veículo não encontrado")
 
     update_data = veiculo_data.dict(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nenhum dado fornecido para atualização")
 
-    await veiculo.update_async(**update_data)
-    veiculo_atualizado = await Veiculo.get_async(id=veiculo_id)
+    veiculo_atualizado = await atualizar_linha(veiculo, update_data)
+    if veiculo_atualizado is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Veículo não encontrado")
+    cache.invalidar(Veiculo, id=veiculo_id)
     return veiculo_atualizado
 
 @router.delete("/{veiculo_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def deletar_veiculo(veiculo_id: uuid.UUID):
-    try:
-        veiculo = await Veiculo.get_async(id=veiculo_id)
-        await veiculo.delete_async()
-        return {}
-    except Veiculo.DoesNotExist:
+    veiculo = await statements.obter(Veiculo, id=veiculo_id)
+    if veiculo is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Veículo não encontrado")
+    await statements.remover_instancia(veiculo)
+    cache.invalidar(Veiculo, id=veiculo_id)
+    await counters.decrementar(Veiculo)
+    return {}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 import uuid
 
 class VeiculoBase(BaseModel):
@@ -23,3 +23,11 @@ class VeiculoOut(VeiculoBase):
 
     class Config:
         orm_mode = True
+
+class VeiculoPagina(BaseModel):
+    items: List[VeiculoOut]
+    next_cursor: Optional[str] = None
+
+class VeiculoBatchGet(BaseModel):
+    items: List[Optional[VeiculoOut]]
+    ausentes: List[uuid.UUID]
@@ -1,8 +1,21 @@
-from fastapi import APIRouter, HTTPException, Query, status
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import logging
 import uuid
 
-from app.models import ViagemAlunos
+from app.models import ViagemAlunos, Aluno, AlunoPorViagem
+from app.lookups import obter_viagem, registrar_inscricao, remover_copias_da_inscricao, linhas_da_inscricao
+from app import counters, statements
+from app.reservations import (
+    InscricaoDuplicada, VagasNaoReservadas, ViagemLotada, ViagemNaoEncontrada,
+    cancelar_inscricao, gravar_inscricao, inscrever, liberar_vagas, reservar_vagas,
+)
+from app.writes import atualizar_linha, carregar_para_atualizar
+from app.paging import LIMITE_MAXIMO, paginar
+from app.export import exportar_ndjson
+from app.profiles import perfil
+from app.bulk import ResultadoBulk, criar_em_lote, em_paralelo
 from . import schemas
 
 router = APIRouter(
@@ -10,44 +23,175 @@ router = APIRouter(
     tags=["ViagemAlunos"]
 )
 
+logger = logging.getLogger(__name__)
+
 @router.post("/", response_model=schemas.ViagemAlunosOut, status_code=status.HTTP_201_CREATED)
 async def criar_viagem_aluno(viagem_aluno: schemas.ViagemAlunosCreate):
+    if await statements.obter(ViagemAlunos, viagem_id=viagem_aluno.viagem_id, aluno_id=viagem_aluno.aluno_id) is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Aluno já inscrito nesta viagem")
+
+    aluno = await statements.obter(Aluno, id=viagem_aluno.aluno_id)
+    if aluno is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Aluno não encontrado")
+
+    viagem = await obter_viagem(viagem_aluno.viagem_id)
+    if viagem is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada")
+
+    # A checagem de duplicidade do início só evita reservar vaga à toa; quem decide é o
+    # IF NOT EXISTS da inscrição
     try:
-        await ViagemAlunos.get_async(viagem_id=viagem_aluno.viagem_id, aluno_id=viagem_aluno.aluno_id)
+        nova_inscricao = await inscrever(viagem, ViagemAlunos(**viagem_aluno.dict(), rota_id=viagem.rota_id))
+    except InscricaoDuplicada:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Aluno já inscrito nesta viagem")
-    except ViagemAlunos.DoesNotExist:
-        nova_inscricao = await ViagemAlunos.create_async(**viagem_aluno.dict())
-        return nova_inscricao
+    except ViagemLotada:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Viagem lotada")
+    except ViagemNaoEncontrada:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada")
+    except VagasNaoReservadas:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Viagem muito disputada, tente novamente")
+    await counters.incrementar(ViagemAlunos)
+    await registrar_inscricao(nova_inscricao, aluno)
+    return nova_inscricao
+
+@router.post("/bulk", response_model=ResultadoBulk)
+async def criar_viagem_alunos_em_lote(request: Request):
+    # Corpo: array JSON ou NDJSON de ViagemAlunosCreate; o resultado é reportado por linha
+    alunos = {}
+    viagens = {}
+
+    async def preparar(instancias, erros):
+        # Uma leitura por aluno, por viagem e por partição de inscrições distintas do lote,
+        # em vez de três leituras por linha
+        aluno_ids = list({inscricao.aluno_id for _, inscricao in instancias})
+        viagem_ids = list({inscricao.viagem_id for _, inscricao in instancias})
+        alunos.update(zip(aluno_ids, await em_paralelo(lambda aluno_id: statements.obter(Aluno, id=aluno_id), aluno_ids)))
+        viagens.update(zip(viagem_ids, await em_paralelo(obter_viagem, viagem_ids)))
+        inscritas = dict(zip(aluno_ids, await em_paralelo(
+            lambda aluno_id: statements.listar_particao(ViagemAlunos, aluno_id=aluno_id), aluno_ids
+        )))
+        ja_inscritos = {(i.aluno_id, i.viagem_id) for inscricoes in inscritas.values() for i in inscricoes}
+
+        validas = []
+        for indice, inscricao in instancias:
+            par = (inscricao.aluno_id, inscricao.viagem_id)
+            if alunos[inscricao.aluno_id] is None:
+                erros[indice] = "Aluno não encontrado"
+            elif viagens[inscricao.viagem_id] is None:
+                erros[indice] = "Viagem não encontrada"
+            elif par in ja_inscritos:
+                erros[indice] = "Aluno já inscrito nesta viagem"
+            else:
+                inscricao.rota_id = viagens[inscricao.viagem_id].rota_id
+                ja_inscritos.add(par)
+                validas.append((indice, inscricao))
+
+        # Uma reserva por viagem para todas as linhas dela; as que não couberem são rejeitadas
+        por_viagem = {}
+        for item in validas:
+            por_viagem.setdefault(item[1].viagem_id, []).append(item)
+
+        reservadas = {}
+
+        async def reservar(viagem_id):
+            try:
+                obtidas = await reservar_vagas(viagens[viagem_id], len(por_viagem[viagem_id]))
+            except VagasNaoReservadas:
+                return 0, "Viagem lotada"
+            except ViagemNaoEncontrada:
+                return 0, "Viagem não encontrada"
+            except Exception as e:
+                # Erro numa viagem vira erro das linhas dela, sem interromper as outras reservas
+                logger.warning("Falha ao reservar vagas da viagem %s: %s", viagem_id, e)
+                return 0, f"Erro ao reservar vaga: {e}"
+            reservadas[viagem_id] = obtidas
+            return obtidas, "Viagem lotada"
 
-@router.get("/", response_model=List[schemas.ViagemAlunosOut])
+        concluido = False
+        try:
+            resultados = await em_paralelo(reservar, list(por_viagem))
+            concluido = True
+        finally:
+            if not concluido:
+                # Interrompido no meio (ex.: cancelado): devolve as vagas já obtidas
+                await em_paralelo(
+                    lambda viagem_id: liberar_vagas(viagens[viagem_id], reservadas[viagem_id]),
+                    [viagem_id for viagem_id, obtidas in reservadas.items() if obtidas],
+                )
+
+        aceitas = []
+        for viagem_id, (obtidas, erro) in zip(por_viagem, resultados):
+            for posicao, (indice, inscricao) in enumerate(por_viagem[viagem_id]):
+                if posicao < obtidas:
+                    aceitas.append((indice, inscricao))
+                else:
+                    erros[indice] = erro
+        return aceitas
+
+    async def gravar(instancias):
+        # Como no POST individual, cada inscrição é um INSERT ... IF NOT EXISTS: a checagem
+        # em preparar não impede que um POST concorrente grave o mesmo par antes
+        async def gravar_uma(item):
+            try:
+                return "gravada" if await gravar_inscricao(item[1]) else "duplicada"
+            except Exception as e:
+                # Pode ter sido gravada mesmo assim, então a vaga fica reservada
+                logger.warning("Falha ao gravar inscrição: %s", e)
+                return f"Erro ao gravar: {e}"
+
+        erros = {}
+        devolver = {}
+        for (indice, inscricao), resultado in zip(instancias, await em_paralelo(gravar_uma, instancias)):
+            if resultado == "duplicada":
+                erros[indice] = "Aluno já inscrito nesta viagem"
+                devolver[inscricao.viagem_id] = devolver.get(inscricao.viagem_id, 0) + 1
+            elif resultado != "gravada":
+                erros[indice] = resultado
+        await em_paralelo(lambda viagem_id: liberar_vagas(viagens[viagem_id], devolver[viagem_id]), list(devolver))
+        return erros
+
+    def derivar(inscricao):
+        return linhas_da_inscricao(inscricao, alunos[inscricao.aluno_id])
+
+    return await criar_em_lote(request, ViagemAlunos, schemas.ViagemAlunosCreate, preparar, derivar, gravar)
+
+@router.get("/", response_model=schemas.ViagemAlunosPagina, dependencies=[perfil("scan")])
 async def listar_viagem_alunos(
     viagem_id: Optional[uuid.UUID] = None,
     aluno_id: Optional[uuid.UUID] = None,
     status_embarque: Optional[str] = None,
-    limit: int = Query(10, gt=0, description="O número de inscrições a serem retornadas não pode ser negativo.")
+    limit: int = Query(10, gt=0, le=LIMITE_MAXIMO, description="O número de inscrições a serem retornadas não pode ser negativo."),
+    cursor: Optional[str] = Query(None, description="Valor de next_cursor retornado pela página anterior.")
 ):
-    query = ViagemAlunos.all()
-    if viagem_id:
-        query = query.filter(viagem_id=viagem_id).allow_filtering()
+    # aluno_id é a partição de viagem_alunos e viagem_id a de alunos_por_viagem: com um
+    # deles a leitura fica restrita a uma partição
     if aluno_id:
-        query = query.filter(aluno_id=aluno_id).allow_filtering()
+        query = ViagemAlunos.filter(aluno_id=aluno_id)
+        if viagem_id:
+            query = query.filter(viagem_id=viagem_id)
+    elif viagem_id:
+        query = AlunoPorViagem.filter(viagem_id=viagem_id)
+    else:
+        query = ViagemAlunos.all()
     if status_embarque:
         query = query.filter(status_embarque=status_embarque).allow_filtering()
     
-    inscricoes = await query.limit(limit).all_async()
-    return inscricoes
+    return await paginar(query, limit, cursor)
 
 @router.get("/count/", response_model=int)
 async def contar_viagem_alunos():
-    return await ViagemAlunos.all().allow_filtering().count_async()
+    return await counters.ler(ViagemAlunos)
+
+@router.get("/export", response_class=StreamingResponse, dependencies=[perfil("scan")])
+async def exportar_viagem_alunos():
+    return exportar_ndjson(ViagemAlunos, schemas.ViagemAlunosOut)
 
 @router.get("/{viagem_id}/{aluno_id}", response_model=schemas.ViagemAlunosOut)
 async def obter_viagem_aluno(viagem_id: uuid.UUID, aluno_id: uuid.UUID):
-    try:
-        inscricao = await ViagemAlunos.get_async(viagem_id=viagem_id, aluno_id=aluno_id)
-        return inscricao
-    except ViagemAlunos.DoesNotExist:
+    inscricao = await statements.obter(ViagemAlunos, viagem_id=viagem_id, aluno_id=aluno_id)
+    if inscricao is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inscrição não encontrada")
+    return inscricao
 
 @router.put("/{viagem_id}/{aluno_id}", response_model=schemas.ViagemAlunosOut)
 async def atualizar_viagem_aluno(
@@ -55,24 +199,32 @@ async def atualizar_viagem_aluno(
     aluno_id: uuid.UUID, 
     viagem_aluno_data: schemas.ViagemAlunosUpdate
 ):
-    try:
-        inscricao = await ViagemAlunos.get_async(viagem_id=viagem_id, aluno_id=aluno_id)
-    except ViagemAlunos.DoesNotExist:
+    inscricao = await carregar_para_atualizar(ViagemAlunos, viagem_id=viagem_id, aluno_id=aluno_id)
+    if inscricao is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inscrição não encontrada")
 
     update_data = viagem_aluno_data.dict(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nenhum dado fornecido para atualização")
 
-    await inscricao.update_async(**update_data)
-    inscricao_atualizada = await ViagemAlunos.get_async(viagem_id=viagem_id, aluno_id=aluno_id)
+    inscricao_atualizada = await atualizar_linha(inscricao, update_data)
+    if inscricao_atualizada is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inscrição não encontrada")
+    # IF EXISTS: se a inscrição foi cancelada enquanto isso, um UPDATE comum recriaria uma
+    # linha parcial na lista de embarque
+    await statements.atualizar(
+        AlunoPorViagem, {"viagem_id": viagem_id, "aluno_id": aluno_id},
+        {campo: getattr(inscricao_atualizada, campo) for campo in update_data},
+        condicional=True,
+    )
     return inscricao_atualizada
 
 @router.delete("/{viagem_id}/{aluno_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def deletar_viagem_aluno(viagem_id: uuid.UUID, aluno_id: uuid.UUID):
-    try:
-        inscricao = await ViagemAlunos.get_async(viagem_id=viagem_id, aluno_id=aluno_id)
-        await inscricao.delete_async()
-        return {}
-    except ViagemAlunos.DoesNotExist:
+    inscricao = await statements.obter(ViagemAlunos, viagem_id=viagem_id, aluno_id=aluno_id)
+    # Sem a linha, ou removida por outro pedido entre a leitura e o DELETE
+    if inscricao is None or not await cancelar_inscricao(await obter_viagem(viagem_id), inscricao):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inscrição não encontrada")
+    await counters.decrementar(ViagemAlunos)
+    await remover_copias_da_inscricao(inscricao)
+    return {}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 import uuid
 from datetime import datetime
 
@@ -19,3 +19,7 @@ class ViagemAlunosOut(ViagemAlunosBase):
 
     class Config:
         orm_mode = True
+
+class ViagemAlunosPagina(BaseModel):
+    items: List[ViagemAlunosOut]
+    next_cursor: Optional[str] = None
@@ -1,9 +1,22 @@
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+import asyncio
+import os
 import uuid
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-from app.models import Viagem
+from app.models import AlunoPorViagem, Viagem, ViagemPorDia
+from app.lookups import (
+    remover_viagem_das_inscricoes, gravar_lookups, remover_lookups, valores_de_lookup, consulta_com_lookup,
+    obter_viagem as obter_viagem_pelo_id,
+)
+from app import counters, statements
+from app.writes import atualizar_linha, carregar_para_atualizar
+from app.paging import LIMITE_MAXIMO, paginar
+from app.export import exportar_ndjson
+from app.profiles import perfil
+from app.bulk import ResultadoBulk, criar_em_lote
 from . import schemas
 
 router = APIRouter(
@@ -11,43 +24,101 @@ router = APIRouter(
     tags=["Viagens"]
 )
 
+# Maior intervalo aceito por GET /viagens/por_dia; cada dia é uma leitura de partição
+POR_DIA_MAXIMO = int(os.getenv("VIAGENS_POR_DIA_MAXIMO", "31"))
+
 @router.post("/", response_model=schemas.ViagemOut, status_code=status.HTTP_201_CREATED)
 async def criar_viagem(viagem: schemas.ViagemCreate):
-    nova_viagem = await Viagem.create_async(**viagem.dict())
+    nova_viagem = await statements.criar(Viagem, **viagem.dict())
+    await counters.incrementar(Viagem)
+    await gravar_lookups(nova_viagem)
     return nova_viagem
 
-@router.get("/", response_model=List[schemas.ViagemOut])
+@router.post("/bulk", response_model=ResultadoBulk)
+async def criar_viagens_em_lote(request: Request):
+    # Corpo: array JSON ou NDJSON de ViagemCreate; o resultado é reportado por linha
+    return await criar_em_lote(request, Viagem, schemas.ViagemCreate)
+
+@router.get("/", response_model=schemas.ViagemPagina, dependencies=[perfil("scan")])
 async def listar_viagens(
     rota_id: Optional[uuid.UUID] = None,
     motorista_id: Optional[uuid.UUID] = None,
     veiculo_id: Optional[uuid.UUID] = None,
     status: Optional[str] = None,
-    limit: int = Query(10, gt=0, description="O número de viagens a serem retornadas não pode ser negativo.")
+    limit: int = Query(10, gt=0, le=LIMITE_MAXIMO, description="O número de viagens a serem retornadas não pode ser negativo."),
+    cursor: Optional[str] = Query(None, description="Valor de next_cursor retornado pela página anterior.")
+):
+    query = consulta_com_lookup(Viagem, {
+        "rota_id": rota_id,
+        "motorista_id": motorista_id,
+        "veiculo_id": veiculo_id,
+        "status": status,
+    })
+
+    return await paginar(query, limit, cursor)
+
+@router.get("/por_dia", response_model=List[schemas.ViagemOut])
+async def listar_viagens_por_dia(
+    rota_id: uuid.UUID,
+    dia: Optional[date] = Query(None, description="Dia da viagem (UTC). Alternativa a inicio/fim."),
+    inicio: Optional[date] = Query(None, description="Primeiro dia do intervalo (UTC)."),
+    fim: Optional[date] = Query(None, description="Último dia do intervalo, inclusive. Padrão: inicio."),
 ):
-    query = Viagem.all()
-    if rota_id:
-        query = query.filter(rota_id=rota_id).allow_filtering()
-    if motorista_id:
-        query = query.filter(motorista_id=motorista_id).allow_filtering()
-    if veiculo_id:
-        query = query.filter(veiculo_id=veiculo_id).allow_filtering()
-    if status:
-        query = query.filter(status=status).allow_filtering()
-    
-    viagens = await query.limit(limit).all_async()
-    return viagens
+    # Uma partição de viagens_por_dia por dia, lidas em paralelo e devolvidas em ordem de
+    # dia e de hora de partida
+    if dia is not None:
+        if inicio is not None or fim is not None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use dia ou inicio/fim, não ambos")
+        inicio = fim = dia
+    if inicio is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Informe dia ou inicio")
+    fim = fim or inicio
+    dias = (fim - inicio).days + 1
+    if dias < 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="fim deve ser igual ou posterior a inicio")
+    if dias > POR_DIA_MAXIMO:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"O intervalo pode ter no máximo {POR_DIA_MAXIMO} dias",
+        )
+
+    particoes = await asyncio.gather(*[
+        statements.listar_particao(ViagemPorDia, rota_id=rota_id, dia=(inicio + timedelta(days=i)).isoformat())
+        for i in range(dias)
+    ])
+    return [viagem for particao in particoes for viagem in particao]
+
+@router.get("/{viagem_id}/roster", response_model=List[schemas.AlunoEmbarqueOut])
+async def listar_embarque(viagem_id: uuid.UUID):
+    # Lista de embarque: uma leitura na partição da viagem em alunos_por_viagem, com nome e
+    # matrícula já copiados na inscrição
+    return await statements.listar_particao(AlunoPorViagem, viagem_id=viagem_id)
 
 @router.get("/count/", response_model=int)
+# Sem a barra, /count cairia em /{viagem_id}
+@router.get("/count", response_model=int, include_in_schema=False)
 async def contar_viagens():
-    return await Viagem.all().allow_filtering().count_async()
+    return await counters.ler(Viagem)
+
+@router.get("/export", response_class=StreamingResponse, dependencies=[perfil("scan")])
+async def exportar_viagens():
+    return exportar_ndjson(Viagem, schemas.ViagemOut)
+
+# Declarada depois de /por_dia, /count e /export para não capturar esses caminhos
+@router.get("/{viagem_id}", response_model=schemas.ViagemOut)
+async def obter_viagem_por_id(viagem_id: uuid.UUID):
+    # Só pelo id: uma leitura na partição da viagem em viagens_por_id
+    viagem = await obter_viagem_pelo_id(viagem_id)
+    if viagem is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada")
+    return viagem
 
 @router.get("/{rota_id}/{data_viagem}/{viagem_id}", response_model=schemas.ViagemOut)
 async def obter_viagem(rota_id: uuid.UUID, data_viagem: datetime, viagem_id: uuid.UUID):
-    try:
-        viagem = await Viagem.get_async(rota_id=rota_id, data_viagem=data_viagem, id=viagem_id)
-        return viagem
-    except Viagem.DoesNotExist:
+    viagem = await statements.obter(Viagem, rota_id=rota_id, data_viagem=data_viagem, id=viagem_id)
+    if viagem is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada")
+    return viagem
 
 @router.put("/{rota_id}/{data_viagem}/{viagem_id}", response_model=schemas.ViagemOut)
 async def atualizar_viagem(
@@ -56,24 +127,28 @@ async def atualizar_viagem(
     viagem_id: uuid.UUID, 
     viagem_data: schemas.ViagemUpdate
 ):
-    try:
-        viagem = await Viagem.get_async(rota_id=rota_id, data_viagem=data_viagem, id=viagem_id)
-    except Viagem.DoesNotExist:
+    viagem = await carregar_para_atualizar(Viagem, rota_id=rota_id, data_viagem=data_viagem, id=viagem_id)
+    if viagem is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada")
 
     update_data = viagem_data.dict(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nenhum dado fornecido para atualização")
 
-    await viagem.update_async(**update_data)
-    viagem_atualizada = await Viagem.get_async(rota_id=rota_id, data_viagem=data_viagem, id=viagem_id)
+    anteriores = valores_de_lookup(viagem)
+    viagem_atualizada = await atualizar_linha(viagem, update_data)
+    if viagem_atualizada is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada")
+    await gravar_lookups(viagem_atualizada, anteriores)
     return viagem_atualizada
 
 @router.delete("/{rota_id}/{data_viagem}/{viagem_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def deletar_viagem(rota_id: uuid.UUID, data_viagem: datetime, viagem_id: uuid.UUID):
-    try:
-        viagem = await Viagem.get_async(rota_id=rota_id, data_viagem=data_viagem, id=viagem_id)
-        await viagem.delete_async()
-        return {}
-    except Viagem.DoesNotExist:
+    viagem = await statements.obter(Viagem, rota_id=rota_id, data_viagem=data_viagem, id=viagem_id)
+    if viagem is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada")
+    await statements.remover_instancia(viagem)
+    await counters.decrementar(Viagem)
+    await remover_lookups(viagem)
+    await remover_viagem_das_inscricoes(viagem_id)
+    return {}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 import uuid
 from datetime import datetime
 
@@ -19,7 +19,7 @@ class ViagemUpdate(BaseModel):
     veiculo_id: Optional[uuid.UUID] = None
     motorista_id: Optional[uuid.UUID] = None
     hora_partida: Optional[datetime] = None
-    vagas_disponiveis: Optional[int] = None
+    # vagas_disponiveis fica de fora: só muda pelas reservas (compare-and-set)
     status: Optional[str] = None
 
 class ViagemOut(ViagemBase):
@@ -27,3 +27,17 @@ class ViagemOut(ViagemBase):
 
     class Config:
         orm_mode = True
+
+class AlunoEmbarqueOut(BaseModel):
+    aluno_id: uuid.UUID
+    nome_completo: Optional[str] = None
+    matricula: Optional[str] = None
+    status_embarque: Optional[str] = None
+    data_inscricao: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class ViagemPagina(BaseModel):
+    items: List[ViagemOut]
+    next_cursor: Optional[str] = None
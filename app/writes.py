@@ -0,0 +1,44 @@
+import os
+from typing import Any, Dict, Optional, Type
+
+from caspyorm import Model
+
+from app import cache, statements
+from app.lookups import LOOKUPS
+
+# Com ATUALIZACAO_CONDICIONAL=1 os PUTs usam UPDATE ... IF EXISTS (LWT): a checagem de
+# existência acontece na própria escrita e um DELETE concorrente não é desfeito pelo UPDATE
+# (que no Cassandra é um upsert).
+ATUALIZACAO_CONDICIONAL = os.getenv("ATUALIZACAO_CONDICIONAL", "0").lower() in ("1", "true")
+
+
+async def carregar_para_atualizar(modelo: Type[Model], **pk: Any) -> Optional[Model]:
+    # No modo condicional a existência é garantida pelo IF EXISTS, então a linha base pode
+    # vir do cache e o PUT faz uma única ida ao banco. Modelos com lookups sempre leem do
+    # banco: os valores antigos decidem quais linhas de lookup são removidas.
+    if ATUALIZACAO_CONDICIONAL and modelo in cache.CACHES and modelo not in LOOKUPS:
+        return await cache.obter_em_cache(modelo, **pk)
+    return await statements.obter(modelo, **pk)
+
+
+async def atualizar_linha(instancia: Model, dados: Dict[str, Any]) -> Optional[Model]:
+    """Grava `dados` na linha de `instancia` e devolve o resultado sem reler a linha.
+
+    A resposta é uma nova instância (a carregada pode estar compartilhada pelo cache). No
+    modo condicional, devolve None se a linha não existia mais.
+    """
+    modelo = type(instancia)
+    # Mesma semântica do update_async: campos com None não são alterados
+    alteracoes = {
+        campo: modelo.model_fields[campo].to_python(valor)
+        for campo, valor in dados.items()
+        if valor is not None
+    }
+    atualizada = modelo(**{**instancia.model_dump(), **alteracoes})
+    if not alteracoes:
+        return atualizada
+
+    pk = {campo: getattr(instancia, campo) for campo in modelo.__caspy_schema__["primary_keys"]}
+    if not await statements.atualizar(modelo, pk, alteracoes, ATUALIZACAO_CONDICIONAL):
+        return None
+    return atualizada
@@ -0,0 +1,80 @@
+"""Latência de PUT: leitura + UPDATE + releitura versus o caminho atual.
+
+Compara, sobre as mesmas rotas de teste, três variantes do handler de atualização:
+
+- releitura: GET, update_async e GET de novo (comportamento anterior);
+- direto: GET e UPDATE, com a resposta montada a partir da linha carregada;
+- condicional: linha base do cache e UPDATE ... IF EXISTS (uma ida ao banco).
+
+Precisa de um Cassandra acessível com as mesmas variáveis de ambiente da API.
+
+    python -m benchmarks.atualizacao --linhas 50 --repeticoes 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from app import cache, schema, writes
+from app.database import connect_to_db_async, disconnect_from_db_async
+from app.models import Rota
+from app.rotas import routes as rotas_routes
+from app.rotas.schemas import RotaUpdate
+
+
+async def _releitura(rota_id, dados):
+    rota = await Rota.get_async(id=rota_id)
+    await rota.update_async(**dados.dict(exclude_unset=True))
+    cache.invalidar(Rota, id=rota_id)
+    return await Rota.get_async(id=rota_id)
+
+
+async def _atual(rota_id, dados):
+    return await rotas_routes.atualizar_rota(rota_id, dados)
+
+
+async def _medir(nome, funcao, ids, repeticoes):
+    latencias = []
+    for i in range(repeticoes):
+        for rota_id in ids:
+            # Aquece o cache como faria um GET anterior da mesma rota
+            await cache.obter_em_cache(Rota, id=rota_id)
+            inicio = time.perf_counter()
+            await funcao(rota_id, RotaUpdate(nome=f"bench {i}"))
+            latencias.append(time.perf_counter() - inicio)
+    latencias.sort()
+    p99 = latencias[max(int(len(latencias) * 0.99) - 1, 0)]
+    print(f"{nome:<12} n={len(latencias):<6} p50={statistics.median(latencias) * 1000:8.3f} ms  p99={p99 * 1000:8.3f} ms")
+
+
+async def rodar(linhas: int, repeticoes: int) -> None:
+    await connect_to_db_async()
+    await schema.preparar_no_startup()
+    rotas = []
+    try:
+        for i in range(linhas):
+            rotas.append(await Rota.create_async(id=uuid.uuid4(), nome=f"bench {i}", origem="A", destino="B", ativo=True))
+        ids = [rota.id for rota in rotas]
+
+        await _medir("releitura", _releitura, ids, repeticoes)
+        writes.ATUALIZACAO_CONDICIONAL = False
+        await _medir("direto", _atual, ids, repeticoes)
+        writes.ATUALIZACAO_CONDICIONAL = True
+        await _medir("condicional", _atual, ids, repeticoes)
+    finally:
+        for rota in rotas:
+            await rota.delete_async()
+        await disconnect_from_db_async()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=50)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(rodar(args.linhas, args.repeticoes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Teste de carga: replay de uma mistura de requisições (JSONL) contra a API.
+
+Cada linha do arquivo de mistura descreve uma requisição e seu peso no sorteio:
+
+    {"nome": "obter_aluno", "metodo": "GET", "path": "/alunos/{aluno.id}", "peso": 40}
+    {"nome": "criar_rota", "metodo": "POST", "path": "/rotas/", "peso": 2,
+     "corpo": {"nome": "Carga {novo.n}", "origem": "A", "destino": "B"}, "status": [201]}
+
+Antes do replay, uma massa de rotas, veículos, motoristas, alunos, viagens e inscrições é
+criada pela própria API. `{entidade.campo}` (no path ou no corpo) é trocado por um campo de
+uma instância sorteada da massa. As instâncias são `rota`, `veiculo`, `motorista`, `aluno`,
+`viagem` e `inscricao`. `{novo.n}` e `{novo.uuid}` geram valores únicos. Respostas fora de
+`status` (padrão: qualquer 2xx) contam como erro.
+
+Sem `--url`, a app roda no processo (ASGI, com o startup normal e o banco configurado no
+ambiente); com `--url`, as requisições vão para um servidor já rodando. O resultado (RPS e
+p50/p95/p99 por requisição) é impresso e, com `--saida`, gravado em JSON. `--comparar`
+aponta regressões em relação a um resultado anterior.
+
+    python -m benchmarks.carga --mix benchmarks/cargas/misto.jsonl --requisicoes 5000 \\
+        --concorrencia 32 --saida resultado.json --comparar base.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import subprocess
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+_MARCADOR = re.compile(r"\{(\w+)\.(\w+)\}")
+
+
+def carregar_mix(caminho: str) -> List[Dict[str, Any]]:
+    with open(caminho, encoding="utf-8") as arquivo:
+        linhas = [json.loads(linha) for linha in arquivo if linha.strip()]
+    for linha in linhas:
+        linha.setdefault("peso", 1)
+        linha.setdefault("metodo", "GET")
+    return linhas
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por posição (nearest-rank) de uma lista já ordenada."""
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, max(0, int(round(p / 100 * len(valores))) - 1))]
+
+
+class Massa:
+    """Instâncias criadas pela API antes do replay, sorteadas para preencher os marcadores."""
+
+    def __init__(self, aleatorio: random.Random):
+        self.aleatorio = aleatorio
+        self.instancias: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._sequencia = itertools.count()
+
+    def preencher(self, valor: Any) -> Any:
+        # Um sorteio por entidade por requisição: {viagem.rota_id} e {viagem.id} vêm da mesma viagem
+        escolhidas: Dict[str, Dict[str, Any]] = {}
+
+        def trocar(texto: str) -> str:
+            def campo(casamento) -> str:
+                entidade, nome = casamento.groups()
+                if entidade == "novo":
+                    return str(uuid.uuid4()) if nome == "uuid" else str(next(self._sequencia))
+                if entidade not in escolhidas:
+                    escolhidas[entidade] = self.aleatorio.choice(self.instancias[entidade])
+                return str(escolhidas[entidade][nome])
+
+            return _MARCADOR.sub(campo, texto)
+
+        def percorrer(item: Any) -> Any:
+            if isinstance(item, str):
+                return trocar(item)
+            if isinstance(item, dict):
+                return {chave: percorrer(v) for chave, v in item.items()}
+            if isinstance(item, list):
+                return [percorrer(v) for v in item]
+            return item
+
+        return percorrer(valor)
+
+
+async def _criar(cliente: httpx.AsyncClient, caminho: str, corpos: List[Dict[str, Any]], concorrencia: int):
+    limite = asyncio.Semaphore(concorrencia)
+
+    async def criar(corpo):
+        async with limite:
+            resposta = await cliente.post(caminho, json=corpo)
+            resposta.raise_for_status()
+            return resposta.json()
+
+    return await asyncio.gather(*[criar(corpo) for corpo in corpos])
+
+
+async def semear(cliente: httpx.AsyncClient, massa: Massa, quantidade: int, concorrencia: int) -> None:
+    marca = uuid.uuid4().hex[:6]
+    amanha = (datetime.now() + timedelta(days=1)).replace(microsecond=0)
+    massa.instancias["rota"] = await _criar(cliente, "/rotas/", [
+        {"nome": f"Carga {marca} {i}", "origem": "Centro", "destino": f"Bairro {i}"} for i in range(quantidade)
+    ], concorrencia)
+    massa.instancias["veiculo"] = await _criar(cliente, "/veiculos/", [
+        {"id": str(uuid.uuid4()), "placa": f"CRG{marca}{i}", "modelo": "Micro", "capacidade": 30}
+        for i in range(quantidade)
+    ], concorrencia)
+    massa.instancias["motorista"] = await _criar(cliente, "/motoristas/", [
+        {"nome_completo": f"Motorista {i}", "cpf": f"{marca}{i:05d}", "cnh": f"C{i}", "endereco_cidade": f"Cidade {i % 5}"}
+        for i in range(quantidade)
+    ], concorrencia)
+    massa.instancias["aluno"] = await _criar(cliente, "/alunos/", [
+        {"nome_completo": f"Aluno {i}", "matricula": f"{marca}{i:05d}", "email": f"carga{marca}{i}@exemplo.com"}
+        for i in range(quantidade * 5)
+    ], concorrencia)
+    massa.instancias["viagem"] = await _criar(cliente, "/viagens/", [
+        {
+            "rota_id": rota["id"], "data_viagem": (amanha + timedelta(minutes=i)).isoformat(),
+            "veiculo_id": massa.instancias["veiculo"][i]["id"],
+            "motorista_id": massa.instancias["motorista"][i]["id"],
+            "hora_partida": (amanha + timedelta(minutes=i)).isoformat(),
+            # Folga para as inscrições do replay não esgotarem as vagas
+            "vagas_disponiveis": 1_000_000,
+        }
+        for i, rota in enumerate(massa.instancias["rota"])
+    ], concorrencia)
+    massa.instancias["inscricao"] = await _criar(cliente, "/viagem_alunos/", [
+        {"viagem_id": massa.instancias["viagem"][i % quantidade]["id"], "aluno_id": aluno["id"]}
+        for i, aluno in enumerate(massa.instancias["aluno"])
+    ], concorrencia)
+
+
+async def replay(cliente: httpx.AsyncClient, mix, massa: Massa, requisicoes: int, concorrencia: int):
+    sorteadas = massa.aleatorio.choices(mix, weights=[linha["peso"] for linha in mix], k=requisicoes)
+    latencias: Dict[str, List[float]] = defaultdict(list)
+    erros: Dict[str, int] = defaultdict(int)
+    fila = iter(sorteadas)
+
+    async def trabalhador():
+        for linha in fila:
+            path = massa.preencher(linha["path"])
+            corpo = massa.preencher(linha.get("corpo"))
+            inicio = time.perf_counter()
+            try:
+                resposta = await cliente.request(linha["metodo"], path, json=corpo)
+                ok = resposta.status_code in linha["status"] if "status" in linha else resposta.is_success
+            except httpx.HTTPError:
+                ok = False
+            latencias[linha["nome"]].append(time.perf_counter() - inicio)
+            if not ok:
+                erros[linha["nome"]] += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[trabalhador() for _ in range(concorrencia)])
+    return latencias, erros, time.perf_counter() - inicio
+
+
+def _resumo(latencias: List[float], erros: int, duracao: float) -> Dict[str, float]:
+    ordenadas = sorted(latencias)
+    return {
+        "requisicoes": len(ordenadas),
+        "erros": erros,
+        "rps": round(len(ordenadas) / duracao, 1) if duracao else 0.0,
+        "p50_ms": round(percentil(ordenadas, 50) * 1000, 3),
+        "p95_ms": round(percentil(ordenadas, 95) * 1000, 3),
+        "p99_ms": round(percentil(ordenadas, 99) * 1000, 3),
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+async def rodar(args) -> Dict[str, Any]:
+    mix = carregar_mix(args.mix)
+    massa = Massa(random.Random(args.semente))
+    app = None
+    if args.url:
+        cliente = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        from app.main import app
+        for iniciar in app.router.on_startup:
+            await iniciar()
+        cliente = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://carga", timeout=60)
+    try:
+        async with cliente:
+            await semear(cliente, massa, args.entidades, args.concorrencia)
+            latencias, erros, duracao = await replay(cliente, mix, massa, args.requisicoes, args.concorrencia)
+    finally:
+        if app is not None:
+            for encerrar in app.router.on_shutdown:
+                await encerrar()
+
+    todas = [valor for valores in latencias.values() for valor in valores]
+    return {
+        "meta": {
+            "mix": args.mix,
+            "modo": "http" if args.url else "asgi",
+            "url": args.url,
+            "requisicoes": args.requisicoes,
+            "concorrencia": args.concorrencia,
+            "entidades": args.entidades,
+            "semente": args.semente,
+            "commit": _commit(),
+            "quando": datetime.now().isoformat(timespec="seconds"),
+        },
+        "total": _resumo(todas, sum(erros.values()), duracao),
+        # RPS por requisição é a vazão dela dentro da mistura, não isolada
+        "rotas": {nome: _resumo(valores, erros[nome], duracao) for nome, valores in sorted(latencias.items())},
+    }
+
+
+def imprimir(resultado: Dict[str, Any]) -> None:
+    print(f"{'requisição':<32} {'n':>7} {'erros':>6} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for nome, resumo in list(resultado["rotas"].items()) + [("TOTAL", resultado["total"])]:
+        print(
+            f"{nome:<32} {resumo['requisicoes']:>7} {resumo['erros']:>6} {resumo['rps']:>9.1f} "
+            f"{resumo['p50_ms']:>9.2f} {resumo['p95_ms']:>9.2f} {resumo['p99_ms']:>9.2f}"
+        )
+
+
+def comparar(base: Dict[str, Any], atual: Dict[str, Any], tolerancia: float) -> List[str]:
+    """Regressões: vazão total menor ou p99 de alguma requisição maior que a tolerância."""
+    regressoes = []
+    if atual["total"]["rps"] < base["total"]["rps"] * (1 - tolerancia):
+        regressoes.append(f"TOTAL: rps {base['total']['rps']:.1f} -> {atual['total']['rps']:.1f}")
+    for nome, resumo in atual["rotas"].items():
+        anterior = base["rotas"].get(nome)
+        if anterior and resumo["p99_ms"] > anterior["p99_ms"] * (1 + tolerancia):
+            regressoes.append(f"{nome}: p99 {anterior['p99_ms']:.2f}ms -> {resumo['p99_ms']:.2f}ms")
+    return regressoes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mix", default="benchmarks/cargas/misto.jsonl", help="Arquivo JSONL com a mistura")
+    parser.add_argument("--requisicoes", type=int, default=5000)
+    parser.add_argument("--concorrencia", type=int, default=32)
+    parser.add_argument("--entidades", type=int, default=50, help="Rotas/veículos/motoristas/viagens da massa (alunos: 5x)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--url", help="URL de um servidor da API já rodando")
+    parser.add_argument("--saida", help="Grava o resultado em JSON")
+    parser.add_argument("--comparar", help="Resultado JSON anterior usado como base")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="Piora relativa aceita na comparação")
+    args = parser.parse_args()
+
+    resultado = asyncio.run(rodar(args))
+    imprimir(resultado)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            regressoes = comparar(json.load(arquivo), resultado, args.tolerancia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO: {regressao}")
+        if regressoes:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Verifica a invalidação de cache entre workers usando o barramento UNIX.
+
+Sobe N processos (como os workers do uvicorn), cada um com o cache de rotas preenchido,
+publica invalidações a partir do processo principal e confere que todos os workers
+descartaram a chave, medindo o tempo de propagação.
+
+    python -m benchmarks.invalidacao_workers --workers 4 --rodadas 200
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+
+
+def _worker(chaves, prontos, resultados, parar):
+    from app import cache
+    from app.models import Rota
+
+    async def rodar():
+        await cache.barramento.iniciar()
+        rotas = cache.CACHES[Rota]
+        for chave in chaves:
+            rotas._guardar((chave,), object())
+
+        def reportar(tabela, chave):
+            # Assinado depois do cache: quando roda, a entrada já deveria ter saído
+            resultados.put((os.getpid(), chave[0], time.monotonic(), chave not in rotas._itens))
+
+        cache.barramento.assinar(reportar)
+        prontos.put(os.getpid())
+        while not parar.is_set():
+            await asyncio.sleep(0.05)
+        await cache.barramento.parar()
+
+    asyncio.run(rodar())
+
+
+async def _publicar(chaves, workers, resultados):
+    from app import cache
+    from app.models import Rota
+
+    await cache.barramento.iniciar()
+    latencias = []
+    falhas = 0
+    try:
+        for chave in chaves:
+            inicio = time.monotonic()
+            cache.invalidar(Rota, id=chave)
+            for _ in range(workers):
+                _, recebida, instante, removida = await asyncio.to_thread(resultados.get, True, 5)
+                if recebida != chave or not removida:
+                    falhas += 1
+                latencias.append(instante - inicio)
+    finally:
+        await cache.barramento.parar()
+    return latencias, falhas
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rodadas", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ["CACHE_INVALIDACAO"] = "unix"
+    diretorio = tempfile.mkdtemp(prefix="rotafacil-invalidacao-")
+    os.environ["CACHE_INVALIDACAO_DIR"] = diretorio
+    chaves = [str(uuid.uuid4()) for _ in range(args.rodadas)]
+
+    contexto = multiprocessing.get_context("spawn")
+    prontos, resultados, parar = contexto.Queue(), contexto.Queue(), contexto.Event()
+    processos = [
+        contexto.Process(target=_worker, args=(chaves, prontos, resultados, parar))
+        for _ in range(args.workers)
+    ]
+    for processo in processos:
+        processo.start()
+    try:
+        for _ in processos:
+            prontos.get(timeout=30)
+        latencias, falhas = asyncio.run(_publicar(chaves, args.workers, resultados))
+    finally:
+        parar.set()
+        for processo in processos:
+            processo.join(timeout=10)
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    latencias.sort()
+    print(f"workers={args.workers} invalidações={args.rodadas} entregas={len(latencias)} falhas={falhas}")
+    print(
+        f"propagação (ms): p50={statistics.median(latencias) * 1000:.3f} "
+        f"p99={latencias[int(len(latencias) * 0.99) - 1] * 1000:.3f} "
+        f"max={latencias[-1] * 1000:.3f}"
+    )
+    if falhas:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Requisições por segundo com os handlers de log diretos versus a fila (QueueHandler).
+
+Sobe um app FastAPI mínimo que loga `--logs-por-requisicao` linhas por requisição, no
+mesmo formato da API, e o exercita via ASGI com `--concorrencia` requisições simultâneas.
+Cada modo escreve num arquivo temporário; o console vai para /dev/null. Não precisa de
+Cassandra.
+
+    python -m benchmarks.logging_fila --requisicoes 5000 --concorrencia 64
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app import logging_config
+
+logger = logging.getLogger("benchmarks.logging_fila")
+
+
+def _criar_app(logs_por_requisicao):
+    app = FastAPI()
+
+    @app.get("/alunos/{aluno_id}")
+    async def obter(aluno_id: str):
+        for i in range(logs_por_requisicao):
+            logger.info("Buscando aluno com ID: %s (%d)", aluno_id, i)
+        return {"id": aluno_id}
+
+    return app
+
+
+async def _rodar(app, requisicoes, concorrencia):
+    limite = asyncio.Semaphore(concorrencia)
+    latencias = []
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        async def uma(i):
+            async with limite:
+                inicio = time.perf_counter()
+                resposta = await cliente.get(f"/alunos/{i}")
+                latencias.append(time.perf_counter() - inicio)
+                resposta.raise_for_status()
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*[uma(i) for i in range(requisicoes)])
+        total = time.perf_counter() - inicio
+    latencias.sort()
+    return requisicoes / total, statistics.median(latencias), latencias[max(int(len(latencias) * 0.99) - 1, 0)]
+
+
+def _medir(fila, args):
+    with tempfile.TemporaryDirectory() as diretorio, open(os.devnull, "w") as nulo:
+        logging_config.setup_logging(os.path.join(diretorio, "bench.log"), console=nulo, fila=fila)
+        try:
+            app = _criar_app(args.logs_por_requisicao)
+            # Aquecimento, fora da medição
+            asyncio.run(_rodar(app, min(200, args.requisicoes), args.concorrencia))
+            return asyncio.run(_rodar(app, args.requisicoes, args.concorrencia))
+        finally:
+            logging_config.encerrar_logging()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requisicoes", type=int, default=5000)
+    parser.add_argument("--concorrencia", type=int, default=64)
+    parser.add_argument("--logs-por-requisicao", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{'modo':<8} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for nome, fila in [("direto", False), ("fila", True)]:
+        rps, p50, p99 = _medir(fila, args)
+        print(f"{nome:<8} {rps:>10.0f} {p50 * 1000:>9.2f} {p99 * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
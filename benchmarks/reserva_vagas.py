@@ -0,0 +1,134 @@
+"""Teste de estresse da reserva de vagas: milhares de inscrições simultâneas numa viagem.
+
+Cria uma viagem com `--capacidade` vagas e `--alunos` alunos, dispara todas as inscrições
+de uma vez (mais `--duplicadas` repetições de alunos já enviados) e confere que:
+
+- o número de 201 é min(capacidade, alunos) (com repetições pode faltar alguma: a vaga que
+  uma repetição segura até o IF NOT EXISTS recusá-la pode ter sido negada a outro aluno);
+- vagas_disponiveis termina em capacidade - inscritos, nunca negativo;
+- viagem_alunos tem uma linha por 201, e nenhuma a mais.
+
+Sem `--url`, as requisições vão para a app em processo (ASGI); com `--url`, para um servidor
+já rodando (ex.: uvicorn com vários workers). Precisa do mesmo Cassandra da API, ou de
+CASSANDRA_MODE=memory com a app em processo. tests/test_reserva_vagas.py roda o mesmo cenário
+em memória.
+
+    python -m benchmarks.reserva_vagas --alunos 2000 --capacidade 40
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app import schema
+from app.database import connect_to_db_async, disconnect_from_db_async
+from app.lookups import gravar_lookups, remover_lookups
+from app.models import Aluno, Viagem, ViagemAlunos
+
+
+async def _criar_massa(alunos: int, capacidade: int):
+    viagem = Viagem(
+        data_viagem=datetime.now().replace(microsecond=0), id=uuid.uuid4(), rota_id=uuid.uuid4(),
+        vagas_disponiveis=capacidade, status="agendada",
+    )
+    await viagem.save_async()
+    await gravar_lookups(viagem)
+    limite = asyncio.Semaphore(64)
+
+    async def criar(i):
+        async with limite:
+            return await Aluno.create_async(
+                id=uuid.uuid4(), nome_completo=f"Estresse {i}", matricula=f"E{i:06d}", email=f"estresse{i}@exemplo.com",
+            )
+
+    return viagem, await asyncio.gather(*[criar(i) for i in range(alunos)])
+
+
+async def _limpar(viagem, alunos):
+    limite = asyncio.Semaphore(64)
+
+    async def remover(aluno):
+        async with limite:
+            await ViagemAlunos.filter(aluno_id=aluno.id).delete_async()
+            await aluno.delete_async()
+
+    await asyncio.gather(*[remover(aluno) for aluno in alunos])
+    await remover_lookups(viagem)
+    await viagem.delete_async()
+
+
+async def executar(alunos: int, capacidade: int, duplicadas: int, url: Optional[str] = None) -> Dict[str, Any]:
+    """Roda o cenário numa conexão já aberta e devolve os códigos, as linhas gravadas e as vagas restantes."""
+    viagem, cadastrados = await _criar_massa(alunos, capacidade)
+    try:
+        if url:
+            cliente = httpx.AsyncClient(base_url=url, timeout=60)
+        else:
+            from app.main import app
+            cliente = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste", timeout=60)
+
+        corpos = [{"viagem_id": str(viagem.id), "aluno_id": str(aluno.id)} for aluno in cadastrados]
+        corpos += corpos[:duplicadas]
+        inicio = time.perf_counter()
+        async with cliente:
+            respostas = await asyncio.gather(*[cliente.post("/viagem_alunos/", json=corpo) for corpo in corpos])
+        duracao = time.perf_counter() - inicio
+
+        atual = await Viagem.get_async(data_viagem=viagem.data_viagem, id=viagem.id, rota_id=viagem.rota_id)
+        return {
+            "enviadas": len(corpos),
+            "duracao": duracao,
+            "codigos": Counter(resposta.status_code for resposta in respostas),
+            "gravadas": await ViagemAlunos.filter(viagem_id=viagem.id).allow_filtering().count_async(),
+            "vagas": atual.vagas_disponiveis,
+        }
+    finally:
+        await _limpar(viagem, cadastrados)
+
+
+async def rodar(args) -> bool:
+    await connect_to_db_async()
+    try:
+        await schema.preparar_no_startup()
+        resultado = await executar(args.alunos, args.capacidade, args.duplicadas, args.url)
+    finally:
+        await disconnect_from_db_async()
+
+    codigos, gravadas, vagas = resultado["codigos"], resultado["gravadas"], resultado["vagas"]
+    enviadas, duracao = resultado["enviadas"], resultado["duracao"]
+    esperado = min(args.capacidade, args.alunos)
+    print(f"{enviadas} inscrições em {duracao:.2f}s ({enviadas / duracao:.0f}/s): {dict(codigos)}")
+    print(f"capacidade={args.capacidade} inscritos={codigos[201]} gravados={gravadas} vagas_restantes={vagas}")
+    violacoes = []
+    if codigos[201] > args.capacidade or gravadas > args.capacidade:
+        violacoes.append("capacidade excedida")
+    if vagas < 0 or vagas != args.capacidade - codigos[201]:
+        violacoes.append("vagas_disponiveis inconsistente com as inscrições")
+    if gravadas != codigos[201]:
+        violacoes.append("linhas em viagem_alunos diferentes dos 201")
+    if codigos[201] != esperado:
+        # Não viola a capacidade (ex.: 503 por disputa ou vaga presa por timeout), mas é reportado
+        print(f"aviso: esperados {esperado} inscritos")
+    for violacao in violacoes:
+        print(f"FALHA: {violacao}")
+    return not violacoes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alunos", type=int, default=2000)
+    parser.add_argument("--capacidade", type=int, default=40)
+    parser.add_argument("--duplicadas", type=int, default=100, help="Inscrições repetidas de alunos já enviados")
+    parser.add_argument("--url", help="URL de um servidor da API já rodando")
+    args = parser.parse_args()
+    if not asyncio.run(rodar(args)):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Latência (p50/p99) do caminho do caspyorm versus o registro de prepared statements.
+
+Para cada operação por chave primária (get, insert, update, delete) mede o caminho antigo
+(Model.get_async/create_async/update_async/delete_async) e o novo (app.statements), com
+`--concorrencia` requisições simultâneas. Precisa de um Cassandra acessível com as mesmas
+variáveis de ambiente da API.
+
+    python -m benchmarks.statements --operacoes 2000 --concorrencia 32
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from app import schema, statements
+from app.database import connect_to_db_async, disconnect_from_db_async
+from app.models import Rota
+
+
+def _nova_rota(i):
+    return dict(id=uuid.uuid4(), nome=f"bench {i}", origem="A", destino="B", ativo=True)
+
+
+async def _medir(funcao, argumentos, concorrencia):
+    limite = asyncio.Semaphore(concorrencia)
+    latencias = []
+
+    async def uma(argumento):
+        async with limite:
+            inicio = time.perf_counter()
+            await funcao(argumento)
+            latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[uma(argumento) for argumento in argumentos])
+    total = time.perf_counter() - inicio
+    latencias.sort()
+    return statistics.median(latencias), latencias[max(int(len(latencias) * 0.99) - 1, 0)], len(latencias) / total
+
+
+async def _caspyorm(operacoes, concorrencia):
+    rotas = [_nova_rota(i) for i in range(operacoes)]
+    instancias = {}
+
+    async def inserir(dados):
+        instancias[dados["id"]] = await Rota.create_async(**dados)
+
+    async def obter(dados):
+        await Rota.get_async(id=dados["id"])
+
+    async def atualizar(dados):
+        await instancias[dados["id"]].update_async(destino="C")
+
+    async def remover(dados):
+        await instancias[dados["id"]].delete_async()
+
+    return [(nome, await _medir(funcao, rotas, concorrencia)) for nome, funcao in
+            [("insert", inserir), ("get", obter), ("update", atualizar), ("delete", remover)]]
+
+
+async def _registro(operacoes, concorrencia):
+    rotas = [_nova_rota(i) for i in range(operacoes)]
+
+    async def inserir(dados):
+        await statements.criar(Rota, **dados)
+
+    async def obter(dados):
+        await statements.obter(Rota, id=dados["id"])
+
+    async def atualizar(dados):
+        await statements.atualizar(Rota, {"id": dados["id"]}, {"destino": "C"})
+
+    async def remover(dados):
+        await statements.remover(Rota, id=dados["id"])
+
+    return [(nome, await _medir(funcao, rotas, concorrencia)) for nome, funcao in
+            [("insert", inserir), ("get", obter), ("update", atualizar), ("delete", remover)]]
+
+
+async def rodar(operacoes: int, concorrencia: int) -> None:
+    await connect_to_db_async()
+    await schema.preparar_no_startup()
+    try:
+        inicio = time.perf_counter()
+        quantidade = await statements.aquecer()
+        print(f"aquecimento: {quantidade} statements em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        for caminho, medir in [("caspyorm", _caspyorm), ("registro", _registro)]:
+            for operacao, (p50, p99, taxa) in await medir(operacoes, concorrencia):
+                print(f"{caminho:<9} {operacao:<7} p50={p50 * 1000:8.3f} ms  p99={p99 * 1000:8.3f} ms  {taxa:8.0f} op/s")
+    finally:
+        await disconnect_from_db_async()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--operacoes", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(rodar(args.operacoes, args.concorrencia))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import logging
+
+from app.database import connect_to_db_async, disconnect_from_db_async
+from app.models import (
+    Rota, Veiculo, Motorista, Aluno, Admin, AlunoPorRota, AlunoPorViagem, Viagem, ViagemAlunos, ViagemPorDia,
+)
+from app.lookups import LOOKUPS, gravar_lookups, linha_por_dia, registrar_inscricao
+from app.paging import iterar_faixa, iterar_paginas
+from app.bulk import gravar_agrupado
+from app import counters, schema
+
+logger = logging.getLogger("manage")
+
+# Número máximo de escritas simultâneas disparadas pelos comandos de manutenção
+CONCORRENCIA_ESCRITAS = 32
+
+# Tabelas servidas pelos endpoints /count/
+MODELOS_CONTADOS = [Rota, Veiculo, Motorista, Aluno, Admin, Viagem, ViagemAlunos]
+
+
+async def backfill_alunos_por_rota(args):
+    """Reconstrói alunos_por_rota e alunos_por_viagem a partir de viagens e viagem_alunos."""
+    from caspyorm.connection import get_async_session
+
+    await AlunoPorRota.sync_table_async(auto_apply=True)
+    await AlunoPorViagem.sync_table_async(auto_apply=True)
+    await ViagemAlunos.sync_table_async(auto_apply=True)
+    if args.truncate:
+        session = get_async_session()
+        for tabela in ("alunos_por_rota", "alunos_por_viagem"):
+            await asyncio.to_thread(session.execute, f"TRUNCATE TABLE {tabela}")
+            logger.info("Tabela %s truncada.", tabela)
+
+    rotas_por_viagem = {}
+    async for viagens in iterar_paginas(Viagem, fetch_size=args.fetch_size):
+        for viagem in viagens:
+            rotas_por_viagem[viagem.id] = viagem.rota_id
+    logger.info("%d viagens carregadas.", len(rotas_por_viagem))
+
+    alunos = {}
+    limite = asyncio.Semaphore(CONCORRENCIA_ESCRITAS)
+    totais = {"gravadas": 0, "orfas": 0}
+
+    async def processar(inscricao):
+        async with limite:
+            rota_id = inscricao.rota_id or rotas_por_viagem.get(inscricao.viagem_id)
+            if rota_id is None:
+                totais["orfas"] += 1
+                return
+            if inscricao.rota_id is None:
+                await inscricao.update_async(rota_id=rota_id)
+            if inscricao.aluno_id not in alunos:
+                try:
+                    alunos[inscricao.aluno_id] = await Aluno.get_async(id=inscricao.aluno_id)
+                except Aluno.DoesNotExist:
+                    alunos[inscricao.aluno_id] = None
+            aluno = alunos[inscricao.aluno_id]
+            if aluno is None:
+                totais["orfas"] += 1
+                return
+            await registrar_inscricao(inscricao, aluno)
+            totais["gravadas"] += 1
+
+    async for inscricoes in iterar_paginas(ViagemAlunos, fetch_size=args.fetch_size):
+        await asyncio.gather(*[processar(inscricao) for inscricao in inscricoes])
+
+    logger.info(
+        "Backfill concluído: %d linhas gravadas, %d inscrições sem viagem ou aluno.",
+        totais["gravadas"], totais["orfas"],
+    )
+
+
+async def backfill_lookups(args):
+    """Regrava as tabelas de lookup (viagens_por_motorista etc.) a partir das tabelas de origem."""
+    limite = asyncio.Semaphore(CONCORRENCIA_ESCRITAS)
+
+    async def gravar(instancia):
+        async with limite:
+            await gravar_lookups(instancia)
+
+    for modelo, lookups in LOOKUPS.items():
+        for lookup, _ in lookups:
+            await lookup.sync_table_async(auto_apply=True)
+        total = 0
+        async for instancias in iterar_paginas(modelo, fetch_size=args.fetch_size):
+            await asyncio.gather(*[gravar(instancia) for instancia in instancias])
+            total += len(instancias)
+        logger.info("%s: %d linhas copiadas para %s.", modelo.__table_name__, total,
+                    ", ".join(lookup.__table_name__ for lookup, _ in lookups))
+
+
+async def backfill_viagens_por_dia(args):
+    """Copia as viagens para viagens_por_dia lendo faixas de token de viagens em paralelo."""
+    await ViagemPorDia.sync_table_async(auto_apply=True)
+    limite = asyncio.Semaphore(args.concorrencia)
+    totais = {"copiadas": 0, "erros": 0}
+
+    async def copiar_faixa(inicio, fim):
+        async with limite:
+            async for viagens in iterar_faixa(Viagem, inicio, fim, fetch_size=args.fetch_size):
+                # Agrupadas por partição (rota e dia) em UNLOGGED BATCHes
+                erros = await gravar_agrupado(list(enumerate(linha_por_dia(viagem) for viagem in viagens)))
+                totais["copiadas"] += len(viagens) - len(erros)
+                totais["erros"] += len(erros)
+
+    await asyncio.gather(*[copiar_faixa(inicio, fim) for inicio, fim in counters.faixas_de_token(args.faixas)])
+    logger.info(
+        "viagens_por_dia: %d viagens copiadas, %d falharam (rode de novo para repetir).",
+        totais["copiadas"], totais["erros"],
+    )
+
+
+async def reconciliar_contadores(args):
+    """Recalcula os contadores com uma varredura paralela por faixas de token e corrige o desvio."""
+    await counters.criar_tabela_contadores()
+    modelos = [m for m in MODELOS_CONTADOS if not args.tabela or m.__table_name__ in args.tabela]
+    for modelo in modelos:
+        await counters.reconciliar(modelo, faixas=args.faixas, concorrencia=args.concorrencia)
+
+
+async def migrar(args):
+    """Aplica o schema de app/models.py e grava a versão conferida pela inicialização rápida."""
+    # A tabela do lock é criada aqui, num único processo, e não por cada worker no startup
+    await schema.criar_tabela_lock()
+    if not await schema.aplicar(forcar=args.forcar):
+        logger.info("Schema já está na versão %s; nada a aplicar.", schema.impressao_digital()[:12])
+
+
+COMANDOS = {
+    "migrar": migrar,
+    "backfill-alunos-por-rota": backfill_alunos_por_rota,
+    "backfill-lookups": backfill_lookups,
+    "backfill-viagens-por-dia": backfill_viagens_por_dia,
+    "reconciliar-contadores": reconciliar_contadores,
+}
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Comandos de manutenção da Rota Fácil API.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    migracao = subparsers.add_parser(
+        "migrar",
+        help="Aplica o schema das tabelas; rode uma vez por deploy, antes de subir os workers.",
+    )
+    migracao.add_argument("--forcar", action="store_true", help="Sincroniza mesmo se a versão gravada já bate.")
+
+    backfill = subparsers.add_parser(
+        "backfill-alunos-por-rota",
+        help="Reconstrói alunos_por_rota e alunos_por_viagem a partir de viagens e viagem_alunos.",
+    )
+    backfill.add_argument("--truncate", action="store_true", help="Apaga a tabela antes de reconstruir.")
+    backfill.add_argument("--fetch-size", type=int, default=500, help="Linhas por página lida do Cassandra.")
+
+    lookups = subparsers.add_parser(
+        "backfill-lookups",
+        help="Copia as linhas existentes para as tabelas de lookup usadas nas listagens filtradas.",
+    )
+    lookups.add_argument("--fetch-size", type=int, default=500, help="Linhas por página lida do Cassandra.")
+
+    por_dia = subparsers.add_parser(
+        "backfill-viagens-por-dia",
+        help="Copia as viagens existentes para viagens_por_dia (partição por rota e dia).",
+    )
+    por_dia.add_argument("--faixas", type=int, default=256, help="Número de faixas de token da varredura.")
+    por_dia.add_argument("--concorrencia", type=int, default=16, help="Faixas copiadas em paralelo.")
+    por_dia.add_argument("--fetch-size", type=int, default=500, help="Linhas por página lida do Cassandra.")
+
+    reconciliar = subparsers.add_parser(
+        "reconciliar-contadores",
+        help="Recalcula os contadores usados pelos endpoints /count/ e corrige o desvio.",
+    )
+    reconciliar.add_argument("--tabela", action="append", help="Restringe a uma tabela (pode repetir).")
+    reconciliar.add_argument("--faixas", type=int, default=256, help="Número de faixas de token da varredura.")
+    reconciliar.add_argument("--concorrencia", type=int, default=16, help="Faixas contadas em paralelo.")
+
+    return parser
+
+
+async def main():
+    args = criar_parser().parse_args()
+    await connect_to_db_async()
+    try:
+        await COMANDOS[args.comando](args)
+    finally:
+        await disconnect_from_db_async()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
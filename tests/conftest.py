@@ -0,0 +1,6 @@
+import os
+
+# Os testes rodam no backend em memória; o modo é lido na importação de app.database
+os.environ["CASSANDRA_MODE"] = "memory"
+os.environ.pop("CASSANDRA_MEMORIA_LATENCIA_MS", None)
+os.environ.pop("CASSANDRA_MEMORIA_JITTER_MS", None)
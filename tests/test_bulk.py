@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app import bulk
+
+
+class Requisicao:
+    def __init__(self, corpo: bytes, tipo: str = "application/json", tamanho: int = 7):
+        self.corpo = corpo
+        self.headers = {"content-type": tipo}
+        self.tamanho = tamanho
+        self.pedacos_lidos = 0
+
+    async def stream(self):
+        for inicio in range(0, len(self.corpo), self.tamanho):
+            self.pedacos_lidos += 1
+            yield self.corpo[inicio:inicio + self.tamanho]
+        yield b""
+
+
+LINHAS = [{"indice": i, "texto": "ção \"]\n"} for i in range(20)] + [12345, None]
+
+
+@pytest.mark.parametrize("tamanho", [1, 5, 1000])
+def test_array_e_ndjson_em_pedacos(tamanho):
+    array = Requisicao(json.dumps(LINHAS).encode(), tamanho=tamanho)
+    ndjson = Requisicao("\n".join(json.dumps(linha) for linha in LINHAS).encode(), "application/x-ndjson", tamanho)
+
+    assert asyncio.run(bulk.ler_linhas(array)) == LINHAS
+    assert asyncio.run(bulk.ler_linhas(ndjson)) == LINHAS
+
+
+@pytest.mark.parametrize("corpo", [b"[1, 2", b"[1 2]", b"[1,]", b"[1] 2", b"\xff[1]"])
+def test_array_malformado(corpo):
+    with pytest.raises(HTTPException) as erro:
+        asyncio.run(bulk.ler_linhas(Requisicao(corpo)))
+    assert erro.value.status_code == 400
+
+
+def test_ndjson_com_linha_malformada():
+    linhas = asyncio.run(bulk.ler_linhas(Requisicao(b'{"a": 1}\nxx\n', "application/x-ndjson")))
+    assert linhas[0] == {"a": 1}
+    assert isinstance(linhas[1], ValueError)
+
+
+def test_para_de_ler_ao_passar_do_limite(monkeypatch):
+    monkeypatch.setattr(bulk, "BULK_MAX_LINHAS", 5)
+    requisicao = Requisicao(json.dumps(LINHAS).encode(), tamanho=10)
+
+    with pytest.raises(HTTPException) as erro:
+        asyncio.run(bulk.ler_linhas(requisicao))
+    assert erro.value.status_code == 413
+    assert requisicao.pedacos_lidos < len(requisicao.corpo) // 10
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from app.cache import EntityCache
+
+
+def test_misses_concorrentes_fazem_uma_carga():
+    cargas = []
+
+    async def cenario():
+        cache = EntityCache("teste", ttl=60, max_itens=10)
+
+        async def carregar():
+            cargas.append(1)
+            await asyncio.sleep(0.01)
+            return "valor"
+
+        return await asyncio.gather(*[cache.obter("chave", carregar) for _ in range(5)])
+
+    assert asyncio.run(cenario()) == ["valor"] * 5
+    assert len(cargas) == 1
+
+
+def test_cancelar_quem_carrega_nao_cancela_quem_aguarda():
+    cargas = []
+
+    async def cenario():
+        cache = EntityCache("teste", ttl=60, max_itens=10)
+
+        async def carregar():
+            cargas.append(1)
+            await asyncio.sleep(0.01)
+            return "valor"
+
+        lider = asyncio.create_task(cache.obter("chave", carregar))
+        await asyncio.sleep(0)
+        aguardando = asyncio.create_task(cache.obter("chave", carregar))
+        await asyncio.sleep(0)
+        lider.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await lider
+        return await aguardando
+
+    assert asyncio.run(cenario()) == "valor"
+    assert len(cargas) == 2
+
+
+def test_erro_da_carga_chega_a_quem_aguarda():
+    async def cenario():
+        cache = EntityCache("teste", ttl=60, max_itens=10)
+
+        async def carregar():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("falhou")
+
+        return await asyncio.gather(*[cache.obter("chave", carregar) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(resultado, RuntimeError) for resultado in asyncio.run(cenario()))
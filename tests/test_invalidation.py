@@ -0,0 +1,32 @@
+import asyncio
+
+from app.cache import EntityCache
+from app.invalidation import BarramentoUnix
+
+
+def test_publicar_num_worker_remove_a_entrada_do_outro(tmp_path):
+    async def cenario():
+        cache = EntityCache("rotas", ttl=60, max_itens=10)
+        publicador = BarramentoUnix(str(tmp_path), nome="worker-1")
+        assinante = BarramentoUnix(str(tmp_path), nome="worker-2")
+        assinante.assinar(lambda tabela, chave: cache.invalidar(chave) if tabela == cache.nome else None)
+        await publicador.iniciar()
+        await assinante.iniciar()
+        try:
+            async def carregar():
+                return "rota"
+
+            await cache.obter(("1",), carregar)
+            assert cache.estatisticas()["itens"] == 1
+
+            publicador.publicar("rotas", ("1",))
+            for _ in range(100):
+                if cache.estatisticas()["itens"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            return cache.estatisticas()["itens"]
+        finally:
+            await publicador.parar()
+            await assinante.parar()
+
+    assert asyncio.run(cenario()) == 0
@@ -0,0 +1,116 @@
+import uuid
+
+import pytest
+from cassandra import InvalidRequest
+from cassandra.query import BatchStatement, BatchType, SimpleStatement
+
+from app import memory
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def monotonic(self):
+        return self.agora
+
+
+@pytest.fixture
+def sessao():
+    sessao = memory.SessaoMemoria(memory.BancoMemoria("teste"))
+    sessao.execute(
+        "CREATE TABLE IF NOT EXISTS viagens (rota_id uuid, dia text, ordem int, vagas int, "
+        "PRIMARY KEY ((rota_id, dia), ordem))"
+    )
+    sessao.execute("CREATE TABLE IF NOT EXISTS contadores (nome text, fatia int, total counter, PRIMARY KEY (nome, fatia))")
+    return sessao
+
+
+def _inserir(sessao, rota_id, ordem, vagas=10, dia="2026-10-20"):
+    sessao.execute("INSERT INTO viagens (rota_id, dia, ordem, vagas) VALUES (?, ?, ?, ?)", [rota_id, dia, ordem, vagas])
+
+
+def test_select_pagina_pela_particao_em_ordem_de_clustering(sessao):
+    rota_id = uuid.uuid4()
+    for ordem in reversed(range(7)):
+        _inserir(sessao, rota_id, ordem)
+    _inserir(sessao, uuid.uuid4(), 0)
+    consulta = SimpleStatement("SELECT ordem FROM viagens WHERE rota_id = ? AND dia = ?", fetch_size=3)
+
+    lidas, estado = [], None
+    while True:
+        resultado = sessao.execute(consulta, [rota_id, "2026-10-20"], paging_state=estado)
+        lidas.append([linha.ordem for linha in resultado.current_rows])
+        estado = resultado.paging_state
+        if not resultado.has_more_pages:
+            break
+
+    assert lidas == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_select_sem_a_particao_exige_allow_filtering(sessao):
+    _inserir(sessao, uuid.uuid4(), 1, vagas=3)
+    with pytest.raises(InvalidRequest):
+        sessao.execute("SELECT * FROM viagens WHERE vagas = ?", [3])
+    assert len(sessao.execute("SELECT * FROM viagens WHERE vagas = ? ALLOW FILTERING", [3]).all()) == 1
+
+
+def test_insert_if_not_exists(sessao):
+    rota_id = uuid.uuid4()
+    cql = "INSERT INTO viagens (rota_id, dia, ordem, vagas) VALUES (?, ?, ?, ?) IF NOT EXISTS"
+
+    assert sessao.execute(cql, [rota_id, "2026-10-20", 1, 5]).was_applied
+    repetido = sessao.execute(cql, [rota_id, "2026-10-20", 1, 9])
+    assert not repetido.was_applied
+    assert repetido.one().vagas == 5
+
+
+def test_update_condicional_e_if_exists(sessao):
+    rota_id = uuid.uuid4()
+    _inserir(sessao, rota_id, 1, vagas=2)
+    cas = "UPDATE viagens SET vagas = ? WHERE rota_id = ? AND dia = ? AND ordem = ? IF vagas = ?"
+
+    assert sessao.execute(cas, [1, rota_id, "2026-10-20", 1, 2]).was_applied
+    perdeu = sessao.execute(cas, [0, rota_id, "2026-10-20", 1, 2])
+    assert not perdeu.was_applied
+    assert perdeu.one().vagas == 1
+
+    se_existe = "UPDATE viagens SET vagas = ? WHERE rota_id = ? AND dia = ? AND ordem = ? IF EXISTS"
+    assert not sessao.execute(se_existe, [7, rota_id, "2026-10-20", 2]).was_applied
+    assert sessao.execute("SELECT * FROM viagens WHERE rota_id = ? AND dia = ? AND ordem = ?",
+                          [rota_id, "2026-10-20", 2]).one() is None
+
+
+def test_ttl_expira_a_linha(sessao, monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(memory, "time", relogio)
+    rota_id = uuid.uuid4()
+    sessao.execute("INSERT INTO viagens (rota_id, dia, ordem, vagas) VALUES (?, ?, ?, ?) USING TTL 60",
+                   [rota_id, "2026-10-20", 1, 3])
+    consulta = "SELECT * FROM viagens WHERE rota_id = ? AND dia = ?"
+
+    relogio.agora += 59
+    assert len(sessao.execute(consulta, [rota_id, "2026-10-20"]).all()) == 1
+    relogio.agora += 2
+    assert sessao.execute(consulta, [rota_id, "2026-10-20"]).all() == []
+
+
+def test_contadores_somam(sessao):
+    incrementar = "UPDATE contadores SET total = total + ? WHERE nome = ? AND fatia = ?"
+    for fatia, delta in [(0, 3), (1, 2), (0, -1)]:
+        sessao.execute(incrementar, [delta, "alunos", fatia])
+
+    linhas = sessao.execute("SELECT fatia, total FROM contadores WHERE nome = ?", ["alunos"]).all()
+    assert [(linha.fatia, linha.total) for linha in linhas] == [(0, 2), (1, 2)]
+
+
+def test_batch_com_prepared_statements(sessao):
+    rota_id = uuid.uuid4()
+    inserir = sessao.prepare("INSERT INTO viagens (rota_id, dia, ordem, vagas) VALUES (?, ?, ?, ?)")
+    batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+    for ordem in range(3):
+        batch.add(inserir, [rota_id, "2026-10-20", ordem, ordem])
+    sessao.execute(batch)
+
+    linhas = sessao.execute("SELECT ordem, vagas FROM viagens WHERE rota_id = ? AND dia = ?", [rota_id, "2026-10-20"]).all()
+    assert [(linha.ordem, linha.vagas) for linha in linhas] == [(0, 0), (1, 1), (2, 2)]
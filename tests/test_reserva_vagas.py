@@ -0,0 +1,41 @@
+import asyncio
+
+from app import schema
+from app.database import connect_to_db_async, disconnect_from_db_async
+from benchmarks import reserva_vagas
+
+ALUNOS = 300
+CAPACIDADE = 25
+DUPLICADAS = 40
+
+
+async def _cenario(duplicadas):
+    await connect_to_db_async()
+    try:
+        await schema.preparar_no_startup()
+        return await reserva_vagas.executar(ALUNOS, CAPACIDADE, duplicadas)
+    finally:
+        await disconnect_from_db_async()
+
+
+def test_inscricoes_simultaneas_preenchem_a_capacidade():
+    resultado = asyncio.run(_cenario(0))
+    codigos = resultado["codigos"]
+
+    assert codigos[201] == CAPACIDADE
+    assert codigos[409] == ALUNOS - CAPACIDADE
+    assert resultado["gravadas"] == CAPACIDADE
+    assert resultado["vagas"] == 0
+
+
+def test_inscricoes_repetidas_nao_excedem_a_capacidade():
+    resultado = asyncio.run(_cenario(DUPLICADAS))
+    codigos = resultado["codigos"]
+
+    # A repetição reserva uma vaga antes de o IF NOT EXISTS recusá-la e só então a devolve;
+    # quem chegou nesse intervalo pode ter visto a viagem lotada
+    assert codigos[201] <= CAPACIDADE
+    # Lotada ou aluno repetido: todas as demais são 409
+    assert codigos[409] == ALUNOS + DUPLICADAS - codigos[201]
+    assert resultado["gravadas"] == codigos[201]
+    assert resultado["vagas"] == CAPACIDADE - codigos[201]